@@ -0,0 +1,75 @@
+"""
+Compares the memory and fan-out iteration cost of the subscription cache layouts.
+
+The previous layout was a dict of dicts holding TextChannel objects with a __dict__ and an already_posted list,
+copied on every notification. The current layout is a SubscriptionStore of __slots__ TextChannel objects that
+is iterated through a cached snapshot.
+
+Run from the repository root: ``python -m benchmarks.subscription_store [subscriptions] [communities]``
+"""
+import sys
+import tracemalloc
+from timeit import timeit
+
+from models import TextChannel, SubscriptionStore
+
+
+class LegacyTextChannel:
+    def __init__(self, channel_id, role_id, media_enabled, comments_enabled):
+        self.id = channel_id
+        self.role_id = role_id
+        self.media_enabled = media_enabled
+        self.comments_enabled = comments_enabled
+        self.already_posted = []
+
+
+def build_legacy(subscriptions, communities):
+    channels = {}
+    for channel_id in range(subscriptions):
+        community = channels.setdefault(f"community{channel_id % communities}", {})
+        community[channel_id] = LegacyTextChannel(channel_id, None, True, True)
+    return channels
+
+
+def build_current(subscriptions, communities):
+    channels = {}
+    for channel_id in range(subscriptions):
+        community = channels.get(f"community{channel_id % communities}")
+        if community is None:
+            community = channels[f"community{channel_id % communities}"] = SubscriptionStore()
+        community[channel_id] = TextChannel(channel_id, None, True, True)
+    return channels
+
+
+def measure_memory(build, *args):
+    """Bytes allocated by the Python heap to hold the cache."""
+    tracemalloc.start()
+    cache = build(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, cache
+
+
+def fan_out_legacy(cache):
+    for community in cache.values():
+        for channel in (community.copy()).values():
+            channel.media_enabled
+
+
+def fan_out_current(cache):
+    for community in cache.values():
+        for channel in community.snapshot():
+            channel.media_enabled
+
+
+def main(subscriptions=200000, communities=50, runs=20):
+    print(f"{subscriptions} subscriptions across {communities} communities.")
+    for name, build, fan_out in (("legacy", build_legacy, fan_out_legacy),
+                                 ("current", build_current, fan_out_current)):
+        size, cache = measure_memory(build, subscriptions, communities)
+        seconds = timeit(lambda: fan_out(cache), number=runs) / runs
+        print(f"{name:>8}: {size / 1024 / 1024:.1f} MiB, {seconds * 1000:.2f} ms to iterate every community.")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
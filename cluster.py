@@ -0,0 +1,130 @@
+import asyncio
+import json
+import sys
+from os import getenv, environ, remove, path
+from time import time
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from models.ClusterClient import MAX_MESSAGE_BYTES
+
+load_dotenv()  # reloads .env to memory
+
+
+def get_shard_ranges(shard_count, workers) -> List[List[int]]:
+    """Split the shards into consecutive ranges of (nearly) the same size, one for each worker."""
+    size, extra = divmod(shard_count, workers)
+    ranges = []
+    start = 0
+    for worker_id in range(workers):
+        end = start + size + (worker_id < extra)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+class ClusterLauncher:
+    def __init__(self, workers, shard_count, socket_path, report_interval=60, restart_delay=5):
+        """
+        Runs the bot as several worker processes that each own a range of shards.
+
+        Worker 0 polls Weverse and builds each notification once (translations and media), then publishes it to
+        the launcher which sends it to every worker. Every worker only delivers to the channels of its own shards.
+        Workers that exit are restarted.
+
+        :param workers: Amount of worker processes.
+        :param shard_count: Total amount of shards across the workers.
+        :param socket_path: The Unix socket the workers connect to.
+        :param report_interval: Seconds between printing the health of the workers.
+        :param restart_delay: Seconds to wait before restarting a worker that exited.
+        """
+        self.shard_count = shard_count
+        self.socket_path = socket_path
+        self.report_interval = report_interval
+        self.restart_delay = restart_delay
+        self.shard_ranges = get_shard_ranges(shard_count, workers)
+        self._processes: Dict[int, asyncio.subprocess.Process] = {}
+        self._connections: Dict[int, asyncio.StreamWriter] = {}
+        self._health: Dict[int, dict] = {}  # worker id : last health report
+
+    async def start(self):
+        if path.exists(self.socket_path):
+            remove(self.socket_path)
+        await asyncio.start_unix_server(self._handle_worker, self.socket_path, limit=MAX_MESSAGE_BYTES)
+        for worker_id in range(len(self.shard_ranges)):
+            await self._spawn(worker_id)
+
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.report()
+
+    async def _spawn(self, worker_id):
+        env = dict(environ)
+        env.update({
+            "CLUSTER_SOCKET": self.socket_path,
+            "CLUSTER_WORKER_ID": str(worker_id),
+            "CLUSTER_SHARD_IDS": ",".join(str(shard_id) for shard_id in self.shard_ranges[worker_id]),
+            "CLUSTER_SHARD_COUNT": str(self.shard_count),
+        })
+        process = self._processes[worker_id] = await asyncio.create_subprocess_exec(sys.executable, "run.py", env=env)
+        print(f"Started worker {worker_id} (PID {process.pid}) with shards {self.shard_ranges[worker_id]}.")
+        asyncio.get_event_loop().create_task(self._watch(worker_id, process))
+
+    async def _watch(self, worker_id, process):
+        return_code = await process.wait()
+        print(f"Worker {worker_id} exited with code {return_code}. Restarting in {self.restart_delay} seconds.")
+        await asyncio.sleep(self.restart_delay)
+        await self._spawn(worker_id)
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        worker_id = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                message_type = message.get("type")
+                if message_type == "hello":
+                    worker_id = message["worker"]
+                    self._connections[worker_id] = writer
+                elif message_type == "notification":
+                    await self.broadcast(line)
+                elif message_type == "health" and worker_id is not None:
+                    self._health[worker_id] = dict(message["health"], reported_at=time())
+        except Exception as e:
+            print(f"{e} (Exception) - Lost the connection to worker {worker_id}.")
+        finally:
+            if worker_id is not None and self._connections.get(worker_id) is writer:
+                self._connections.pop(worker_id)
+            writer.close()
+
+    async def broadcast(self, line: bytes):
+        """Send a message (an encoded line) to every connected worker."""
+        for worker_id, writer in list(self._connections.items()):
+            try:
+                writer.write(line)
+                await writer.drain()
+            except Exception as e:
+                print(f"{e} (Exception) - Failed to send a notification to worker {worker_id}.")
+
+    def report(self):
+        """Print the health of every worker."""
+        for worker_id, shard_ids in enumerate(self.shard_ranges):
+            health = self._health.get(worker_id)
+            if not health:
+                print(f"Worker {worker_id} (shards {shard_ids}) has not reported its health.")
+                continue
+            print(f"Worker {worker_id} (shards {shard_ids}) - Connected: {worker_id in self._connections} - "
+                  f"Last Report: {time() - health['reported_at']:.0f}s ago - Guilds: {health.get('guilds')} - "
+                  f"Latency: {health.get('latency', 0):.3f}s - Notification Lag: {health.get('lag', 0):.3f}s - "
+                  f"Loop Lag: {health.get('loop_lag', 0):.3f}s - Queues: {health.get('queues')}")
+
+
+if __name__ == '__main__':
+    launcher = ClusterLauncher(
+        workers=int(getenv("CLUSTER_WORKERS") or 2),  # worker processes
+        shard_count=int(getenv("CLUSTER_SHARD_COUNT") or getenv("CLUSTER_WORKERS") or 2),  # total shards
+        socket_path=getenv("CLUSTER_SOCKET") or "/tmp/weversebot.sock",  # socket the workers connect to
+    )
+    asyncio.get_event_loop().run_until_complete(launcher.start())
@@ -26,6 +26,12 @@ class BotInfo(commands.Cog):
         """Sends Ping."""
         return await ctx.send(f"{int(self.bot.latency * 1000)}ms")
 
+    @commands.is_owner()
+    @commands.command()
+    async def metrics(self, ctx):
+        """View a summary of the delivery metrics."""
+        return await ctx.send(f"```{self.bot.metrics.summary()[:1990] or 'There are no metrics yet.'}```")
+
     @commands.command()
     async def servercount(self, ctx):
         """View amount of servers connected to bot."""
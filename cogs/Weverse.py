@@ -1,28 +1,48 @@
 import asyncio
+from datetime import datetime, timedelta
+from time import monotonic
+from collections import OrderedDict
+from functools import partial
+from itertools import islice
 from typing import Optional, TYPE_CHECKING, List, Union
 
 import discord
 from discord.ext import commands, tasks
-from asyncio import get_event_loop, sleep
+from asyncio import get_event_loop
 from Weverse import WeverseClientAsync, models
-from os import getenv
+from os import getenv, path
 from aiohttp import ClientSession
-from models import TextChannel
+from models import TextChannel, SubscriptionStore, DeliveryScheduler, DedupStore, WriteBehindQueue, CommunityIndex, \
+    MediaStore, MediaDownloader, VideoJobPool, TranslationCache, CommentCache, NotificationJob, NotificationPipeline, \
+    MessagePacker, PackedMessage, PublishQueue, Outbox, ChannelResolver, ClusterClient, NotificationCoalescer, \
+    StartupBarrier, WeverseSnapshot
 from random import randint
-import aiofiles
 
 if TYPE_CHECKING:
     from ..run import WeverseBot
 
 DEV_MODE = False
+LEDGER_PRUNE_INTERVAL = 3600  # seconds between removing expired deliveries from the delivery ledger
 
 
 class Weverse(commands.Cog):
     def __init__(self, bot):
         self.bot: WeverseBot = bot
-        self._channels = {}  # Community Name : { channel_id: models.TextChannel }
+        self._metrics = bot.metrics
+        self._channels = {}  # Community Name : models.SubscriptionStore
+        self._channel_communities = {}  # channel_id : { Community Names }
+        self._resolver = ChannelResolver(
+            bot,
+            negative_ttl=int(getenv("CHANNEL_NEGATIVE_TTL") or 3600),  # seconds a channel that was not found is skipped
+            access_ttl=int(getenv("CHANNEL_ACCESS_TTL") or 300),  # seconds the bot's permissions in a channel are kept
+        )
+        self._community_index = CommunityIndex()
+        # these phases run in parallel, and notifications are only handled once all of them are done.
+        self._startup = StartupBarrier("database", "subscriptions", "weverse cache", "gateway")
         loop = get_event_loop()
-        loop.create_task(self.fetch_channels())
+        loop.create_task(self._startup.run("database", self.bot.conn.wait_until_ready()))
+        loop.create_task(self._startup.run("subscriptions", self.fetch_channels()))
+        loop.create_task(self._startup.run("gateway", self.bot.wait_until_ready()))
         self._web_session = ClientSession()
         client_kwargs = {
             "verbose": True,  # Will print warning messages for links that have failed to connect or were not found.
@@ -32,16 +52,129 @@ class Weverse(commands.Cog):
             "username": getenv("WEVERSE_USERNAME") or None,  # username to log in
             "password": getenv("WEVERSE_PASSWORD") or None,  # password to log in
             "loop": loop,  # current event loop
-            'hook': self.on_new_notifications
         }
 
+        # in cluster mode (started by cluster.py), only worker 0 polls Weverse and builds notifications.
+        self._cluster: Optional[ClusterClient] = None
+        self._is_poller = True
+        if getenv("CLUSTER_SOCKET") and getenv("CLUSTER_WORKER_ID"):
+            worker_id = int(getenv("CLUSTER_WORKER_ID"))
+            self._cluster = ClusterClient(getenv("CLUSTER_SOCKET"), worker_id, self.on_cluster_notification,
+                                          self.get_cluster_health)
+            self._cluster.start()
+            self._is_poller = worker_id == 0  # the other workers still load the cache for the commands.
+
         self._translate_headers = {"Authorization": getenv("TRANSLATION_KEY")}
         self._translate_endpoint = getenv("TRANSLATION_URL")
+        self._translations = TranslationCache(
+            max_entries=int(getenv("TRANSLATION_CACHE_SIZE") or 5000),  # translations kept in memory
+            db=self.bot.conn if getenv("TRANSLATION_CACHE_PERSIST") else None,  # also store translations in the db
+        )
+        self._comments = CommentCache(
+            ttl=int(getenv("COMMENT_CACHE_TTL") or 30),  # seconds the artist comments of a post are reused
+            max_entries=int(getenv("COMMENT_CACHE_SIZE") or 1000),  # posts whose comments are kept in memory
+        )
+        self._comments_seen = 0  # comments of the Weverse client that were added to the comment cache
         self._weverse_image_folder = getenv("WEVERSE_FOLDER_LOCATION")
         self._upload_from_host = getenv("UPLOAD_FROM_HOST")
+        # when set, media is uploaded once to this channel and the attachment urls are sent to every channel.
+        self._staging_channel_id = int(getenv("MEDIA_STAGING_CHANNEL_ID") or 0)
+        self._attachment_urls = OrderedDict()  # file location : discord attachment url
+        self._packer = MessagePacker(max_embeds=1)  # discord.py 1.x sends a single embed per message.
+        self._publisher = PublishQueue(
+            workers=int(getenv("PUBLISH_WORKERS") or 2),  # messages crossposted at once
+            channel_rate=int(getenv("PUBLISH_CHANNEL_RATE") or 10),  # crossposts per hour in a single news channel
+        )
+        self._publisher.start()
+        self._media_store = MediaStore(
+            self._weverse_image_folder,
+            max_bytes=int(getenv("MEDIA_STORE_MAX_BYTES") or 10 * 1024 ** 3),  # bytes of media kept on disk
+            max_age=int(getenv("MEDIA_STORE_MAX_AGE_SECONDS") or 7 * 86400),  # seconds media is kept after its use
+            # the index of stored media (keep it outside of the publicly served folder)
+            index_path=getenv("MEDIA_STORE_INDEX_LOCATION") or "media_store_index.json",
+        )
+        if self._is_poller:
+            # only the poller downloads media, so the index of any other worker would be stale and its eviction
+            # would remove files the poller still uses.
+            self._media_store.load()
+            self.media_store_loop.start()
+        self._downloader = MediaDownloader(
+            self._web_session, self._media_store,
+            per_host_limit=int(getenv("MEDIA_DOWNLOAD_PER_HOST") or 4),  # concurrent downloads from a single host
+        )
+
+        self._scheduler = DeliveryScheduler(
+            max_in_flight=int(getenv("DELIVERY_MAX_IN_FLIGHT") or 25),  # concurrent deliveries across notifications
+            global_rate=int(getenv("DELIVERY_GLOBAL_RATE") or 20),  # deliveries per second across the bot
+            route_rate=int(getenv("DELIVERY_CHANNEL_RATE") or 5),  # deliveries per 5 seconds to a single channel
+            lane_max_in_flight=int(getenv("DELIVERY_SHARD_MAX_IN_FLIGHT") or 10),  # concurrent deliveries per shard
+            max_pause=int(getenv("DELIVERY_SHARD_MAX_PAUSE") or 60),  # seconds to wait for a shard to reconnect
+        )
+        self._dedup = DedupStore(
+            max_entries=int(getenv("DEDUP_MAX_ENTRIES") or 2000),  # content ids remembered across communities
+            retention=int(getenv("DEDUP_RETENTION_SECONDS") or 86400),  # seconds a content id is remembered
+            # channel ids remembered across all content ids (the memory budget, ~70 bytes each)
+            max_channel_ids=int(getenv("DEDUP_MAX_CHANNEL_IDS") or 500000),
+        )
+        # (community name, content id, channel id, delivered at) waiting to be written to the delivery ledger.
+        self._pending_deliveries = []
+        self._ledger_pruned_at = monotonic()  # deliveries are pruned once the subscriptions are loaded.
+        self.delivery_ledger_loop.start()
+        self._outbox = Outbox(
+            self.bot.conn,
+            max_attempts=int(getenv("OUTBOX_MAX_ATTEMPTS") or 5),  # retries before a delivery is a dead-letter
+            base_delay=int(getenv("OUTBOX_BASE_DELAY") or 30),  # seconds before the first retry
+        )
+        self.outbox_loop.start()
+
+        # subscription changes are written straight to the DataBase unless write-behind batching is enabled.
+        self._db_writes = self.bot.conn
+        if getenv("DB_WRITE_BEHIND"):
+            self._db_writes = WriteBehindQueue(
+                self.bot.conn,
+                max_pending=int(getenv("DB_WRITE_BEHIND_MAX_PENDING") or 100),  # queued changes that trigger a flush
+                flush_interval=float(getenv("DB_WRITE_BEHIND_INTERVAL") or 5),  # seconds between flushes
+            )
+            self._db_writes.start()
+
+        # (resolve_text -> translate | resolve_media -> media) -> deliver
+        # text and media are resolved separately, so a full media stage never holds up a comment.
+        queue_size = int(getenv("PIPELINE_QUEUE_SIZE") or 100)  # notifications waiting in a stage before it blocks
+        self._pipeline = NotificationPipeline()
+        self._pipeline.add_stage("resolve_text", self._resolve_stage, workers=1, max_queue=queue_size)
+        self._pipeline.add_stage("resolve_media", self._resolve_stage, workers=1, max_queue=queue_size)
+        self._pipeline.add_stage("translate", self._build_stage, max_queue=queue_size,
+                                 workers=int(getenv("PIPELINE_TRANSLATE_WORKERS") or 4))
+        self._pipeline.add_stage("media", self._build_stage, max_queue=queue_size,
+                                 workers=int(getenv("PIPELINE_MEDIA_WORKERS") or 2))
+        self._pipeline.add_stage("deliver", self._deliver_stage, max_queue=queue_size,
+                                 workers=int(getenv("PIPELINE_DELIVER_WORKERS") or 4))
+        self._pipeline.start()
+
+        # notifications of a community that arrive within the window are sent together as a digest.
+        self._coalescer: Optional[NotificationCoalescer] = None
+        if getenv("COALESCE_WINDOW"):
+            self._coalescer = NotificationCoalescer(
+                self.deliver_digest,
+                window=float(getenv("COALESCE_WINDOW")),  # seconds to wait for more notifications of a community
+                max_delay=float(getenv("COALESCE_MAX_DELAY") or 60),  # seconds a notification is held at most
+                max_items=int(getenv("COALESCE_MAX_ITEMS") or 25),  # notifications merged into a digest at most
+            )
 
         self.weverse_client = WeverseClientAsync(**client_kwargs)
-        loop.create_task(self.weverse_client.start(create_old_posts=False, create_media=False))
+        self._snapshot = WeverseSnapshot(
+            getenv("WEVERSE_SNAPSHOT_LOCATION") or "weverse_snapshot.json",  # cache loaded before the live fetch
+            max_posts=int(getenv("WEVERSE_SNAPSHOT_POSTS") or 200),  # most recent posts kept in the snapshot
+        )
+        self._video_jobs = VideoJobPool(
+            self.download_video_stream,
+            folder=getenv("VIDEO_STAGING_FOLDER") or ".",  # where video streams are downloaded to (ex: a tmpfs)
+            max_bytes=int(getenv("VIDEO_MAX_BYTES") or 8000000),  # larger streams can not be uploaded to Discord
+        )
+        self._video_jobs.start()
+        self._video_tasks = set()  # deliveries waiting on video streams, outside of the pipeline workers.
+        self._metrics.add_collector(self.collect_metrics)
+        loop.create_task(self.start_weverse())
         # loop.create_task(self.test())
 
         """ 
@@ -51,10 +184,59 @@ class Weverse(commands.Cog):
             self.weverse_updates.start()
         """
 
+    async def start_weverse(self):
+        """Load the Weverse cache and then check for new notifications if this process is the poller.
+
+        The snapshot from the previous run is loaded first so the cache can be used right away, and the live fetch
+        refreshes it afterwards. The hook is only set after the cache loaded since the client would otherwise
+        never return from start.
+        """
+        loaded = await self._snapshot.load(self.weverse_client)
+        if loaded:
+            print(f"Loaded {loaded} communities from the Weverse snapshot.")
+            self._community_index.refresh(self.weverse_client.all_communities, force=True)
+            self._startup.finish("weverse cache")
+
+        await self._startup.run("weverse cache", self.weverse_client.start(create_old_posts=False,
+                                                                          create_media=False))
+        if not self.weverse_client.cache_loaded:
+            return
+        self._community_index.refresh(self.weverse_client.all_communities, force=True)
+
+        if not self._is_poller:
+            return  # the poller saves the snapshot, since every worker would write to the same file.
+
+        self.weverse_snapshot_loop.start()
+
+        # Weverse (1.1.8.2) has no public way to start the notification loop after start() returned, so this
+        # relies on the private `_hook` attribute and `_start_loop_for_hook` that start() uses when given a hook.
+        # Check both when upgrading Weverse.
+        self.weverse_client._hook = self.on_new_notifications
+        print("Starting Notification Loop for Weverse Client.")
+        await self.weverse_client._start_loop_for_hook()
+
+    async def download_video_stream(self, video: models.VideoStream, output_file_path, segment_paths: List[str]):
+        """Download a video stream through the Weverse client and record the segment files it writes.
+
+        Weverse (1.1.8.2) writes the segments to the working directory and only removes them once they were
+        joined, so they are recorded for the video job pool to remove after a cancelled or failed download. This
+        relies on the private `_download_ts_files`, which is only used by this download. Check it when upgrading
+        Weverse.
+        """
+        download_ts_files = self.weverse_client._download_ts_files
+
+        async def record_ts_files(urls, file_paths):
+            segment_paths.extend(file_paths)
+            return await download_ts_files(urls, file_paths)
+
+        self.weverse_client._download_ts_files = record_ts_files  # streams are downloaded one at a time.
+        try:
+            return await self.weverse_client.download_video_stream(video, output_file_path=output_file_path)
+        finally:
+            del self.weverse_client._download_ts_files  # back to the method of the client's class.
+
     async def test(self):
-        while not self.weverse_client.cache_loaded:
-            print("Sleeping...")
-            await sleep(3)
+        await self._startup.wait("weverse cache")
 
         only_channel = self.bot.get_channel(689693501600038919)
         from json import load
@@ -91,24 +273,110 @@ class Weverse(commands.Cog):
         except Exception as e:
             print(f"{e} - (Exception)")
 
+    async def translate_content(self, text, weverse_translate=None, content_desc=None) -> Optional[str]:
+        """Translate KR content to EN through the translation cache.
+
+        :param text: The content to translate.
+        :param weverse_translate: Coroutine function that translates the content through Weverse. The translating
+            endpoint is used if it is not given or fails.
+        :param content_desc: Describes the content when falling back to the translating endpoint.
+        :returns: The translated string.
+        """
+        async def translate():
+            translation = await weverse_translate() if weverse_translate else None
+            if not translation:
+                print(f"Attempting to use Self Translation for {content_desc}")
+                translation = await self.translate(text)
+            return translation
+
+        return await self._translations.get_or_translate(text, translate)
+
     async def fetch_channels(self):
         """Fetch the channels from DB and add them to cache."""
-        while not self.bot.conn.pool:
-            await sleep(3)  # give time for DataBase connection to establish and properly create tables/schemas.
+        await self.bot.conn.wait_until_ready()  # the tables/schemas are created and migrated.
         for channel_id, community_name, role_id, media_enabled, comments_enabled \
                 in await self.bot.conn.fetch_channels():
             self.add_to_cache(community_name, channel_id, role_id, media_enabled, comments_enabled)
 
-        # recreate the db (to match a new structure) and insert values from cache.
-        await self.update_db_struct_from_cache()
+        await self.load_deliveries()
+
+    async def prune_deliveries(self) -> datetime:
+        """Remove the deliveries that are older than the dedup retention from the ledger.
 
-    async def update_db_struct_from_cache(self):
-        """Will destroy the current db and update its structure and reinsert values from the current cache."""
-        await self.bot.conn.recreate_db()
-        for key, channels in self._channels.items():
-            for channel in channels.values():
-                await self.bot.conn.insert_weverse_channel(channel.id, f"{key}", channel.media_enabled,
-                                                           channel.comments_enabled)
+        :returns: The time deliveries were pruned before.
+        """
+        since = datetime.utcnow() - timedelta(seconds=self._dedup.retention)
+        await self.bot.conn.prune_deliveries(since)
+        self._ledger_pruned_at = monotonic()
+        return since
+
+    async def load_deliveries(self):
+        """Prune old deliveries from the ledger and warm the dedup store with the recent ones.
+
+        The deliveries keep the time they were made, so they expire and are evicted in the same order as they would
+        have without the restart.
+        """
+        since = await self.prune_deliveries()
+        now, utc_now = monotonic(), datetime.utcnow()
+        for community_name, content_id, channel_id, delivered_at in await self.bot.conn.fetch_deliveries(since):
+            self._dedup.mark_delivered((community_name, content_id), channel_id,
+                                       created_at=now - (utc_now - delivered_at).total_seconds())
+
+    async def flush_deliveries(self):
+        """Write the pending deliveries to the delivery ledger in one batch."""
+        if not self._pending_deliveries or not self.bot.conn.is_ready:
+            return
+
+        deliveries, self._pending_deliveries = self._pending_deliveries, []
+        try:
+            await self.bot.conn.insert_deliveries(deliveries)
+        except Exception as e:
+            print(f"{e} (Exception) - Failed to write {len(deliveries)} deliveries to the ledger.")
+            self._pending_deliveries.extend(deliveries)
+
+    @tasks.loop(seconds=10, minutes=0, hours=0, reconnect=True)
+    async def delivery_ledger_loop(self):
+        await self.flush_deliveries()
+        if self.bot.conn.is_ready and monotonic() - self._ledger_pruned_at > LEDGER_PRUNE_INTERVAL:
+            try:
+                await self.prune_deliveries()
+            except Exception as e:
+                print(f"{e} (Exception) - Failed to prune the delivery ledger.")
+                self._ledger_pruned_at = monotonic()  # try again on the next interval.
+
+    @tasks.loop(seconds=0, minutes=30, hours=0, reconnect=True)
+    async def weverse_snapshot_loop(self):
+        """Save the Weverse cache so the next startup can use it before the live fetch finished."""
+        try:
+            await self._snapshot.save(self.weverse_client)
+        except Exception as e:
+            print(f"{e} (Exception) - Failed to save the Weverse snapshot.")
+
+    @tasks.loop(seconds=0, minutes=5, hours=0, reconnect=True)
+    async def media_store_loop(self):
+        await self._media_store.evict()
+        await self._media_store.save()
+
+    def cog_unload(self):
+        if self._coalescer:
+            self._coalescer.flush_all()
+        if self._cluster:
+            self._cluster.stop()
+        self._pipeline.stop()
+        self._publisher.stop()
+        self._video_jobs.stop()
+        for task in self._video_tasks:
+            task.cancel()
+        self.delivery_ledger_loop.cancel()
+        self.outbox_loop.cancel()
+        self.media_store_loop.cancel()
+        self.weverse_snapshot_loop.cancel()
+        get_event_loop().create_task(self.flush_deliveries())
+        get_event_loop().create_task(self._outbox.flush())
+        if self._is_poller:
+            get_event_loop().create_task(self._media_store.save())
+        if isinstance(self._db_writes, WriteBehindQueue):
+            get_event_loop().create_task(self._db_writes.stop())
 
     def is_following(self, community_name, channel_id):
         """Check if a channel is following a community."""
@@ -117,18 +385,24 @@ class Weverse(commands.Cog):
         if not followed_channels:
             return False
 
-        return channel_id in followed_channels.keys()
+        return channel_id in followed_channels
 
     def check_community_exists(self, community_name):
         """Check if a community name exists."""
         if not community_name:
             return False
 
-        return community_name.lower() in self.get_community_names()
+        return self.communities.get_by_name(community_name) is not None
+
+    @property
+    def communities(self) -> CommunityIndex:
+        """The community index, synced with the Weverse client's cache (ex: communities followed by its loop)."""
+        self._community_index.refresh(self.weverse_client.all_communities)
+        return self._community_index
 
     def get_community_names(self) -> list:
         """Returns a list of all available community names."""
-        return [t_community.name.lower() for t_community in self.weverse_client.all_communities.values()]
+        return self.communities.names
 
     def get_channel(self, community_name, channel_id) -> Optional[TextChannel]:
         """Get a models.TextChannel object from a community"""
@@ -140,33 +414,113 @@ class Weverse(commands.Cog):
         """Add a channel to cache."""
         community_name = community_name.lower()
         channels = self._channels.get(community_name)
-        this_channel = TextChannel(channel_id, role_id, media_enabled, comments_enabled)
-        if not channels:
-            self._channels[community_name] = {channel_id: this_channel}
-        else:
-            channels[channel_id] = this_channel
+        if channels is None:
+            channels = self._channels[community_name] = SubscriptionStore()
+        channels[channel_id] = TextChannel(channel_id, role_id, media_enabled, comments_enabled)
+        self._channel_communities.setdefault(channel_id, set()).add(community_name)
 
     async def send_communities_available(self, ctx):
         """Send the available communites to a text channel."""
-        community_names = ', '.join(self.get_community_names())
-
-        return await ctx.send(f"The communities available are: ``{community_names}``.")
+        return await ctx.send(f"The communities available are: ``{self.communities.available}``.")
 
     async def delete_channel(self, channel_id, community_name):
         """Deletes a channel from a community in the cache and db."""
-        channels = self._channels.get(community_name.lower())
+        community_name = community_name.lower()
+        channels = self._channels.get(community_name)
         try:
             channels.pop(channel_id)
         except (AttributeError, KeyError):
             pass
-        await self.bot.conn.delete_weverse_channel(channel_id, community_name)
+
+        communities = self._channel_communities.get(channel_id)
+        if communities:
+            communities.discard(community_name)
+            if not communities:
+                self._channel_communities.pop(channel_id)
+        await self._db_writes.delete_weverse_channel(channel_id, community_name)
+
+    async def purge_channels(self, channel_ids):
+        """Deletes channels from every community they follow in the cache and db with a single batched call."""
+        deletes = []
+        for channel_id in channel_ids:
+            for community_name in self._channel_communities.pop(channel_id, ()):
+                channels = self._channels.get(community_name)
+                if channels:
+                    channels.pop(channel_id, None)
+                deletes.append((channel_id, community_name))
+
+        if deletes:
+            await self._db_writes.delete_weverse_channels(deletes)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        """Remove every subscription of a guild the bot is no longer in."""
+        self._resolver.invalidate_guild(guild.id)
+        await self.purge_channels([channel.id for channel in guild.channels])
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        """Remove every subscription of a deleted channel."""
+        self._resolver.invalidate(channel.id)
+        await self.purge_channels([channel.id])
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Compute the access of every subscribed channel."""
+        self._resolver.warm(list(self._channel_communities))
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id):
+        """Hold the deliveries of a shard until it is connected again."""
+        self._scheduler.pause_lane(shard_id)
+
+    @commands.Cog.listener()
+    async def on_shard_connect(self, shard_id):
+        self._scheduler.resume_lane(shard_id)
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id):
+        self._scheduler.resume_lane(shard_id)
+
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id):
+        self._scheduler.resume_lane(shard_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        self._resolver.invalidate(after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self._resolver.invalidate_guild(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self._resolver.invalidate_guild(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        # only received with the members intent, otherwise the bot's own role changes apply on a guild/role update.
+        if after.id == self.bot.user.id:
+            self._resolver.invalidate_guild(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        self._resolver.invalidate_guild(after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self._resolver.invalidate_guild(guild.id, [channel.id for channel in guild.channels])
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild: discord.Guild):
+        self._resolver.invalidate_guild(guild.id, [channel.id for channel in guild.channels])
 
     @commands.command()
     @commands.has_guild_permissions(manage_messages=True)
     async def list(self, ctx):
         """List the communities the current channel is following."""
-        followed_communities = [community_name for community_name in self.get_community_names() if
-                                self.is_following(community_name, ctx.channel.id)]
+        followed_communities = sorted(self._channel_communities.get(ctx.channel.id, ()))
         msg_string = f"You are currently following `{', '.join(followed_communities)}`."
         return await ctx.send(msg_string)
 
@@ -175,27 +529,22 @@ class Weverse(commands.Cog):
     async def weverse(self, ctx, *, community_name: str = None):
         """Follow or Unfollow a Weverse Community."""
         try:
-            community_names = ', '.join(self.get_community_names())
             if not community_name:
                 return await self.send_communities_available(ctx)
 
             community_name = community_name.lower()
 
-            community: Optional[models.Community] = None
-            for t_community in self.weverse_client.all_communities.values():
-                if t_community.name.lower() == community_name:
-                    community = t_community
-
+            community: Optional[models.Community] = self.communities.get_by_name(community_name)
             if not community:
                 return await ctx.send(f"The Weverse Community Name you have entered does not exist. Your options are "
-                                      f"``{community_names}``.")
+                                      f"``{self.communities.available}``.")
 
             if self.is_following(community.name, ctx.channel.id):
                 await self.delete_channel(ctx.channel.id, community.name)
                 await ctx.send(f"You are no longer following {community_name}.")
             else:
                 self.add_to_cache(community_name, ctx.channel.id, None, True, True)
-                await self.bot.conn.insert_weverse_channel(ctx.channel.id, community_name)
+                await self._db_writes.insert_weverse_channel(ctx.channel.id, community_name)
                 await ctx.send(f"You are now following {community.name}.")
         except Exception as e:
             return await ctx.send(e)
@@ -209,7 +558,7 @@ class Weverse(commands.Cog):
         if not text_channel:
             return
 
-        await self.bot.conn.toggle_media(ctx.channel.id, community_name, text_channel.media_enabled)
+        await self._db_writes.toggle_media(ctx.channel.id, community_name, text_channel.media_enabled)
         text_channel.media_enabled = not text_channel.media_enabled
         return await ctx.send(f"You will now{' no longer' if not text_channel.media_enabled else ''} receive "
                               f"media posts for this community.")
@@ -224,7 +573,7 @@ class Weverse(commands.Cog):
             if not text_channel:
                 return
 
-            await self.bot.conn.toggle_comments(ctx.channel.id, community_name, text_channel.comments_enabled)
+            await self._db_writes.toggle_comments(ctx.channel.id, community_name, text_channel.comments_enabled)
             text_channel.comments_enabled = not text_channel.comments_enabled
             return await ctx.send(f"You will now{' no longer' if not text_channel.comments_enabled else ''} receive "
                                   f"comments posts for this community.")
@@ -257,9 +606,9 @@ class Weverse(commands.Cog):
 
         if text_channel.role_id and text_channel.role_id == role.id:
             text_channel.role_id = None
-            await self.bot.conn.update_role(ctx.channel.id, community_name, None)
+            await self._db_writes.update_role(ctx.channel.id, community_name, None)
             return await ctx.send("This role will no longer be mentioned.")
-        await self.bot.conn.update_role(ctx.channel.id, community_name, role.id)
+        await self._db_writes.update_role(ctx.channel.id, community_name, role.id)
         text_channel.role_id = role.id
         return await ctx.send("That role will now receive notifications.")
 
@@ -305,24 +654,42 @@ class Weverse(commands.Cog):
         embed.set_image(url=image_url or EmptyEmbed)
         return embed
 
+    def sync_fetched_comments(self):
+        """Add the artist comments the Weverse client fetched since the last call to the comment cache.
+
+        The client adds the newest comment of each comment notification to the end of `all_comments` (and to the
+        artist comments of its post only if the post is cached), so only the entries after the last call are read.
+        """
+        all_comments = self.weverse_client.all_comments
+        new_comments = list(islice(reversed(all_comments.values()), max(len(all_comments) - self._comments_seen, 0)))
+        self._comments_seen = len(all_comments)
+        for comment in reversed(new_comments):  # oldest first, so the newest comment of a post ends up first.
+            self._comments.merge(comment.post_id, [comment])
+
     async def set_comment_embed(self, notification, embed_title):
         """Set Comment Embed for Weverse."""
         post = self.weverse_client.get_post_by_id(notification.contents_id)
         if post and post.artist_comments:
-            post_comments = post.artist_comments
-        else:
-            post_comments = await self.weverse_client.fetch_artist_comments(notification.community_id,
-                                                                            notification.contents_id)
-
+            self._comments.merge(post.id, post.artist_comments)
+        self.sync_fetched_comments()
+
+        # a later notification on the same post is about a newer comment, so older cached comments are not used.
+        def is_current(comments):
+            return self._comments.is_newer(comments[0], notification.notified_at)
+
+        post_comments = await self._comments.get_or_fetch(
+            notification.contents_id, partial(self.weverse_client.fetch_artist_comments, notification.community_id,
+                                              notification.contents_id), is_current)
+        if not post_comments:
+            return None, None
         comment = post_comments[0]
+
         comment_body = comment.body
 
-        translation = await self.weverse_client.translate(comment.id, is_comment=True,
-                                                          community_id=notification.community_id)
-        if not translation:
-            print(f"Attempting to use Self Translation for Noti ID: {notification.id} Community ID: "
-                  f"{notification.community_id}")
-            translation = await self.translate(comment_body)
+        translation = await self.translate_content(
+            comment_body, partial(self.weverse_client.translate, comment.id, is_comment=True,
+                                  community_id=notification.community_id),
+            f"Noti ID: {notification.id} Community ID: {notification.community_id}")
 
         embed_description = f"**{notification.message}**\n\n" \
                             f"Content: **{comment_body}**\n" \
@@ -334,23 +701,15 @@ class Weverse(commands.Cog):
         """Downloads an image url and returns image host url.
 
         If we are to upload from host, it will return the folder location instead (Unless the file is more than 8mb).
-
+        Files that were already downloaded are not downloaded again.
 
         :returns: (photos/videos)/image links and whether it is from the host.
         """
-        from_host = False
-        async with self._web_session.get(url) as resp:
-            async with aiofiles.open(self._weverse_image_folder + file_name, mode='wb') as fd:
-                data = await resp.read()
-                await fd.write(data)
-                print(f"{len(data)} - Length of Weverse File - {file_name}")
-                if len(data) >= 8000000:  # 8 mb
-                    return [f"https://images.irenebot.com/weverse/{file_name}", from_host]
-
-        if self._upload_from_host:
-            from_host = True
-            return [f"{self._weverse_image_folder}{file_name}", from_host]
-        return [f"https://images.irenebot.com/weverse/{file_name}", from_host]
+        size = await self._downloader.download(url, file_name)
+        print(f"{size} - Length of Weverse File - {file_name}")
+        if self._upload_from_host and size < 8000000:  # 8 mb
+            return [self._media_store.get_file_path(file_name), True]
+        return [f"https://images.irenebot.com/weverse/{self._media_store.get_relative_path(file_name)}", False]
 
     async def set_post_embed(self, model_object: Union[models.Notification, models.Post, int], embed_title):
         """Set Post Embed for Weverse.
@@ -373,13 +732,12 @@ class Weverse(commands.Cog):
 
         community_id = post.artist.community_id
 
-        translation = await self.weverse_client.translate(post.id, is_post=True, p_obj=post,
-                                                          community_id=community_id)
-
-        if not translation:
-            print(f"Attempting to use Self Translation for Post ID: {post.id} Community ID: "
-                  f"{community_id}")
-            translation = await self.translate(post.body)
+        # translate while the media downloads.
+        translation, (media_files, media_message, _) = await asyncio.gather(
+            self.translate_content(post.body, partial(self.weverse_client.translate, post.id, is_post=True,
+                                                      p_obj=post, community_id=community_id),
+                                   f"Post ID: {post.id} Community ID: {community_id}"),
+            self.get_media_files_and_urls(post))
 
         embed_description = f"**{message}**\n\n" \
                             f"Artist: **{post.artist.name} ({post.artist.list_name[0]})**\n" \
@@ -387,17 +745,15 @@ class Weverse(commands.Cog):
                             f"Translated Content: **{translation}**"
         embed = await self.create_embed(title=embed_title, title_desc=embed_description)
 
-        media_files, message, _ = await self.get_media_files_and_urls(post)
-
-        return embed, media_files, message
+        return embed, media_files, media_message
 
     async def get_media_files_and_urls(self, main_post: Union[models.Post, models.Media]):
         """Get media files and file urls of a post or media post."""
         # will either be file locations or image links.
-        photos = [await self.download_weverse_post(photo.original_img_url, photo.file_name) for photo in
-                  main_post.photos]
+        urls = [photo.original_img_url for photo in main_post.photos]
+        downloads = [self.download_weverse_post(photo.original_img_url, photo.file_name) for photo in
+                     main_post.photos]
 
-        videos = []
         if isinstance(main_post, models.Post):
             for video in main_post.videos:
                 start_loc = video.video_url.find("/video/") + 7
@@ -405,18 +761,27 @@ class Weverse(commands.Cog):
                     file_name = f"{main_post.id}_{randint(1, 50000000)}.mp4"
                 else:
                     file_name = video.video_url[start_loc: len(video.video_url)]
-                videos.append(await self.download_weverse_post(video.video_url, file_name))
-        video_file_paths = []
+                urls.append(video.video_url)
+                downloads.append(self.download_weverse_post(video.video_url, file_name))
+
+        # photos and videos are downloaded concurrently (limited per host by the downloader).
+        downloaded = await asyncio.gather(*downloads, return_exceptions=True)
+        # video streams are downloaded by the video job pool and are not waited on here.
+        video_jobs = []
         if isinstance(main_post, models.Media):
             for video in main_post.videos:
                 if isinstance(video, models.VideoStream):
-                    file_location = f"./{video.video_id}_{randint(1, 50000000)}.mp4"
-                    await self.weverse_client.download_video_stream(video, output_file_path=file_location)
-                    video_file_paths.append(file_location)
+                    video_jobs.append(self._video_jobs.submit(video, f"{video.video_id}_{randint(1, 50000000)}.mp4"))
 
         media_files = []  # can be photos or videos
         file_urls = []  # urls of photos or videos
-        for file in photos + videos:  # a list of lists containing the image
+        for url, file in zip(urls, downloaded):  # a list of lists containing the image
+            if isinstance(file, Exception):
+                # a single failed download should not stop the notification, so the original url is sent.
+                print(f"{file} (Exception) - Failed to download Weverse File - {url}")
+                file_urls.append(url)
+                continue
+
             media = file[0]
             from_host = file[1]
 
@@ -428,7 +793,7 @@ class Weverse(commands.Cog):
 
         message = "\n".join(file_urls)
 
-        return media_files, message, video_file_paths
+        return media_files, message, video_jobs
 
     async def set_announcement_embed(self, model_object: Union[models.Notification, models.Announcement, int]):
         """Set Announcement Embed for Weverse.
@@ -448,23 +813,18 @@ class Weverse(commands.Cog):
         if not announcement:
             return
 
-        print(f"Attempting to use Self Translation for Announcement ID: {announcement.id} Community ID: "
-              f"{announcement.community_id}")
-        translation = await self.translate(str(announcement))
+        translation = await self.translate_content(
+            str(announcement), content_desc=f"Announcement ID: {announcement.id} Community ID: "
+                                            f"{announcement.community_id}")
 
         embed_description = f"**{message}**\n\n" \
                             f"Content: **{str(announcement)}**\n\n" \
                             f"Translated Content: {translation}"
 
-        # create list of strings to split off into embeds.
-        desc_list: List[str] = []
-        cap = 1600
-        while len(embed_description) >= cap:
-            desc_list.append(embed_description[0:cap])
-            embed_description = embed_description[cap:len(embed_description)]
-
-        if embed_description:
-            desc_list.append(embed_description[0:len(embed_description)])
+        # create list of strings to split off into embeds, as large as the embed limits allow.
+        title_overhead = len(await self.create_embed(title=f"{announcement.title} - Post #999/999"))
+        desc_list: List[str] = MessagePacker.chunk_text(embed_description,
+                                                        self._packer.get_description_cap(title_overhead))
 
         embed_list = []
         for count, desc in enumerate(desc_list, 1):
@@ -479,7 +839,7 @@ class Weverse(commands.Cog):
 
         :param model_object: Notification object, Media object, or media id.
         :param embed_title: Title of the embed.
-        :returns: Embed, file locations, and image urls.
+        :returns: Embed, file locations, image urls, and the video stream jobs.
         """
         message = "There is a new post."
         if isinstance(model_object, models.Notification):
@@ -497,99 +857,243 @@ class Weverse(commands.Cog):
             embed = await self.create_embed(title=embed_title, title_desc=embed_description)
             video_link = media.video_link
 
-            media_files, message, video_file_paths = await self.get_media_files_and_urls(media)
+            media_files, message, video_jobs = await self.get_media_files_and_urls(media)
 
             if video_link:
                 message = f"{message}\n{video_link}"
 
-            return embed, media_files, message, video_file_paths
-        return None, None, None
+            return embed, media_files, message, video_jobs
+        return None, None, None, []
+
+    async def send_packed_message(self, channel: discord.TextChannel, packed_message: PackedMessage) \
+            -> discord.Message:
+        """Send a packed message to a channel."""
+        self._metrics.inc("messages_sent")
+        files = [discord.File(file_location) for file_location in packed_message.files] or None
+        embed = packed_message.embeds[0] if packed_message.embeds else None
+        return await channel.send(packed_message.content, embed=embed, files=files)
 
     async def send_weverse_to_channel(self, channel_info: TextChannel, message_text,
                                       embed_list: Union[discord.Embed, List[discord.Embed]], is_comment,
-                                      is_media, community_name, media=None, video_file_paths=None):
-        """Send a weverse post to a channel."""
+                                      is_media, community_name, media=None, video_file_paths=None, start_at=0,
+                                      sent_messages: list = None):
+        """Send a weverse post to a channel.
+
+        Exceptions other than the channel missing or being forbidden are raised since they may be temporary.
+
+        :param start_at: The index of the first packed message to send (the ones before it were already sent).
+        :param sent_messages: The index of each packed message is added to it once it was sent.
+        :returns: (bool) True if the post was sent.
+        """
         if (is_comment and not channel_info.comments_enabled) or (is_media and not channel_info.media_enabled):
             return  # if the user has the post disabled, we should not post it.
 
         if isinstance(embed_list, discord.Embed):
             # make the individual into a list
             embed_list = [embed_list]
+        if self._resolver.is_missing(channel_info.id):
+            return  # it was recently not found, so do not spend an API call on it.
+
         try:
             channel: discord.TextChannel = self.bot.get_channel(channel_info.id)
             if not channel:
                 # fetch channel instead (assuming discord.py cache did not load)
                 channel: discord.TextChannel = await self.bot.fetch_channel(channel_info.id)
-        except Exception as e:
+        except (discord.NotFound, discord.Forbidden) as e:
+            if isinstance(e, discord.NotFound):
+                self._metrics.inc("not_found")
+                self._resolver.mark_missing(channel_info.id)  # skip it in the deliveries still in flight.
+            else:
+                self._metrics.inc("forbidden")
             # remove the channel from future updates as it cannot be found.
-            print(f"{e} - Removing Text Channel {channel_info.id} from cache for {community_name} since it could not "
+            print(f"{e} - Removing Text Channel {channel_info.id} from cache for every community since it could not "
                   f"be processed/found.")
-            return await self.delete_channel(channel_info.id, community_name.lower())
+            return await self.purge_channels([channel_info.id])
+        except Exception as e:
+            # may be temporary (ex: a 5xx or a timeout), so it is raised for the delivery to be retried.
+            print(f"{e} (Exception) - Text Channel {channel_info.id} for {community_name} could not be resolved.")
+            raise
+
+        access = self._resolver.get_access(channel) if getattr(channel.guild, "me", None) else None
+        if access and (not access.can_send or not access.can_embed or (media and not access.can_attach)):
+            return  # we would only be Forbidden, so skip it without spending an API call.
 
         msg_list: List[discord.Message] = []
-        file_list = []
 
         try:
             mention_role = f"<@&{channel_info.role_id}>" if channel_info.role_id else None
-            for count, embed in enumerate(embed_list, 1):
-                msg_list.append(await channel.send(mention_role if count == 1 else None, embed=embed))
-            if message_text or media:
-                # Since an embed already exists, any individual content will not load
-                # as an embed -> Make it it's own message.
-                if media:
-                    # a list of file locations
-                    for photo_location in media:
-                        file_list.append(discord.File(photo_location))
-
-                msg_list.append(await channel.send(message_text if message_text else None, files=file_list or None))
-                print(f"Weverse Post for {community_name} sent to {channel_info.id}.")
+            for index, packed_message in enumerate(self._packer.pack(embed_list, media, message_text, mention_role)):
+                if index < start_at:
+                    continue
+                msg_list.append(await self.send_packed_message(channel, packed_message))
+                if sent_messages is not None:
+                    sent_messages.append(index)
+            print(f"Weverse Post for {community_name} sent to {channel_info.id}.")
         except discord.Forbidden as e:
             # no permission to post
             print(f"{e} (discord.Forbidden) - Weverse Post Failed to {channel_info.id} for {community_name}")
+            self._metrics.inc("forbidden")
 
             # remove the channel from future updates as we do not want it to clog our rate-limits.
-            return await self.delete_channel(channel_info.id, community_name.lower())
+            return await self.purge_channels([channel_info.id])
         except Exception as e:
             print(f"{e} (Exception) - Weverse Post Failed to {channel_info.id} for {community_name}")
-            return
+            self._metrics.inc("rate_limited" if getattr(e, "status", None) == 429 else "send_errors")
+            self.publish_messages(channel, access, msg_list)  # only the messages that were not sent are retried.
+            raise  # may be temporary, so the delivery can be retried.
 
-        if video_file_paths:
-            for video_file_path in video_file_paths:
+        if video_file_paths and (not access or access.can_attach):
+            for packed_message in self._packer.pack_files(video_file_paths):
                 try:
-                    file = discord.File(video_file_path)
-                    await channel.send(file=file)
+                    await self.send_packed_message(channel, packed_message)
                 except Exception as e:
                     print(f"Failed to upload local videos to channel {channel.id} - ERROR {e}")
 
-        if not channel.is_news():
+        self.publish_messages(channel, access, msg_list)
+        return True
+
+    def publish_messages(self, channel: discord.TextChannel, access, msg_list: List[discord.Message]):
+        """Publish messages if they were sent to a news channel."""
+        if access.can_publish if access else channel.is_news():
+            # published in the background so the fan-out does not wait on the crosspost rate-limit.
+            for msg in msg_list:
+                self._publisher.put(msg)
+
+    async def deliver_to_channel(self, dedup_key, channel_info: TextChannel, message_text,
+                                 embed_list: Union[discord.Embed, List[discord.Embed]], is_comment, is_media,
+                                 community_name, media=None, video_file_paths=None, merged_content_ids=None,
+                                 delivered: list = None, received_at=None):
+        """Send a weverse post to a channel and record it in the delivery ledger if it was sent.
+
+        If the send fails for a reason that may be temporary, it is added to the outbox to be retried from the first
+        message that was not sent. A dedup key of None (ex: a test post to a single channel) will not be recorded or
+        retried.
+        A digest is retried under the dedup key of its first content and recorded for every content it holds.
+
+        :param delivered: The channel is added to it if the post was sent.
+        :param received_at: When the notification was received, to time its first delivery.
+        """
+        sent_messages = []
+        try:
+            sent = await self.send_weverse_to_channel(channel_info, message_text, embed_list, is_comment, is_media,
+                                                      community_name, media=media,
+                                                      video_file_paths=video_file_paths, sent_messages=sent_messages)
+        except Exception as e:
+            if not dedup_key:
+                raise
+
+            if isinstance(embed_list, discord.Embed):
+                embed_list = [embed_list]
+            payload = {
+                "message_text": message_text,
+                "embeds": [embed.to_dict() for embed in embed_list],
+                "is_comment": is_comment,
+                "is_media": is_media,
+                "media": media,
+                "video_file_paths": video_file_paths,
+                "merged_content_ids": merged_content_ids,
+                "sent_messages": len(sent_messages),  # the packed messages that were already sent.
+            }
+            self._outbox.add(*dedup_key, channel_info.id, payload, e)
             return
 
-        for msg in msg_list:
-            try:
-                await msg.publish()
-            except Exception as e:
-                print(f"Failed to publish Message ID: {msg.id} for Channel ID: {channel_info.id} - {e}")
+        if sent and delivered is not None:
+            delivered.append(channel_info)
+            if received_at is not None and len(delivered) == 1:
+                self._metrics.observe("notification_stage_seconds", monotonic() - received_at,
+                                      stage="first_delivered")
+        if sent and dedup_key:
+            for content_id in merged_content_ids or [dedup_key[1]]:
+                self._pending_deliveries.append((dedup_key[0], content_id, channel_info.id, datetime.utcnow()))
+
+    async def retry_delivery(self, community_name, content_id, channel_info: TextChannel, payload: dict, attempts,
+                             delivered: list, failures: list):
+        """Retry a delivery from the outbox.
+
+        :param delivered: The outbox key is added to it if the delivery no longer needs to be retried.
+        :param failures: The outbox key, attempts, error, and payload are added to it if the retry failed.
+        """
+        key = (community_name, content_id, channel_info.id)
+        # temporary files (ex: video streams) may no longer exist.
+        media = [location for location in payload["media"] or [] if path.exists(location)]
+        video_file_paths = [location for location in payload["video_file_paths"] or [] if path.exists(location)]
+        sent_messages = []
+        try:
+            sent = await self.send_weverse_to_channel(
+                channel_info, payload["message_text"], [discord.Embed.from_dict(embed) for embed in payload["embeds"]],
+                payload["is_comment"], payload["is_media"], community_name, media=media,
+                video_file_paths=video_file_paths, start_at=payload.get("sent_messages") or 0,
+                sent_messages=sent_messages)
+        except Exception as e:
+            if sent_messages:
+                payload["sent_messages"] = sent_messages[-1] + 1
+            failures.append((*key, attempts + 1, e, payload))
+            return
 
-    async def send_notification(self, noti_object: models.Notification = None, only_channel: discord.TextChannel = None,
-                                media_object: models.Media = None, post_object: models.Post = None,
-                                announcement_object: models.Announcement = None):
-        """Manages a notification, post, or media to be sent to a text channel.
+        delivered.append(key)
+        if sent:
+            for delivered_id in payload.get("merged_content_ids") or [content_id]:
+                self._pending_deliveries.append((community_name, delivered_id, channel_info.id, datetime.utcnow()))
+
+    @tasks.loop(seconds=30, minutes=0, hours=0, reconnect=True)
+    async def outbox_loop(self):
+        """Retry the deliveries in the outbox that are due."""
+        await self._outbox.flush()
+        delivered, failures, jobs = [], [], []
+        for community_name, content_id, channel_id, payload, attempts in await self._outbox.fetch_due():
+            if self._cluster and not self.bot.get_channel(channel_id):
+                continue  # left for the worker that owns the channel's shard.
+
+            channel_info = self.get_channel(community_name, channel_id)
+            if not channel_info:
+                # the channel is no longer following the community.
+                delivered.append((community_name, content_id, channel_id))
+                continue
+
+            jobs.append((*self.get_shard_and_guild(channel_id), channel_id,
+                         partial(self.retry_delivery, community_name, content_id, channel_info, payload, attempts,
+                                 delivered, failures)))
+
+        # retries go through the same rate-limits as every other delivery.
+        await self._scheduler.fan_out(jobs)
+        self._outbox.retried += len(jobs)
+        await self._outbox.remove(delivered)
+        await self._outbox.record_failures(failures)
+        await self.flush_deliveries()
 
-        :param noti_object: Notification Object
-        :param only_channel: Discord.py TextChannel object if it should be only sent to a specific channel.
-        :param media_object: models.Media object if there is no notification.
-        :param post_object: models.Post object if there is no notification.
-        :param announcement_object: models.Announcement object if there is no notification.
+    @commands.is_owner()
+    @commands.command()
+    async def deadletters(self, ctx):
+        """View the most recent deliveries that failed and will no longer be retried."""
+        entries = await self._outbox.fetch_dead_letters()
+        if not entries:
+            return await ctx.send("There are no failed deliveries.")
+
+        lines = [f"{community_name} - Content ID: {content_id} - Channel ID: {channel_id} - Attempts: {attempts} - "
+                 f"{last_error}" for community_name, content_id, channel_id, attempts, last_error in entries]
+        return await ctx.send("\n".join(lines)[:2000])
+
+    def get_shard_and_guild(self, channel_id):
+        """Get the shard id and guild id of a text channel for fair scheduling.
+
+        Channels that are not cached yet are treated as their own guild on shard 0.
+        """
+        channel = self.bot.get_channel(channel_id)
+        guild = getattr(channel, "guild", None)
+        if not guild:
+            return 0, channel_id
+        return guild.shard_id, guild.id
+
+    def resolve_notification(self, noti_object: models.Notification = None,
+                             only_channel: discord.TextChannel = None, media_object: models.Media = None,
+                             post_object: models.Post = None, announcement_object: models.Announcement = None) \
+            -> Optional[NotificationJob]:
+        """Resolve the community, type, and text channels of a notification, post, or media.
+
+        :returns: The job to build and deliver or None if there is nothing to send.
         """
-        comment = None
-        is_comment = False
-        is_media = False
-        media = None
         community_name = None
         noti_type = None
-        embed = None
-        video_file_paths = []
-        embed_list = []
 
         if noti_object:
             community_name = noti_object.community_name or noti_object.bold_element
@@ -607,71 +1111,342 @@ class Weverse(commands.Cog):
             community_name = post_object.artist.community.name
             noti_type = "post"
 
-        if not community_name:
+        if not community_name or noti_type not in ("comment", "post", "media", "announcement"):
             return
 
+        main_object = noti_object or media_object or post_object or announcement_object
+        if self._cluster and not only_channel:
+            # the channels are only known by the worker that owns their shard, so every worker resolves its own.
+            return NotificationJob(main_object, noti_type, community_name, ())
+
         channels = self._channels.get(community_name.lower())
         if not channels and not only_channel:
             return
 
         if not only_channel:
-            channels = (channels.copy()).values()  # copy to prevent size change during iteration.
+            channels = channels.snapshot()  # snapshot to prevent size change during iteration.
             if not channels:
                 print("WARNING: There were no channels to post the Weverse notification to.")
                 return
         else:
             channels = [TextChannel(only_channel.id, 755505173723480228, True, True)]
 
-        main_object = noti_object or media_object or post_object or announcement_object
-        embed_title = f"New {community_name} Notification!"
-        message_text = None
-        if noti_type == 'comment':
-            is_comment = True
-            embed, comment = await self.set_comment_embed(main_object, embed_title)
-        elif noti_type == 'post':
-            is_media = True
-            embed, media, message_text = await self.set_post_embed(main_object, embed_title)
-        elif noti_type == 'media':
-            is_media = True
-            embed, media, message_text, video_file_paths = await self.set_media_embed(main_object, embed_title)
-        elif noti_type == 'announcement':
-            is_media = True
-            embed_list = await self.set_announcement_embed(main_object)
-        else:
+        if noti_type != 'comment' and not only_channel and \
+                self._dedup.all_delivered((community_name.lower(), main_object.id),
+                                          [channel_info.id for channel_info in channels]):
+            # every channel already has this content (ex: restarted after the fan-out), so skip building it.
+            return
+
+        return NotificationJob(main_object, noti_type, community_name, channels, only_channel)
+
+    async def build_notification(self, job: NotificationJob) -> bool:
+        """Translate the notification and download its media into embeds and files.
+
+        :returns: (bool) Whether the notification was built and can be delivered.
+        """
+        embed_title = f"New {job.community_name} Notification!"
+        if job.noti_type == 'comment':
+            job.embed, job.comment = await self.set_comment_embed(job.main_object, embed_title)
+        elif job.noti_type == 'post':
+            job.embed, job.media, job.message_text = await self.set_post_embed(job.main_object, embed_title)
+        elif job.noti_type == 'media':
+            job.embed, job.media, job.message_text, job.video_jobs = \
+                await self.set_media_embed(job.main_object, embed_title)
+        elif job.noti_type == 'announcement':
+            job.embed_list = await self.set_announcement_embed(job.main_object)
+
+        if not job.embed and not job.embed_list:
+            print(f"WARNING: Could not receive Weverse information for {job.community_name}. "
+                  f"Main Object ID:{job.main_object.id}.")
+            return False  # we do not want constant attempts to send a message.
+        return True
+
+    async def stage_media(self, file_locations: List[str]) -> Optional[List[str]]:
+        """Upload local files to the staging channel once and get their attachment urls.
+
+        Files that were already staged are not uploaded again.
+
+        :param file_locations: The locations of the files.
+        :returns: The attachment urls in the same order or None if they could not be staged.
+        """
+        try:
+            channel = self.bot.get_channel(self._staging_channel_id) or \
+                await self.bot.fetch_channel(self._staging_channel_id)
+            unstaged = [location for location in file_locations if location not in self._attachment_urls]
+            # grouped within the attachment count and upload size limits of a message.
+            for packed_message in self._packer.pack_files(unstaged):
+                msg = await channel.send(files=[discord.File(location) for location in packed_message.files])
+                for location, attachment in zip(packed_message.files, msg.attachments):
+                    self._attachment_urls[location] = attachment.url
+        except Exception as e:
+            print(f"{e} (Exception) - Failed to stage media to {self._staging_channel_id}. Uploading to each "
+                  f"channel instead.")
             return None
 
-        if not embed and not embed_list:
-            print(f"WARNING: Could not receive Weverse information for {community_name}. "
-                  f"Main Object ID:{main_object.id}.")
-            return  # we do not want constant attempts to send a message.
+        while len(self._attachment_urls) > 1000:
+            self._attachment_urls.popitem(last=False)
+        return [self._attachment_urls[location] for location in file_locations]
 
-        for channel_info in channels:
-            try:
-                channel_info: TextChannel = channel_info  # for typing
-                await sleep(2)
+    async def use_staged_media(self, job: NotificationJob):
+        """Replace the files of a notification with links to them after uploading them once."""
+        file_locations = (job.media or []) + job.video_file_paths
+        if not file_locations or job.only_channel:
+            return
 
-                id_to_check = main_object.id if not is_comment else comment.id
-                if id_to_check in channel_info.already_posted:
-                    continue
+        urls = await self.stage_media(file_locations)
+        if not urls:
+            return
+
+        job.message_text = "\n".join(([job.message_text] if job.message_text else []) + urls)
+        job.media = None
+        job.video_file_paths = []
+
+    async def wait_for_videos(self, job: NotificationJob):
+        """Wait for the video streams of a notification to download and add the ones that can be uploaded."""
+        if not job.video_jobs:
+            return
+        results = await asyncio.gather(*job.video_jobs, return_exceptions=True)
+        job.video_jobs = []
+        job.video_file_paths.extend(result for result in results if isinstance(result, str))
+
+    async def send_videos(self, channel_info: TextChannel, video_file_paths: List[str]):
+        """Upload video files to a channel the notification was already delivered to."""
+        channel = self._resolver.resolve(channel_info.id)
+        if not channel:
+            return
+        access = self._resolver.get_access(channel) if getattr(channel.guild, "me", None) else None
+        if access and not access.can_attach:
+            return
 
-                channel_info.already_posted.append(id_to_check)
-                print(f"Sending post for {community_name} to text channel {channel_info.id}.")
-                await self.send_weverse_to_channel(channel_info, message_text, embed or embed_list, is_comment,
-                                                   is_media,
-                                                   community_name, media=media, video_file_paths=video_file_paths)
+        for packed_message in self._packer.pack_files(video_file_paths):
+            try:
+                await self.send_packed_message(channel, packed_message)
             except Exception as e:
-                print(f"{e} - Failed to send to channel.")
+                print(f"Failed to upload local videos to channel {channel.id} - ERROR {e}")
+
+    def run_after_videos(self, job: NotificationJob, callback):
+        """Wait for the video streams of a notification and then run a coroutine function with it, in a task of its
+        own so a pipeline worker is not held by the downloads."""
+        async def run():
+            await self.wait_for_videos(job)
+            await callback(job)
+
+        task = get_event_loop().create_task(run())
+        self._video_tasks.add(task)
+        task.add_done_callback(self._video_tasks.discard)
+
+    async def upload_videos(self, job: NotificationJob, channel_infos: List[TextChannel]):
+        """Upload the video streams of a notification to the channels it was delivered to once they are downloaded.
+
+        The notification already links to the media, so the video jobs are cancelled if no channel received it.
+        """
+        if not channel_infos:
+            self._video_jobs.cancel(job.video_jobs)
+            job.video_jobs = []
+            return
+
+        await self.wait_for_videos(job)
+        if not job.video_file_paths:
+            return
+        await self._scheduler.fan_out([(*self.get_shard_and_guild(channel_info.id), channel_info.id,
+                                        partial(self.send_videos, channel_info, job.video_file_paths))
+                                       for channel_info in channel_infos])
+
+    async def deliver_notification(self, job: NotificationJob):
+        """Fan out a built notification to its text channels.
+
+        Video streams that are still downloading are uploaded to the channels in a second fan-out, so the
+        notification is not held up by them. A notification sent to a single channel or with staged media needs
+        the files first, so it is delivered once they are downloaded. Either way, the downloads are waited on in
+        a task of their own so the deliver workers stay free for the next notifications.
+        """
+        if job.video_jobs and (job.only_channel or self._staging_channel_id):
+            return self.run_after_videos(job, self.deliver_notification)
+
+        # the video files are temporary and are removed once delivered, even if they were only staged.
+        video_file_paths = job.video_file_paths
+        if self._staging_channel_id:
+            await self.use_staged_media(job)
+
+        dedup_key = job.dedup_key
+        dedup_keys = job.dedup_keys
+        jobs = []
+        delivered = []
+        for channel_info in job.channels:
+            channel_info: TextChannel = channel_info  # for typing
+
+            if self._cluster and not job.only_channel and not self.bot.get_channel(channel_info.id):
+                continue  # the channel is on a shard owned by another worker.
+
+            # a digest is skipped only if the channel already has every content in it.
+            if not job.only_channel and \
+                    all([self._dedup.check_and_mark(key, channel_info.id) for key in dedup_keys]):
+                continue
+
+            jobs.append((*self.get_shard_and_guild(channel_info.id), channel_info.id,
+                         partial(self.deliver_to_channel, None if job.only_channel else dedup_key, channel_info,
+                                 job.message_text, job.embed or job.embed_list, job.is_comment, job.is_media,
+                                 job.community_name, media=job.media, video_file_paths=job.video_file_paths,
+                                 merged_content_ids=job.merged_content_ids or None, delivered=delivered,
+                                 received_at=job.received_at)))
+
+        print(f"Sending post for {job.community_name} to {len(jobs)} text channels.")
+        await self._scheduler.fan_out(jobs)
+        await self.flush_deliveries()
+        if delivered and job.received_at is not None:
+            self._metrics.observe("notification_stage_seconds", monotonic() - job.received_at,
+                                  stage="last_delivered")
+
+        if job.video_jobs and delivered:
+            return self.run_after_videos(job, partial(self.finish_videos, delivered=delivered))
+        if job.video_jobs:
+            await self.upload_videos(job, delivered)  # no channel received it, so the video jobs are cancelled.
+
+        if job.owns_files:
+            await self.weverse_client.run_blocking_code(self.weverse_client._remove_files, video_file_paths)
+
+    async def finish_videos(self, job: NotificationJob, delivered: List[TextChannel]):
+        """Upload the downloaded video streams to the channels that received the notification and remove them."""
+        await self.upload_videos(job, delivered)
+        if job.owns_files:
+            await self.weverse_client.run_blocking_code(self.weverse_client._remove_files, job.video_file_paths)
+
+    async def publish_notification(self, job: NotificationJob):
+        """Publish a built notification to every cluster worker (once its video streams are downloaded)."""
+        if job.video_jobs:
+            return self.run_after_videos(job, self.publish_notification)
+        if self._staging_channel_id:
+            await self.use_staged_media(job)
+
+        await self._cluster.publish(job.to_payload())
+        if job.video_file_paths:
+            # the other workers upload the temporary video files as well, so give them time before removing them.
+            get_event_loop().call_later(
+                int(getenv("CLUSTER_FILE_TTL") or 600), get_event_loop().create_task,
+                self.weverse_client.run_blocking_code(self.weverse_client._remove_files, job.video_file_paths))
+
+    async def on_cluster_notification(self, payload: dict):
+        """Deliver a notification published by the cluster poller to the channels of this worker's shards."""
+        await self._startup.wait()
+        channels = self._channels.get(payload["community_name"].lower())
+        if not channels:
+            return
+        job = NotificationJob.from_payload(payload, channels.snapshot(), discord.Embed.from_dict)
+        await self.deliver_notification(job)
+
+    def collect_metrics(self):
+        """The metrics kept by the models (read when the metrics are requested)."""
+        samples = [
+            ("dedup_hits", "counter", self._dedup.hits, {}),
+            ("dedup_evictions", "counter", self._dedup.evictions, {}),
+            ("dedup_channel_ids", "gauge", self._dedup.channel_ids, {}),
+            ("translation_seconds_count", "summary", self._translations.translations, {}),
+            ("translation_seconds_sum", "summary", self._translations.translation_seconds, {}),
+            ("comment_fetch_seconds_count", "summary", self._comments.fetches, {}),
+            ("comment_fetch_seconds_sum", "summary", self._comments.fetch_seconds, {}),
+            ("messages_packed", "counter", self._packer.messages_packed, {}),
+            ("messages_saved", "counter", self._packer.messages_saved, {}),
+            ("media_store_evictions", "counter", self._media_store.evictions, {}),
+            ("bytes_downloaded", "counter", self._downloader.bytes_downloaded, {"source": "media"}),
+            ("bytes_downloaded", "counter", self._video_jobs.bytes_downloaded, {"source": "video_stream"}),
+            ("crosspost_rate_limited", "counter", self._publisher.rate_limited, {}),
+            ("outbox_dead", "counter", self._outbox.dead, {}),
+            ("queue_depth", "gauge", self._publisher.depth, {"queue": "publish"}),
+            ("queue_depth", "gauge", self._video_jobs.depth, {"queue": "video_jobs"}),
+            ("queue_depth", "gauge", self._outbox.pending, {"queue": "outbox"}),
+            ("queue_depth", "gauge", len(self._pending_deliveries), {"queue": "delivery_ledger"}),
+            ("queue_depth", "gauge", len(self._coalescer) if self._coalescer else 0, {"queue": "coalescer"}),
+            ("subscribed_channels", "gauge", len(self._channel_communities), {}),
+            ("media_store_bytes", "gauge", self._media_store.total_bytes, {}),
+        ]
+        samples.extend(("queue_depth", "gauge", depth, {"queue": f"pipeline_{stage}"}) for stage, depth in
+                       self._pipeline.queue_depths().items())
+        for cache_name, cache in (("translations", self._translations), ("comments", self._comments),
+                                  ("dedup", self._dedup), ("channel_access", self._resolver),
+                                  ("media_store", self._media_store)):
+            samples.append(("cache_size", "gauge", len(cache), {"cache": cache_name}))
+        for cache_name, cache in (("translations", self._translations), ("comments", self._comments),
+                                  ("channel_access", self._resolver), ("media", self._downloader)):
+            samples.append(("cache_hits", "counter", cache.hits, {"cache": cache_name}))
+            samples.append(("cache_misses", "counter", cache.misses, {"cache": cache_name}))
+        return samples
+
+    def get_cluster_health(self) -> dict:
+        """The health of this worker reported to the cluster launcher."""
+        queues = self._pipeline.queue_depths()
+        queues["publish"] = self._publisher.depth
+        return {
+            "shards": sorted(self.bot.shards),
+            "guilds": len(self.bot.guilds),
+            "latency": self.bot.latency,
+            "queues": queues,
+        }
+
+    async def send_notification(self, noti_object: models.Notification = None, only_channel: discord.TextChannel = None,
+                                media_object: models.Media = None, post_object: models.Post = None,
+                                announcement_object: models.Announcement = None):
+        """Manages a notification, post, or media to be sent to a text channel.
 
-        await self.weverse_client.run_blocking_code(self.weverse_client._remove_files, video_file_paths)
+        Runs every stage at once without the notification pipeline.
+
+        :param noti_object: Notification Object
+        :param only_channel: Discord.py TextChannel object if it should be only sent to a specific channel.
+        :param media_object: models.Media object if there is no notification.
+        :param post_object: models.Post object if there is no notification.
+        :param announcement_object: models.Announcement object if there is no notification.
+        """
+        job = self.resolve_notification(noti_object, only_channel, media_object, post_object, announcement_object)
+        if job and await self.build_notification(job):
+            await self._deliver_stage(job)
+
+    def get_resolve_stage(self, notification: models.Notification) -> str:
+        """Get the pipeline stage a notification is resolved in, so media never holds up text notifications."""
+        noti_type = self.weverse_client.determine_notification_type(notification.message)
+        return "resolve_media" if noti_type in NotificationJob.MEDIA_TYPES else "resolve_text"
+
+    async def _resolve_stage(self, item):
+        notification, received_at = item
+        print(f"Found new notification: {notification.id}.")
+        job = self.resolve_notification(noti_object=notification)
+        if job:
+            job.received_at = received_at
+            self._metrics.observe("notification_stage_seconds", monotonic() - received_at, stage="resolved")
+            return ("media" if job.has_media else "translate"), job
+
+    async def _build_stage(self, job: NotificationJob):
+        if await self.build_notification(job):
+            self._metrics.observe("notification_stage_seconds", monotonic() - job.received_at,
+                                  stage="media_ready" if job.has_media else "translated")
+            return "deliver", job
+
+    async def dispatch_notification(self, job: NotificationJob):
+        """Deliver a built notification, or publish it to every worker in cluster mode."""
+        if self._cluster and not job.only_channel:
+            await self.publish_notification(job)
+        else:
+            await self.deliver_notification(job)
+
+    async def deliver_digest(self, jobs: List[NotificationJob]):
+        """Deliver notifications that arrived in the same coalescing window as a single digest."""
+        if len(jobs) > 1:
+            print(f"Merging {len(jobs)} notifications for {jobs[0].community_name} into a digest.")
+        await self.dispatch_notification(NotificationJob.merge(jobs, self._packer.merge_embeds))
+
+    async def _deliver_stage(self, job: NotificationJob):
+        if self._coalescer and not job.only_channel:
+            # comments and media are enabled separately in each channel, so they are only merged with their kind.
+            self._coalescer.add((job.community_name.lower(), job.is_comment, job.is_media), job)
+        else:
+            await self.dispatch_notification(job)
 
     async def on_new_notifications(self, notifications: List[models.Notification]):
         """Hook method for new notifications."""
-        for notification in notifications:
-            try:
-                print(f"Found new notification: {notification.id}.")
-                await self.send_notification(noti_object=notification)
-            except Exception as e:
-                print(e)
+        await self._startup.wait()
+        received_at = monotonic()
+        self._metrics.inc("notifications_received", len(notifications))
+        # queued concurrently so waiting for room in the media stages does not hold up the text notifications.
+        await asyncio.gather(*[self._pipeline.put(self.get_resolve_stage(notification), (notification, received_at))
+                               for notification in notifications])
 
     """
     # we have swapped to using hooks.
@@ -1,11 +1,17 @@
+from asyncio import Event
+
+
 class AbstractDataBase:
     """
     Abstract Base for a DataBase.
 
     Inherit this class in a new model if you are using a different DB.
     """
-    def __init__(self, host, database, user, password, port, schema_name="weversebot", table_name="channels"):
+    def __init__(self, host, database, user, password, port, schema_name="weversebot", table_name="channels",
+                 delivery_table_name="deliveries", version_table_name="schemaversion",
+                 translation_table_name="translations", outbox_table_name="outbox"):
         self.pool = None
+        self.ready = Event()  # set once connected and migrated.
 
         self.host = host
         self._database = database
@@ -23,6 +29,10 @@ class AbstractDataBase:
 
         self._schema_name = schema_name
         self._table_name = table_name
+        self._delivery_table_name = delivery_table_name
+        self._version_table_name = version_table_name
+        self._translation_table_name = translation_table_name
+        self._outbox_table_name = outbox_table_name
         self._create_schema_sql = f"CREATE SCHEMA IF NOT EXISTS {self._schema_name}"
         self._create_table_sql = f"""
             CREATE TABLE IF NOT EXISTS {self._schema_name}.{self._table_name}
@@ -36,8 +46,80 @@ class AbstractDataBase:
                 PRIMARY KEY (id)
             )
         """
+        self._create_delivery_table_sql = f"""
+            CREATE TABLE IF NOT EXISTS {self._schema_name}.{self._delivery_table_name}
+            (
+                communityname text,
+                contentid bigint,
+                channelid bigint,
+                deliveredat timestamp,
+                PRIMARY KEY (communityname, contentid, channelid)
+            )
+        """
+        self._create_translation_table_sql = f"""
+            CREATE TABLE IF NOT EXISTS {self._schema_name}.{self._translation_table_name}
+            (
+                contenthash text,
+                translation text,
+                createdat timestamp DEFAULT NOW(),
+                PRIMARY KEY (contenthash)
+            )
+        """
+        self._create_outbox_table_sql = f"""
+            CREATE TABLE IF NOT EXISTS {self._schema_name}.{self._outbox_table_name}
+            (
+                communityname text,
+                contentid bigint,
+                channelid bigint,
+                payload text,
+                attempts integer DEFAULT 0,
+                nextattemptat timestamp,
+                lasterror text,
+                dead boolean DEFAULT false,
+                PRIMARY KEY (communityname, contentid, channelid)
+            )
+        """
+        self._create_version_table_sql = f"CREATE TABLE IF NOT EXISTS {self._schema_name}.{self._version_table_name}" \
+                                         f"(version integer NOT NULL, appliedat timestamp DEFAULT NOW())"
+        self._fetch_version_sql = f"SELECT COALESCE(MAX(version), 0) FROM " \
+                                  f"{self._schema_name}.{self._version_table_name}"
+        self._insert_version_sql = f"INSERT INTO {self._schema_name}.{self._version_table_name}(version) VALUES($1)"
+        # held until the end of the transaction, so workers of a cluster create and migrate the schema one at a time.
+        self._lock_migrations_sql = "SELECT pg_advisory_xact_lock(hashtext($1))"
+
+        # (version, statements) applied in order to bring an older database up to date without dropping it.
+        # Only add new versions to the end, never edit a version that was already released.
+        self._migrations = [
+            (1, [
+                self._create_table_sql,
+                f"ALTER TABLE {self._schema_name}.{self._table_name} ADD COLUMN IF NOT EXISTS roleid bigint",
+                f"ALTER TABLE {self._schema_name}.{self._table_name} ADD COLUMN IF NOT EXISTS comments boolean",
+                f"ALTER TABLE {self._schema_name}.{self._table_name} ADD COLUMN IF NOT EXISTS media boolean",
+            ]),
+            (2, [
+                self._create_delivery_table_sql,
+            ]),
+            (3, [
+                # remove duplicate follows (keeping the newest) so a channel can only follow a community once.
+                f"DELETE FROM {self._schema_name}.{self._table_name} a USING {self._schema_name}.{self._table_name} b "
+                f"WHERE a.id < b.id AND a.channelid = b.channelid AND a.communityname = b.communityname",
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {self._table_name}_channel_community ON "
+                f"{self._schema_name}.{self._table_name} (channelid, communityname)",
+            ]),
+            (4, [
+                self._create_translation_table_sql,
+            ]),
+            (5, [
+                self._create_outbox_table_sql,
+                f"CREATE INDEX IF NOT EXISTS {self._outbox_table_name}_due ON "
+                f"{self._schema_name}.{self._outbox_table_name} (nextattemptat) WHERE NOT dead",
+            ]),
+        ]
+
         self._insert_channel_sql = f"INSERT INTO {self._schema_name}.{self._table_name}(channelid, communityname, " \
                                    f"media, comments, roleid) VALUES($1, $2, $3, $4, $5)"
+        self._upsert_channel_sql = f"{self._insert_channel_sql} ON CONFLICT (channelid, communityname) DO UPDATE " \
+                                   f"SET media = EXCLUDED.media, comments = EXCLUDED.comments, roleid = EXCLUDED.roleid"
         self._delete_channel_sql = f"DELETE FROM {self._schema_name}.{self._table_name} WHERE channelid = $1 AND " \
                                    f"communityname = $2"
         self._toggle_sql = f"UPDATE {self._schema_name}.{self._table_name} SET column_name=$1 WHERE channelid = " \
@@ -47,8 +129,49 @@ class AbstractDataBase:
         self._update_role_sql = self._toggle_sql.replace("column_name", "roleid")
         self._fetch_all_sql = f"SELECT channelid, communityname, roleid, media, comments FROM " \
                               f"{self._schema_name}.{self._table_name}"
-        self._drop_schema_sql = f"DROP SCHEMA IF EXISTS {self._schema_name}"
-        self._drop_table_sql = f"DROP TABLE IF EXISTS {self._schema_name}.{self._table_name}"
+        self._insert_delivery_sql = f"INSERT INTO {self._schema_name}.{self._delivery_table_name}(communityname, " \
+                                    f"contentid, channelid, deliveredat) VALUES($1, $2, $3, $4) ON CONFLICT DO NOTHING"
+        self._insert_translation_sql = f"INSERT INTO {self._schema_name}.{self._translation_table_name}" \
+                                       f"(contenthash, translation) VALUES($1, $2) ON CONFLICT DO NOTHING"
+        self._fetch_translation_sql = f"SELECT translation FROM {self._schema_name}.{self._translation_table_name} " \
+                                      f"WHERE contenthash = $1"
+        self._outbox_key_sql = "communityname = $1 AND contentid = $2 AND channelid = $3"
+        # a new failure of an entry that is still retried counts as an attempt, and a dead entry is retried again.
+        self._insert_outbox_sql = f"INSERT INTO {self._schema_name}.{self._outbox_table_name} AS entry(" \
+                                  f"communityname, contentid, channelid, payload, nextattemptat, lasterror) " \
+                                  f"VALUES($1, $2, $3, $4, $5, $6) ON CONFLICT (communityname, contentid, " \
+                                  f"channelid) DO UPDATE SET payload = EXCLUDED.payload, nextattemptat = " \
+                                  f"EXCLUDED.nextattemptat, lasterror = EXCLUDED.lasterror, attempts = CASE WHEN " \
+                                  f"entry.dead THEN 0 ELSE entry.attempts + 1 END, dead = false"
+        self._fetch_due_outbox_sql = f"SELECT communityname, contentid, channelid, payload, attempts FROM " \
+                                     f"{self._schema_name}.{self._outbox_table_name} WHERE NOT dead AND " \
+                                     f"nextattemptat <= $1 ORDER BY nextattemptat LIMIT $2"
+        self._update_outbox_sql = f"UPDATE {self._schema_name}.{self._outbox_table_name} SET attempts = $4, " \
+                                  f"nextattemptat = $5, lasterror = $6, dead = $7, payload = $8 WHERE " \
+                                  f"{self._outbox_key_sql}"
+        self._delete_outbox_sql = f"DELETE FROM {self._schema_name}.{self._outbox_table_name} WHERE " \
+                                  f"{self._outbox_key_sql}"
+        self._fetch_dead_outbox_sql = f"SELECT communityname, contentid, channelid, attempts, lasterror FROM " \
+                                      f"{self._schema_name}.{self._outbox_table_name} WHERE dead ORDER BY " \
+                                      f"nextattemptat DESC LIMIT $1"
+        self._fetch_deliveries_sql = f"SELECT communityname, contentid, channelid, deliveredat FROM " \
+                                     f"{self._schema_name}.{self._delivery_table_name} WHERE deliveredat >= $1 " \
+                                     f"ORDER BY deliveredat"
+        self._prune_deliveries_sql = f"DELETE FROM {self._schema_name}.{self._delivery_table_name} WHERE " \
+                                     f"deliveredat < $1"
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the DataBase is connected and migrated."""
+        return self.ready.is_set()
+
+    async def wait_until_ready(self):
+        """Wait until the DataBase is connected and migrated."""
+        await self.ready.wait()
+
+    async def create_db_and_connect(self):
+        """Connect, create the schema, migrate it, and then set the ready event."""
+        ...
 
     async def connect(self):
         """Create the connection for the DataBase."""
@@ -58,17 +181,40 @@ class AbstractDataBase:
         """Create the Weverse Schema."""
         ...
 
-    async def __create_weverse_table(self):
-        """Create the Weverse channels table."""
+    async def fetch_schema_version(self) -> int:
+        """Fetch the version of the schema currently stored in the DataBase (0 if it was never migrated)."""
         ...
 
-    async def insert_weverse_channel(self, channel_id, community_name, media_enabled=True, comments_enabled=True):
+    async def apply_migration(self, version, statements) -> bool:
+        """Execute the statements of a migration and store its version in a single transaction.
+
+        The stored version is read again inside the transaction, so a migration that another process applied in
+        the meantime is skipped.
+
+        :param version: (int) The version the schema will be at after the migration.
+        :param statements: (List[str]) The SQL statements to execute.
+        :returns: (bool) Whether the migration was applied.
+        """
+        ...
+
+    async def migrate(self):
+        """Apply the migrations that are newer than the stored schema version."""
+        current_version = await self.fetch_schema_version()
+        for version, statements in self._migrations:
+            if version <= current_version:
+                continue
+            if await self.apply_migration(version, statements):
+                print(f"Migrated DataBase to version {version}.")
+
+    async def insert_weverse_channel(self, channel_id, community_name, media_enabled=True, comments_enabled=True,
+                                     role_id=None):
         """Insert a weverse channel.
 
         :param channel_id: (int) Text Channel ID.
         :param community_name: (str) The name of the community.
         :param media_enabled: (bool) Whether media should be enabled.
         :param comments_enabled: (bool) Whether commends should be enabled.
+        :param role_id: (int) The Role ID to mention.
         """
         ...
 
@@ -80,6 +226,13 @@ class AbstractDataBase:
         """
         ...
 
+    async def delete_weverse_channels(self, channels):
+        """Unfollow several weverse communities in a single batch.
+
+        :param channels: (List[Tuple[int, str]]) Text Channel ID and community name of each unfollow.
+        """
+        ...
+
     async def toggle_media(self, channel_id, community_name, current_status: bool):
         """Toggle the media status of a channel.
 
@@ -107,10 +260,98 @@ class AbstractDataBase:
         """
         ...
 
+    async def apply_channel_changes(self, deletes, upserts, media_updates, comments_updates, role_updates):
+        """Apply a batch of subscription changes in a single transaction.
+
+        :param deletes: (List[Tuple[int, str]]) Channel ID and community name of each unfollow.
+        :param upserts: (List[Tuple[int, str, bool, bool, int]]) Channel ID, community name, media status,
+            comment status, and Role ID of each follow.
+        :param media_updates: (List[Tuple[bool, int, str]]) New media status, channel ID, and community name.
+        :param comments_updates: (List[Tuple[bool, int, str]]) New comment status, channel ID, and community name.
+        :param role_updates: (List[Tuple[int, int, str]]) New Role ID, channel ID, and community name.
+        """
+        ...
+
     async def fetch_channels(self):
         """Fetch channels, the channels they are following, and the media/comment status."""
         ...
 
-    async def recreate_db(self):
-        """Will update the database by dropping the table and recreating it with the new sql."""
+    async def insert_deliveries(self, deliveries):
+        """Record delivered content in the delivery ledger in a single batch.
+
+        :param deliveries: (List[Tuple[str, int, int, datetime]]) Community name, content id, channel id, and the
+            time it was delivered.
+        """
+        ...
+
+    async def fetch_deliveries(self, since):
+        """Fetch the deliveries made since a point in time.
+
+        :param since: (datetime) The earliest delivery time to fetch.
+        :returns: Community name, content id, channel id, and the time of each delivery (oldest first).
+        """
+        ...
+
+    async def prune_deliveries(self, before):
+        """Delete deliveries from the ledger that are older than a point in time.
+
+        :param before: (datetime) Deliveries made before this time will be deleted.
+        """
+        ...
+
+    async def insert_translation(self, content_hash, translation):
+        """Store a translation.
+
+        :param content_hash: (str) Hash of the content and its language pair.
+        :param translation: (str) The translated content.
+        """
+        ...
+
+    async def fetch_translation(self, content_hash):
+        """Fetch a stored translation.
+
+        :param content_hash: (str) Hash of the content and its language pair.
+        :returns: (str) The translated content or None if it was not stored.
+        """
+        ...
+
+    async def insert_outbox_entries(self, entries):
+        """Add failed deliveries to the outbox in a single batch (replacing the payload of existing entries).
+
+        :param entries: (List[Tuple[str, int, int, str, datetime, str]]) Community name, content id, channel id,
+            payload, next attempt time, and the error of each failed delivery.
+        """
+        ...
+
+    async def fetch_due_outbox_entries(self, now, limit):
+        """Fetch the outbox entries that are due to be retried.
+
+        :param now: (datetime) The current time.
+        :param limit: (int) Maximum amount of entries to fetch.
+        :returns: Community name, content id, channel id, payload, and attempts of each entry.
+        """
+        ...
+
+    async def update_outbox_entries(self, entries):
+        """Update outbox entries after failed retries in a single batch.
+
+        :param entries: (List[Tuple[str, int, int, int, datetime, str, bool, str]]) Community name, content id,
+            channel id, attempts, next attempt time, last error, whether it is dead (will not be retried), and the
+            payload.
+        """
+        ...
+
+    async def delete_outbox_entries(self, keys):
+        """Delete outbox entries in a single batch.
+
+        :param keys: (List[Tuple[str, int, int]]) Community name, content id, and channel id of each entry.
+        """
+        ...
+
+    async def fetch_dead_outbox_entries(self, limit):
+        """Fetch the most recent outbox entries that will no longer be retried.
+
+        :param limit: (int) Maximum amount of entries to fetch.
+        :returns: Community name, content id, channel id, attempts, and last error of each entry.
+        """
         ...
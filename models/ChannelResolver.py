@@ -0,0 +1,111 @@
+from time import monotonic
+from typing import Dict, Optional, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import discord
+
+
+class ChannelAccess:
+    __slots__ = ("can_send", "can_embed", "can_attach", "can_publish", "computed_at")
+
+    def __init__(self, can_send, can_embed, can_attach, can_publish):
+        """
+        What the bot is allowed to do in a text channel.
+
+        :param can_send: Whether messages can be sent.
+        :param can_embed: Whether links can be embedded.
+        :param can_attach: Whether files can be attached.
+        :param can_publish: Whether the messages can be published (the channel is a news channel).
+        """
+        self.can_send = can_send
+        self.can_embed = can_embed
+        self.can_attach = can_attach
+        self.can_publish = can_publish
+        self.computed_at = monotonic()
+
+
+class ChannelResolver:
+    def __init__(self, bot, negative_ttl=3600, access_ttl=300):
+        """
+        Caches whether text channels exist and what the bot can do in them.
+
+        Access is computed from the gateway cache without API calls and is invalidated by the gateway events that
+        change it (channel, role, or guild updates). Without the members intent, the bot is not told when it is
+        given a role, so access is also recomputed after `access_ttl` seconds. Channels that were not found are
+        remembered for `negative_ttl` seconds so they are not fetched again on every delivery.
+
+        :param bot: The discord bot.
+        :param negative_ttl: Seconds a channel that was not found is skipped for.
+        :param access_ttl: Seconds the access of a channel is used before it is computed again.
+        """
+        self.bot = bot
+        self.negative_ttl = negative_ttl
+        self.access_ttl = access_ttl
+        self._access: Dict[int, ChannelAccess] = {}  # channel id : access
+        self._guild_channels: Dict[int, Set[int]] = {}  # guild id : cached channel ids
+        self._missing: Dict[int, float] = {}  # channel id : time it could not be resolved
+
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self._access)
+
+    def is_missing(self, channel_id) -> bool:
+        """Whether a channel was recently not found."""
+        missing_at = self._missing.get(channel_id)
+        if missing_at is None:
+            return False
+        if monotonic() - missing_at > self.negative_ttl:
+            self._missing.pop(channel_id)
+            return False
+        self.skipped += 1
+        return True
+
+    def mark_missing(self, channel_id):
+        """Remember that a channel was not found."""
+        self._missing[channel_id] = monotonic()
+        self.invalidate(channel_id)
+
+    def get_access(self, channel: "discord.TextChannel") -> ChannelAccess:
+        """Get what the bot can do in a channel, computing it if it is not cached."""
+        access = self._access.get(channel.id)
+        if access and monotonic() - access.computed_at <= self.access_ttl:
+            self.hits += 1
+            return access
+
+        self.misses += 1
+        permissions = channel.permissions_for(channel.guild.me)
+        access = self._access[channel.id] = ChannelAccess(permissions.send_messages, permissions.embed_links,
+                                                          permissions.attach_files, channel.is_news())
+        self._guild_channels.setdefault(channel.guild.id, set()).add(channel.id)
+        return access
+
+    def invalidate(self, channel_id):
+        """Forget the access of a channel."""
+        self._access.pop(channel_id, None)
+
+    def invalidate_guild(self, guild_id, channel_ids=None):
+        """Forget the access of every channel in a guild (ex: after its roles changed).
+
+        :param guild_id: The guild id.
+        :param channel_ids: The channel ids of the guild, so that they are no longer treated as missing.
+        """
+        for channel_id in self._guild_channels.pop(guild_id, ()):
+            self._access.pop(channel_id, None)
+        for channel_id in channel_ids or ():
+            self._missing.pop(channel_id, None)
+
+    def warm(self, channel_ids):
+        """Compute the access of channels that are in the gateway cache."""
+        for channel_id in channel_ids:
+            channel = self.bot.get_channel(channel_id)
+            if channel and getattr(channel, "guild", None):
+                self.get_access(channel)
+
+    def resolve(self, channel_id) -> Optional["discord.TextChannel"]:
+        """Get a channel from the gateway cache unless it is known to be missing."""
+        if self.is_missing(channel_id):
+            return None
+        return self.bot.get_channel(channel_id)
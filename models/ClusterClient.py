@@ -0,0 +1,117 @@
+import json
+from asyncio import get_event_loop, open_unix_connection, sleep, StreamWriter
+from time import time, monotonic
+from typing import Awaitable, Callable, Optional
+
+MAX_MESSAGE_BYTES = 16 * 1024 ** 2  # a built notification can hold many embeds.
+
+
+def encode_message(message: dict) -> bytes:
+    """Encode a cluster message as a single line of JSON."""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class ClusterClient:
+    def __init__(self, socket_path, worker_id, on_notification: Callable[[dict], Awaitable],
+                 get_health: Callable[[], dict], health_interval=15, reconnect_delay=5):
+        """
+        Connection of a cluster worker to the launcher.
+
+        The launcher brokers messages between its workers over a Unix socket. The worker that polls Weverse
+        publishes every built notification, and the launcher sends it to every worker (including the poller), which
+        then delivers it to the channels of its own shards. Each worker also reports its health to the launcher.
+
+        :param socket_path: The Unix socket the launcher listens on.
+        :param worker_id: The id of this worker.
+        :param on_notification: Coroutine function called with every notification received from the launcher.
+        :param get_health: Function that returns the health of this worker (JSON serializable).
+        :param health_interval: Seconds between health reports.
+        :param reconnect_delay: Seconds to wait before reconnecting to the launcher.
+        """
+        self.socket_path = socket_path
+        self.worker_id = worker_id
+        self.on_notification = on_notification
+        self.get_health = get_health
+        self.health_interval = health_interval
+        self.reconnect_delay = reconnect_delay
+        self._writer: Optional[StreamWriter] = None
+        self._tasks = []
+
+        self.received = 0
+        self.published = 0
+        self.max_lag = 0.0  # most seconds a notification took to reach this worker since the last health report.
+        self.loop_lag = 0.0  # seconds the event loop was late to wake up for the last health report.
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    def start(self):
+        """Connect to the launcher in the background."""
+        loop = get_event_loop()
+        self._tasks = [loop.create_task(self._receive_loop()), loop.create_task(self._health_loop())]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    async def _send(self, message: dict):
+        if not self._writer:
+            raise ConnectionError("Not connected to the cluster launcher.")
+        self._writer.write(encode_message(message))
+        await self._writer.drain()
+
+    async def publish(self, payload: dict):
+        """Publish a built notification to every worker."""
+        await self._send({"type": "notification", "payload": payload, "sent_at": time()})
+        self.published += 1
+
+    async def _receive_loop(self):
+        while True:
+            try:
+                reader, self._writer = await open_unix_connection(self.socket_path, limit=MAX_MESSAGE_BYTES)
+                await self._send({"type": "hello", "worker": self.worker_id})
+                print(f"Worker {self.worker_id} connected to the cluster launcher.")
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    message = json.loads(line)
+                    if message.get("type") != "notification":
+                        continue
+                    self.received += 1
+                    self.max_lag = max(self.max_lag, time() - message.get("sent_at", time()))
+                    get_event_loop().create_task(self._handle_notification(message["payload"]))
+            except Exception as e:
+                print(f"{e} (Exception) - Worker {self.worker_id} lost its connection to the cluster launcher.")
+            finally:
+                if self._writer:
+                    self._writer.close()
+                self._writer = None
+            await sleep(self.reconnect_delay)
+
+    async def _handle_notification(self, payload):
+        try:
+            await self.on_notification(payload)
+        except Exception as e:
+            print(f"{e} (Exception) - Worker {self.worker_id} failed to deliver a cluster notification.")
+
+    async def _health_loop(self):
+        while True:
+            expected = monotonic() + self.health_interval
+            await sleep(self.health_interval)
+            self.loop_lag = max(0.0, monotonic() - expected)
+            if not self._writer:
+                continue
+            try:
+                health = self.get_health()
+                health.update({"worker": self.worker_id, "received": self.received, "published": self.published,
+                               "lag": self.max_lag, "loop_lag": self.loop_lag})
+                await self._send({"type": "health", "health": health})
+                self.max_lag = 0.0
+            except Exception as e:
+                print(f"{e} (Exception) - Worker {self.worker_id} failed to report its health.")
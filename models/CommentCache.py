@@ -0,0 +1,136 @@
+import re
+from asyncio import get_event_loop, shield, Future
+from collections import OrderedDict
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Callable, Awaitable, Optional, Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from Weverse import models
+
+
+def parse_time(value) -> Optional[datetime]:
+    """Parse a Weverse timestamp (ISO 8601 text or epoch milliseconds). None if it can not be parsed."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, timezone.utc)
+    if not isinstance(value, str):
+        return None
+    # Python < 3.11 does not accept "Z" or an offset without a colon (ex: +0900).
+    value = re.sub(r"([+-]\d{2})(\d{2})$", r"\1:\2", value.replace("Z", "+00:00"))
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class CommentCache:
+    def __init__(self, ttl=30, max_entries=1000):
+        """
+        Caches the artist comments of posts.
+
+        Comment notifications usually come in bursts on the same post, so concurrent misses for the same post
+        share a single request. Cached comments are only used if they pass the check given to `get_or_fetch`
+        (ex: they hold a comment newer than the notification), since a later notification on the same post is
+        about a comment that is not cached yet. A refresh is merged into the comments that are already cached
+        instead of replacing them. Posts are evicted least recently used or after `ttl` seconds.
+
+        :param ttl: Seconds the comments of a post are kept after they were fetched.
+        :param max_entries: Maximum amount of posts kept.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._comments: Dict[int, List] = OrderedDict()  # post id : [fetched at, comments from newest to oldest]
+        self._in_flight: Dict[int, Future] = {}  # post id : future of the comments
+
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.fetch_seconds = 0.0  # total time spent waiting on fetches
+
+    def __len__(self):
+        return len(self._comments)
+
+    @staticmethod
+    def is_newer(comment: "models.Comment", notified_at) -> bool:
+        """Whether a comment was created at or after the time of a notification (False if either is unknown)."""
+        created_at, notified_at = parse_time(comment.created_at), parse_time(notified_at)
+        return bool(created_at and notified_at) and created_at >= notified_at
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def average_latency(self) -> float:
+        """Average seconds a fetch took."""
+        return self.fetch_seconds / self.fetches if self.fetches else 0.0
+
+    def merge(self, post_id, comments: List["models.Comment"]):
+        """Add comments of a post to the cache, keeping the ones already cached.
+
+        :param post_id: The post id.
+        :param comments: Comments ordered from newest to oldest.
+        """
+        entry = self._comments.get(post_id)
+        if not entry:
+            self._comments[post_id] = [monotonic(), list(comments)]
+        else:
+            known = {comment.id for comment in entry[1]}
+            entry[1][:0] = [comment for comment in comments if comment.id not in known]
+            entry[0] = monotonic()
+            self._comments.move_to_end(post_id)
+
+        while len(self._comments) > self.max_entries:
+            self._comments.popitem(last=False)
+
+    def get(self, post_id) -> Optional[List["models.Comment"]]:
+        """Get the comments of a post if they were fetched within the TTL."""
+        entry = self._comments.get(post_id)
+        if not entry or monotonic() - entry[0] > self.ttl:
+            return None
+        self._comments.move_to_end(post_id)
+        return entry[1]
+
+    async def get_or_fetch(self, post_id, fetch: Callable[[], Awaitable[Optional[List["models.Comment"]]]],
+                           is_valid: Callable[[List["models.Comment"]], bool] = None) \
+            -> Optional[List["models.Comment"]]:
+        """Get the comments of a post from the cache or fetch them.
+
+        :param post_id: The post id.
+        :param fetch: Coroutine function that fetches the comments of the post (newest first).
+        :param is_valid: Whether cached comments can be used (ex: the newest one is newer than the notification).
+            Comments of a fetch that is already in flight are always shared.
+        :returns: The comments or None if they could not be fetched (failed fetches are not cached).
+        """
+        comments = self.get(post_id)
+        if comments and (not is_valid or is_valid(comments)):
+            self.hits += 1
+            return comments
+
+        future = self._in_flight.get(post_id)
+        if future:
+            self.hits += 1
+            return await shield(future)
+
+        self.misses += 1
+        future = self._in_flight[post_id] = get_event_loop().create_future()
+        try:
+            start = monotonic()
+            fetched = await fetch()
+            self.fetches += 1
+            self.fetch_seconds += monotonic() - start
+            if fetched:
+                self.merge(post_id, fetched)
+                fetched = self._comments[post_id][1]
+            future.set_result(fetched)
+            return fetched
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark it as retrieved since there may be nobody else awaiting it.
+            raise
+        finally:
+            self._in_flight.pop(post_id, None)
+            if not future.done():
+                future.cancel()
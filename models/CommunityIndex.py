@@ -0,0 +1,60 @@
+from typing import Dict, Optional, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from Weverse import models
+
+
+class CommunityIndex:
+    def __init__(self):
+        """
+        Indexes the Weverse communities by id and by lowercased name.
+
+        The index is synced with the Weverse client's cache through `refresh`. The client only adds communities
+        to its dict (or creates a new dict), so a refresh is skipped while it is the same dict with the same amount
+        of communities, and lookups and the available communities string cost nothing per call.
+        """
+        self._by_id: Dict[int, "models.Community"] = {}
+        self._by_name: Dict[str, "models.Community"] = {}
+        self.names: List[str] = []  # lowercased community names
+        self.available = ""  # comma separated community names
+        self._source: Optional[Dict[int, "models.Community"]] = None  # the dict that was last indexed
+        self._source_size = 0
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def refresh(self, communities: Dict[int, "models.Community"], force=False):
+        """Incrementally sync the index with the communities of the Weverse client.
+
+        :param communities: Community ID : Community
+        :param force: Sync even if it is the same dict with the same amount of communities (ex: after the cache
+            was loaded, in case a community was replaced).
+        """
+        if not force and communities is self._source and len(communities) == self._source_size:
+            return
+        self._source = communities
+        self._source_size = len(communities)
+
+        for community_id in [community_id for community_id, community in self._by_id.items()
+                             if communities.get(community_id) is not community]:
+            community = self._by_id.pop(community_id)
+            if self._by_name.get(community.name.lower()) is community:
+                self._by_name.pop(community.name.lower())
+
+        for community_id, community in communities.items():
+            if community_id not in self._by_id:
+                self._by_id[community_id] = community
+                self._by_name[community.name.lower()] = community
+
+        self.names = list(self._by_name)
+        self.available = ', '.join(self.names)
+
+    def get_by_name(self, community_name) -> Optional["models.Community"]:
+        """Get a community by its name (case insensitive)."""
+        if not community_name:
+            return None
+        return self._by_name.get(community_name.lower())
+
+    def get_by_id(self, community_id) -> Optional["models.Community"]:
+        """Get a community by its id."""
+        return self._by_id.get(community_id)
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Hashable, Set, Tuple, Dict
+
+
+class DedupStore:
+    def __init__(self, max_entries=2000, retention=86400, max_channel_ids=500000):
+        """
+        Remembers which text channels a piece of content was already delivered to.
+
+        Each content key maps to the set of channel ids it was delivered to, so a lookup is O(1).
+        Keys are kept in insertion order and the oldest ones are evicted once there are more than `max_entries`,
+        once more than `max_channel_ids` channel ids are stored across all keys, or once they are older than
+        `retention` seconds. The channel ids are what takes the memory (a key reaches every subscribed channel),
+        so `max_channel_ids` is the memory budget (roughly 70 bytes per channel id).
+
+        :param max_entries: Maximum amount of content keys to remember.
+        :param retention: Seconds a content key is remembered for.
+        :param max_channel_ids: Maximum amount of channel ids stored across all content keys.
+        """
+        self.max_entries = max_entries
+        self.retention = retention
+        self.max_channel_ids = max_channel_ids
+        self._entries: Dict[Hashable, Tuple[float, Set[int]]] = OrderedDict()
+        self._channel_ids = 0  # amount of channel ids stored across all content keys
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def channel_ids(self) -> int:
+        """Amount of channel ids stored across all content keys."""
+        return self._channel_ids
+
+    def _evict(self):
+        """Evict content keys that are expired or over the entry or channel id budget."""
+        expire_before = monotonic() - self.retention
+        while self._entries:
+            key, (created_at, channels) = next(iter(self._entries.items()))
+            if created_at >= expire_before and (len(self._entries) == 1 or (
+                    len(self._entries) <= self.max_entries and self._channel_ids <= self.max_channel_ids)):
+                break  # the newest key is kept even if it is over the budget on its own.
+            self._entries.pop(key)
+            self._channel_ids -= len(channels)
+            self.evictions += 1
+
+    def _get_channels(self, key, create=False, created_at=None):
+        entry = self._entries.get(key)
+        if entry and entry[0] < monotonic() - self.retention:
+            self._evict()
+            entry = None
+        if not entry and create:
+            entry = self._entries[key] = (monotonic() if created_at is None else created_at, set())
+            self._evict()
+        return entry[1] if entry else None
+
+    def is_delivered(self, key, channel_id) -> bool:
+        """Check if content was already delivered to a channel."""
+        channels = self._get_channels(key)
+        if channels and channel_id in channels:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def all_delivered(self, key, channel_ids) -> bool:
+        """Check if content was already delivered to every channel given without affecting the counters."""
+        channels = self._get_channels(key)
+        return bool(channels) and all(channel_id in channels for channel_id in channel_ids)
+
+    def mark_delivered(self, key, channel_id, created_at=None):
+        """Record that content was delivered to a channel.
+
+        :param key: The content key.
+        :param channel_id: The text channel id.
+        :param created_at: The monotonic time the content was first delivered if it was earlier than now (ex: loaded
+            from the delivery ledger). Keys have to be marked in the order they were created.
+        """
+        channels = self._get_channels(key, create=True, created_at=created_at)
+        if channel_id not in channels:
+            channels.add(channel_id)
+            self._channel_ids += 1
+            if self._channel_ids > self.max_channel_ids:
+                self._evict()
+
+    def check_and_mark(self, key, channel_id) -> bool:
+        """Record that content is being delivered to a channel.
+
+        :returns: (bool) True if it was already delivered and should be skipped.
+        """
+        if self.is_delivered(key, channel_id):
+            return True
+        self.mark_delivered(key, channel_id)
+        return False
@@ -0,0 +1,191 @@
+from asyncio import sleep, Semaphore, Event, gather, wait_for, TimeoutError
+from collections import deque
+from time import monotonic
+from typing import Callable, Awaitable, Iterable, Tuple, Dict, List, Hashable
+
+
+class RateLimitBucket:
+    __slots__ = ("rate", "per", "tokens", "_updated")
+
+    def __init__(self, rate, per):
+        """
+        A token bucket that allows `rate` requests every `per` seconds.
+
+        :param rate: Amount of requests allowed in the window.
+        :param per: Length of the window in seconds.
+        """
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self._updated = monotonic()
+
+    def _refill(self):
+        now = monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self._updated) * (self.rate / self.per))
+        self._updated = now
+
+    def is_full(self) -> bool:
+        """Whether the bucket has its full budget available (it has been idle)."""
+        self._refill()
+        return self.tokens >= self.rate
+
+    def try_acquire(self) -> float:
+        """Consume a token if one is available.
+
+        :returns: (float) 0 if a token was consumed, otherwise the seconds until one is available.
+        """
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) * (self.per / self.rate)
+
+    async def acquire(self):
+        """Wait until a token is available and consume it."""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await sleep((1 - self.tokens) * (self.per / self.rate))
+
+
+# (shard id, guild id, route key, zero-argument coroutine function)
+DeliveryJob = Tuple[int, int, Hashable, Callable[[], Awaitable]]
+
+
+class DeliveryLane:
+    __slots__ = ("shard_id", "in_flight", "connected", "paused_at")
+
+    def __init__(self, shard_id, max_in_flight):
+        """
+        Deliveries to the channels of a single shard.
+
+        :param shard_id: The shard id.
+        :param max_in_flight: Maximum amount of deliveries running at once on this shard.
+        """
+        self.shard_id = shard_id
+        self.in_flight = Semaphore(max_in_flight)
+        self.connected = Event()
+        self.connected.set()  # assume the shard is connected until told otherwise.
+        self.paused_at = 0.0
+
+
+class DeliveryScheduler:
+    def __init__(self, max_in_flight=25, global_rate=20, global_per=1.0, route_rate=5, route_per=5.0,
+                 max_idle_routes=5000, lane_max_in_flight=10, max_pause=60):
+        """
+        Fans out deliveries concurrently while respecting Discord's rate-limits.
+
+        There is a single global bucket shared by every delivery and one bucket per route (text channel).
+        Each shard has its own delivery lane with its own concurrency limit, so a slow or rate-limited shard does
+        not hold up the others. A lane is paused while its shard is disconnected. Within a lane, jobs are
+        interleaved round-robin across guilds so a single large guild can not starve the others. The amount of
+        requests in flight is bounded across every lane and fan-out.
+
+        :param max_in_flight: Maximum amount of deliveries running at once.
+        :param global_rate: Deliveries allowed per `global_per` seconds across the bot. A delivery is usually a
+            few requests, so this should stay well under Discord's global limit of 50 requests per second.
+        :param global_per: Length of the global window in seconds.
+        :param route_rate: Deliveries allowed per `route_per` seconds for a single route.
+        :param route_per: Length of the route window in seconds.
+        :param max_idle_routes: Amount of route buckets to keep before idle buckets are pruned.
+        :param lane_max_in_flight: Maximum amount of deliveries running at once on a single shard.
+        :param max_pause: Maximum seconds a delivery waits for its shard to reconnect before it is attempted anyway.
+        """
+        self.max_in_flight = max_in_flight
+        self._in_flight = Semaphore(max_in_flight)
+        self._global_bucket = RateLimitBucket(global_rate, global_per)
+        self._route_rate = route_rate
+        self._route_per = route_per
+        self._max_idle_routes = max_idle_routes
+        self._route_buckets: Dict[Hashable, RateLimitBucket] = {}
+        self.lane_max_in_flight = lane_max_in_flight
+        self.max_pause = max_pause
+        self._lanes: Dict[int, DeliveryLane] = {}
+
+    def get_lane(self, shard_id) -> DeliveryLane:
+        lane = self._lanes.get(shard_id)
+        if not lane:
+            lane = self._lanes[shard_id] = DeliveryLane(shard_id, self.lane_max_in_flight)
+        return lane
+
+    def pause_lane(self, shard_id):
+        """Hold the deliveries of a shard (ex: while it is disconnected)."""
+        lane = self.get_lane(shard_id)
+        if lane.connected.is_set():
+            lane.paused_at = monotonic()
+            lane.connected.clear()
+
+    def resume_lane(self, shard_id):
+        """Continue the deliveries of a shard."""
+        self.get_lane(shard_id).connected.set()
+
+    def _get_route_bucket(self, route) -> RateLimitBucket:
+        bucket = self._route_buckets.get(route)
+        if not bucket:
+            if len(self._route_buckets) >= self._max_idle_routes:
+                self._prune_routes()
+            bucket = self._route_buckets[route] = RateLimitBucket(self._route_rate, self._route_per)
+        return bucket
+
+    def _prune_routes(self):
+        """Remove route buckets that have fully refilled since they are no longer limiting anything."""
+        for route in [route for route, bucket in self._route_buckets.items() if bucket.is_full()]:
+            self._route_buckets.pop(route)
+
+    @staticmethod
+    def _interleave(groups: Iterable[List]) -> List:
+        """Round-robin the items of several lists into a single list."""
+        queues = deque(deque(group) for group in groups if group)
+        ordered = []
+        while queues:
+            queue = queues.popleft()
+            ordered.append(queue.popleft())
+            if queue:
+                queues.append(queue)
+        return ordered
+
+    def order_jobs(self, jobs: Iterable[DeliveryJob]) -> Dict[int, List[DeliveryJob]]:
+        """Group jobs by shard and order the jobs of each shard round-robin across its guilds.
+
+        :returns: shard id : jobs in the order they should run.
+        """
+        shards: Dict[int, Dict[int, List[DeliveryJob]]] = {}
+        for job in jobs:
+            shards.setdefault(job[0], {}).setdefault(job[1], []).append(job)
+        return {shard_id: self._interleave(guilds.values()) for shard_id, guilds in shards.items()}
+
+    async def _wait_for_lane(self, lane: DeliveryLane):
+        remaining = self.max_pause - (monotonic() - lane.paused_at)
+        if lane.connected.is_set() or remaining <= 0:
+            return
+        try:
+            await wait_for(lane.connected.wait(), remaining)
+        except TimeoutError:
+            print(f"Shard {lane.shard_id} is still disconnected after {self.max_pause} seconds. Delivering anyway.")
+
+    async def _run_job(self, job: DeliveryJob):
+        shard_id, _, route, callback = job
+        lane = self.get_lane(shard_id)
+        await self._wait_for_lane(lane)
+        async with lane.in_flight, self._in_flight:
+            await self._get_route_bucket(route).acquire()
+            await self._global_bucket.acquire()
+            try:
+                await callback()
+            except Exception as e:
+                print(f"{e} (Exception) - Delivery to route {route} failed.")
+
+    async def fan_out(self, jobs: Iterable[DeliveryJob]):
+        """Run every job fairly and concurrently in the lane of its shard, returning once all of them have finished.
+        """
+        async def worker(ordered: deque):
+            while ordered:
+                await self._run_job(ordered.popleft())
+
+        workers = []
+        for shard_jobs in self.order_jobs(jobs).values():
+            ordered = deque(shard_jobs)
+            workers.extend(worker(ordered) for _ in range(min(self.lane_max_in_flight, len(ordered))))
+        await gather(*workers)
@@ -0,0 +1,96 @@
+from asyncio import Semaphore, shield, get_event_loop, Future
+from os import path, replace, remove
+from typing import Dict
+from urllib.parse import urlparse
+
+import aiofiles
+from aiohttp import ClientSession
+from . import MediaStore
+
+
+class MediaDownloader:
+    def __init__(self, web_session: ClientSession, store: MediaStore, per_host_limit=4, chunk_size=65536):
+        """
+        Streams media to disk in chunks with a limit on concurrent downloads per host.
+
+        Files are addressed by their file name in the media store, so a file that was already downloaded (ex: for
+        an earlier post or a retry) is never downloaded again, and concurrent downloads of the same file share a
+        single request.
+
+        :param web_session: The aiohttp session to download with.
+        :param store: The media store the media is kept in.
+        :param per_host_limit: Maximum amount of concurrent downloads from a single host.
+        :param chunk_size: Bytes read from the response at a time.
+        """
+        self._web_session = web_session
+        self.store = store
+        self.per_host_limit = per_host_limit
+        self.chunk_size = chunk_size
+        self._host_limits: Dict[str, Semaphore] = {}
+        self._in_flight: Dict[str, Future] = {}  # file name : future of the size in bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_downloaded = 0
+
+    async def download(self, url, file_name) -> int:
+        """Download a url to the media folder unless it already exists there.
+
+        :param url: The url of the media.
+        :param file_name: The file name to store it as.
+        :returns: (int) The size of the file in bytes.
+        """
+        size = self.store.get_size(file_name)
+        if size is not None:
+            self.hits += 1
+            return size
+
+        future = self._in_flight.get(file_name)
+        if future:
+            self.hits += 1
+            return await shield(future)
+
+        self.misses += 1
+        future = self._in_flight[file_name] = get_event_loop().create_future()
+        try:
+            size = await self._stream_to_disk(url, file_name)
+            future.set_result(size)
+            return size
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark it as retrieved since there may be nobody else awaiting it.
+            raise
+        finally:
+            self._in_flight.pop(file_name, None)
+            if not future.done():
+                future.cancel()
+
+    async def _stream_to_disk(self, url, file_name) -> int:
+        host = urlparse(url).netloc
+        limit = self._host_limits.get(host)
+        if not limit:
+            limit = self._host_limits[host] = Semaphore(self.per_host_limit)
+
+        file_path = self.store.get_file_path(file_name)
+        partial_path = f"{file_path}.part"
+        size = 0
+        async with limit:
+            async with self._web_session.get(url) as resp:
+                resp.raise_for_status()
+                try:
+                    async with aiofiles.open(partial_path, mode='wb') as fd:
+                        async for chunk in resp.content.iter_chunked(self.chunk_size):
+                            await fd.write(chunk)
+                            size += len(chunk)
+                    # only expose complete files under the real file name.
+                    replace(partial_path, file_path)
+                except Exception:
+                    if path.exists(partial_path):
+                        remove(partial_path)
+                    raise
+
+        self.bytes_downloaded += size
+        self.store.add(file_name, size)
+        if self.store.over_budget:
+            get_event_loop().create_task(self.store.evict())
+        return size
@@ -0,0 +1,182 @@
+import json
+from asyncio import get_event_loop
+from collections import OrderedDict
+from hashlib import sha1
+from os import path, makedirs, remove, replace, scandir
+from time import time
+from typing import Dict, List, Optional
+
+
+class MediaStore:
+    def __init__(self, folder, max_bytes=10 * 1024 ** 3, max_age=7 * 86400, min_age=3600, shard_length=2,
+                 index_path="media_store_index.json"):
+        """
+        Tracks the media stored in a folder and evicts the least recently used files to stay within budget.
+
+        Files are placed in sharded subdirectories (the first characters of a hash of the file name) so no single
+        directory grows too large. The index of files is saved to `index_path` so it survives restarts without
+        rescanning the folder. The folder is usually served publicly, so the index should be kept outside of it.
+
+        Files that were stored directly in the folder before it was sharded are found by scanning the folder once
+        (when there is no index yet). They are evicted first, once they are over the budget or older than the
+        max age, since nothing uses them anymore.
+
+        :param folder: The folder the media is stored in.
+        :param max_bytes: Maximum amount of bytes to store.
+        :param max_age: Seconds a file is kept after it was last used.
+        :param min_age: Seconds after a file was last used in which it will never be evicted, so a file is not
+            removed while it is still being sent to channels.
+        :param shard_length: Amount of hex characters used to name a shard (2 -> 256 subdirectories).
+        :param index_path: The location of the index file.
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.min_age = min_age
+        self.shard_length = shard_length
+        self._index_path = index_path
+        # file name : [size in bytes, last used at], ordered from least to most recently used.
+        self._files: Dict[str, List] = OrderedDict()
+        # file name : [size in bytes, modified at] of files directly in the folder, ordered from oldest to newest.
+        self._unsharded: Dict[str, List] = OrderedDict()
+        self._created_shards = set()
+        self._dirty = False
+
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._files) + len(self._unsharded)
+
+    @staticmethod
+    def _read_index(index_path) -> Optional[dict]:
+        try:
+            with open(index_path, encoding="utf-8") as fd:
+                return json.load(fd)
+        except (OSError, ValueError):
+            return None
+
+    def _scan_unsharded(self) -> Dict[str, List]:
+        """Find the files that are directly in the folder (stored before it was sharded)."""
+        unsharded = {}
+        try:
+            with scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False) and not entry.name.startswith("."):
+                        stat = entry.stat(follow_symlinks=False)
+                        unsharded[entry.name] = [stat.st_size, stat.st_mtime]
+        except OSError as e:
+            print(f"{e} (Exception) - Failed to scan {self.folder} for media that is not indexed.")
+        return unsharded
+
+    def load(self):
+        """Load the index of files that was saved by a previous run (or scan the folder if there is none)."""
+        data = self._read_index(self._index_path)
+        old_index_path = path.join(self.folder, ".index.json")  # where the index was kept before.
+        if data is None and path.exists(old_index_path):
+            data = {"files": self._read_index(old_index_path) or {}}
+            self._remove_files([old_index_path])  # it was publicly listing the files.
+            self._dirty = True
+
+        if data is None or data.get("unsharded") is None:
+            unsharded = self._scan_unsharded()
+            self._dirty = True
+            if unsharded:
+                print(f"Found {len(unsharded)} media files in {self.folder} that were not indexed.")
+        else:
+            unsharded = data["unsharded"]
+
+        files = (data or {}).get("files") or {}
+        for file_name, (size, last_used) in sorted(files.items(), key=lambda item: item[1][1]):
+            self._files[file_name] = [size, last_used]
+            self.total_bytes += size
+        for file_name, (size, modified_at) in sorted(unsharded.items(), key=lambda item: item[1][1]):
+            self._unsharded[file_name] = [size, modified_at]
+            self.total_bytes += size
+
+    def _write_index(self, files):
+        temp_path = f"{self._index_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as fd:
+            json.dump(files, fd)
+        replace(temp_path, self._index_path)
+
+    async def save(self):
+        """Save the index of files if it changed."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        await get_event_loop().run_in_executor(None, self._write_index, {"files": dict(self._files),
+                                                                          "unsharded": dict(self._unsharded)})
+
+    def get_relative_path(self, file_name) -> str:
+        """Get the location of a file relative to the media folder."""
+        return f"{sha1(file_name.encode()).hexdigest()[:self.shard_length]}/{file_name}"
+
+    def get_file_path(self, file_name) -> str:
+        """Get the location of a file, creating its shard if needed."""
+        relative_path = self.get_relative_path(file_name)
+        shard = relative_path[:self.shard_length]
+        if shard not in self._created_shards:
+            makedirs(path.join(self.folder, shard), exist_ok=True)
+            self._created_shards.add(shard)
+        return path.join(self.folder, relative_path)
+
+    def get_size(self, file_name) -> Optional[int]:
+        """Get the size of a stored file and mark it as recently used. None if it is not stored."""
+        entry = self._files.get(file_name)
+        if not entry:
+            return None
+        entry[1] = time()
+        self._files.move_to_end(file_name)
+        self._dirty = True
+        return entry[0]
+
+    def add(self, file_name, size):
+        """Record a file that was written to the store."""
+        old_entry = self._files.pop(file_name, None)
+        if old_entry:
+            self.total_bytes -= old_entry[0]
+        self._files[file_name] = [size, time()]
+        self.total_bytes += size
+        self._dirty = True
+
+    @property
+    def over_budget(self) -> bool:
+        return self.total_bytes > self.max_bytes
+
+    def _remove_files(self, file_paths):
+        for file_path in file_paths:
+            try:
+                remove(file_path)
+            except OSError:
+                pass
+
+    async def evict(self):
+        """Remove the least recently used files that are over the byte budget or older than the max age."""
+        now = time()
+        evicted = []
+        while self._unsharded:
+            file_name, (size, modified_at) = next(iter(self._unsharded.items()))
+            if not self.over_budget and now - modified_at < self.max_age:
+                break
+            self._unsharded.pop(file_name)
+            self.total_bytes -= size
+            evicted.append(path.join(self.folder, file_name))
+
+        while self._files:
+            file_name, (size, last_used) = next(iter(self._files.items()))
+            if now - last_used < self.min_age:
+                break
+            if not self.over_budget and now - last_used < self.max_age:
+                break
+            self._files.pop(file_name)
+            self.total_bytes -= size
+            evicted.append(path.join(self.folder, self.get_relative_path(file_name)))
+
+        if not evicted:
+            return
+
+        self.evictions += len(evicted)
+        self._dirty = True
+        await get_event_loop().run_in_executor(None, self._remove_files, evicted)
+        print(f"Evicted {len(evicted)} files from the media store. {self.total_bytes} bytes are in use.")
@@ -0,0 +1,155 @@
+from os import path
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import discord
+
+
+class PackedMessage:
+    __slots__ = ("content", "embeds", "files", "embed_chars", "file_bytes")
+
+    def __init__(self, content=None):
+        """
+        The content, embeds, and files (locations) of a single Discord message.
+
+        :param content: The text of the message.
+        """
+        self.content: Optional[str] = content
+        self.embeds: List[discord.Embed] = []
+        self.files: List[str] = []
+        self.embed_chars = 0
+        self.file_bytes = 0
+
+
+class MessagePacker:
+    MAX_DESCRIPTION = 4096  # characters in the description of an embed
+
+    def __init__(self, max_embeds=10, max_embed_chars=6000, max_content=2000, max_files=10,
+                 max_file_bytes=8000000):
+        """
+        Packs embeds, text, and files into as few Discord messages as the message limits allow.
+
+        :param max_embeds: Maximum amount of embeds in a message.
+        :param max_embed_chars: Maximum amount of characters across the embeds of a message.
+        :param max_content: Maximum amount of characters in the text of a message.
+        :param max_files: Maximum amount of files in a message.
+        :param max_file_bytes: Maximum amount of bytes uploaded in a message.
+        """
+        self.max_embeds = max_embeds
+        self.max_embed_chars = max_embed_chars
+        self.max_content = max_content
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+
+        self.messages_packed = 0
+        # compared to how posts were sent before packing: a message per embed and one with the text and files.
+        self.messages_saved = 0
+
+    def get_description_cap(self, embed_overhead) -> int:
+        """Get the most characters an embed's description can have.
+
+        :param embed_overhead: Characters the rest of the embed (title, author, footer) takes.
+        """
+        return min(self.MAX_DESCRIPTION, self.max_embed_chars - embed_overhead)
+
+    def merge_embeds(self, embeds: List["discord.Embed"]) -> List["discord.Embed"]:
+        """Merge the descriptions of consecutive embeds into as few embeds as the embed limits allow.
+
+        An embed with an image is never merged into the embed before it. The title of a merged embed is kept in
+        the description if it differs from the title of the embed it was merged into.
+
+        :param embeds: The embeds to merge (they are not changed).
+        :returns: The merged embeds in order.
+        """
+        merged = []
+        for embed in embeds:
+            current = merged[-1] if merged else None
+            description = embed.description or ""
+            if current and embed.title and embed.title != current.title:
+                description = f"**{embed.title}**\n{description}"
+            if current and not embed.image.url and \
+                    len(current.description or "") + len(description) + 2 <= self.MAX_DESCRIPTION and \
+                    len(current) + len(description) + 2 <= self.max_embed_chars:
+                current.description = f"{current.description}\n\n{description}" if current.description else \
+                    description
+            else:
+                merged.append(embed.copy())
+        return merged
+
+    @staticmethod
+    def chunk_text(text, cap) -> List[str]:
+        """Split text into chunks of at most `cap` characters on whitespace in a single pass.
+
+        A word longer than the cap is split where the cap is reached.
+        """
+        chunks = []
+        start = 0
+        while len(text) - start > cap:
+            end = max(text.rfind(" ", start, start + cap), text.rfind("\n", start, start + cap))
+            if end <= start:
+                end = start + cap
+            chunks.append(text[start:end])
+            start = end + 1 if text[end] in " \n" else end
+        if start < len(text):
+            chunks.append(text[start:])
+        return chunks
+
+    @staticmethod
+    def _get_file_size(file_location):
+        try:
+            return path.getsize(file_location)
+        except OSError:
+            return 0
+
+    def pack_files(self, file_locations: List[str], messages: List[PackedMessage] = None) -> List[PackedMessage]:
+        """Add files to the last message while it has room, and to new messages after that."""
+        messages = messages if messages is not None else []
+        for file_location in file_locations:
+            size = self._get_file_size(file_location)
+            current = messages[-1] if messages else None
+            if not current or len(current.files) >= self.max_files or \
+                    (current.files and current.file_bytes + size > self.max_file_bytes):
+                current = PackedMessage()
+                messages.append(current)
+            current.files.append(file_location)
+            current.file_bytes += size
+        return messages
+
+    def pack(self, embeds: List["discord.Embed"], file_locations: List[str] = None, text=None,
+             mention=None) -> List[PackedMessage]:
+        """Pack a post into messages.
+
+        Links in the text are only shown as embeds by Discord in a message that has no embeds, so the text is
+        kept in messages of its own.
+
+        :param embeds: The embeds of the post.
+        :param file_locations: The files to upload.
+        :param text: Text (ex: links) sent after the embeds.
+        :param mention: Text (ex: a role mention) sent with the first message.
+        :returns: The messages to send in order.
+        """
+        messages: List[PackedMessage] = []
+        current = None
+        for embed in embeds:
+            size = len(embed)
+            if not current or len(current.embeds) >= self.max_embeds or \
+                    current.embed_chars + size > self.max_embed_chars:
+                current = PackedMessage()
+                messages.append(current)
+            current.embeds.append(embed)
+            current.embed_chars += size
+
+        if mention:
+            if messages:
+                messages[0].content = mention
+            else:
+                text = f"{mention}\n{text}" if text else mention
+
+        text_chunks = self.chunk_text(text, self.max_content) if text else []
+        messages.extend(PackedMessage(chunk) for chunk in text_chunks)
+        self.pack_files(file_locations or [], messages)
+
+        self.messages_packed += len(messages)
+        unpacked_messages = len(embeds) + (1 if text_chunks or file_locations else 0)
+        self.messages_saved += max(unpacked_messages - len(messages), 0)
+        return messages
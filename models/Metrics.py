@@ -0,0 +1,124 @@
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from aiohttp import web
+
+# (name, type, value, labels) of a metric read from a model when the metrics are collected.
+Sample = Tuple[str, str, float, Dict[str, str]]
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    def __init__(self, prefix="weversebot"):
+        """
+        Counters, gauges, and timing spans of the bot in the Prometheus text format.
+
+        Counters and spans are recorded on the hot path with `inc` and `observe`. Values that models already
+        keep (ex: cache hits or queue depths) are read through collectors only when the metrics are requested.
+
+        :param prefix: Prefix of every metric name.
+        """
+        self.prefix = prefix
+        self._counters: Dict[Tuple[str, Tuple], float] = {}  # (name, labels) : value
+        self._spans: Dict[Tuple[str, Tuple], List[float]] = {}  # (name, labels) : [count, sum, max]
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._runner = None
+
+    def inc(self, name, amount=1, **labels):
+        """Increase a counter."""
+        key = (name, tuple(labels.items()))
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        """Record the duration of a span."""
+        key = (name, tuple(labels.items()))
+        span = self._spans.get(key)
+        if not span:
+            span = self._spans[key] = [0, 0.0, 0.0]
+        span[0] += 1
+        span[1] += seconds
+        span[2] = max(span[2], seconds)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """Add a function that returns samples (name, type, value, labels) when the metrics are collected."""
+        self._collectors.append(collector)
+
+    def collect(self) -> List[Sample]:
+        """Get every metric as samples."""
+        samples = [(name, "counter", value, dict(labels)) for (name, labels), value in self._counters.items()]
+        for (name, labels), (count, total, maximum) in self._spans.items():
+            samples.append((f"{name}_count", "summary", count, dict(labels)))
+            samples.append((f"{name}_sum", "summary", total, dict(labels)))
+            samples.append((f"{name}_max", "gauge", maximum, dict(labels)))
+        samples.extend(self._run_collectors())
+        return samples
+
+    def _run_collectors(self) -> List[Sample]:
+        samples = []
+        for collector in self._collectors:
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                print(f"{e} (Exception) - Failed to collect metrics.")
+        return samples
+
+    @staticmethod
+    def _family(sample) -> str:
+        # the _count and _sum samples of a summary belong to one family and have to be listed together.
+        name, metric_type = sample[:2]
+        return name.rsplit("_", 1)[0] if metric_type == "summary" else name
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        lines = []
+        typed = set()
+        for name, metric_type, value, labels in sorted(self.collect(), key=self._family):
+            full_name = f"{self.prefix}_{name}"
+            family = f"{self.prefix}_{self._family((name, metric_type))}"
+            if family not in typed:
+                typed.add(family)
+                lines.append(f"# TYPE {family} {metric_type}")
+            lines.append(f"{full_name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """A short readable summary of the metrics."""
+        lines = [f"{name} (avg {total / count:.2f}s, max {maximum:.2f}s, n={count}){format_labels(dict(labels))}"
+                 for (name, labels), (count, total, maximum) in self._spans.items() if count]
+        samples = self._run_collectors()
+        # the summaries of the collectors are shown as the average of their _count and _sum samples.
+        summaries: Dict[Tuple[str, str], List[float]] = {}
+        for name, metric_type, value, labels in samples:
+            if metric_type == "summary":
+                family, suffix = name.rsplit("_", 1)
+                summaries.setdefault((family, format_labels(labels)), [0, 0.0])[1 if suffix == "sum" else 0] = value
+        lines.extend(f"{family} (avg {total / count:.2f}s, n={count:g}){labels}"
+                     for (family, labels), (count, total) in summaries.items() if count)
+        lines.extend(f"{name}{format_labels(labels)}: {value:g}" for (name, labels), value in self._counters.items())
+        lines.extend(f"{name}{format_labels(labels)}: {value:g}" for name, metric_type, value, labels in samples
+                     if metric_type != "summary")
+        return "\n".join(lines)
+
+    async def _handle_metrics(self, request):
+        return web.Response(body=self.render().encode(), headers={
+            "Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def start_server(self, host="127.0.0.1", port=9100):
+        """Serve the metrics on http://host:port/metrics."""
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        print(f"Serving metrics on http://{host}:{port}/metrics.")
+
+    async def stop_server(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
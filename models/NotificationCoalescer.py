@@ -0,0 +1,68 @@
+from asyncio import get_event_loop
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+
+class NotificationCoalescer:
+    def __init__(self, flush: Callable[[List[Any]], Awaitable], window=10.0, max_delay=60.0, max_items=25):
+        """
+        Holds bursts of notifications so they can be sent together.
+
+        A batch is flushed once no notification with its key arrived for `window` seconds. Every new notification
+        restarts the window, but a batch is never held longer than `max_delay` seconds after its first
+        notification or past `max_items` notifications, so latency stays bounded during a long storm.
+
+        :param flush: Coroutine function called with the notifications of a batch in the order they arrived.
+        :param window: Seconds to wait for another notification with the same key.
+        :param max_delay: Maximum seconds the first notification of a batch is held.
+        :param max_items: Maximum amount of notifications in a batch.
+        """
+        self.flush = flush
+        self.window = window
+        self.max_delay = max_delay
+        self.max_items = max_items
+        self._batches: Dict[Hashable, List] = {}  # key : [notifications, first added at, timer]
+
+        self.batches = 0
+        self.coalesced = 0  # notifications that did not need their own delivery.
+
+    def __len__(self):
+        return sum(len(batch[0]) for batch in self._batches.values())
+
+    def add(self, key: Hashable, item):
+        """Add a notification to the batch of its key."""
+        now = monotonic()
+        batch = self._batches.get(key)
+        if batch:
+            batch[2].cancel()
+        else:
+            batch = self._batches[key] = [[], now, None]
+
+        batch[0].append(item)
+        if len(batch[0]) >= self.max_items:
+            # flushed right away, since notifications added before a scheduled flush ran would join the batch.
+            batch[2] = None
+            return self._flush_key(key)
+        delay = min(self.window, batch[1] + self.max_delay - now)
+        batch[2] = get_event_loop().call_later(max(0.0, delay), self._flush_key, key)
+
+    def _flush_key(self, key):
+        batch = self._batches.pop(key, None)
+        if not batch:
+            return
+        if batch[2]:
+            batch[2].cancel()
+        self.batches += 1
+        self.coalesced += len(batch[0]) - 1
+        get_event_loop().create_task(self._run_flush(key, batch[0]))
+
+    async def _run_flush(self, key, items):
+        try:
+            await self.flush(items)
+        except Exception as e:
+            print(f"{e} (Exception) - Failed to send {len(items)} coalesced notifications for {key}.")
+
+    def flush_all(self):
+        """Flush every batch now."""
+        for key in list(self._batches):
+            self._flush_key(key)
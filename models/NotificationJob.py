@@ -0,0 +1,141 @@
+from typing import Optional, List, Sequence, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from asyncio import Future
+    import discord
+    from Weverse import models
+    from . import TextChannel
+
+
+class NotificationJob:
+    __slots__ = ("main_object", "noti_type", "community_name", "channels", "only_channel", "comment", "embed",
+                 "embed_list", "media", "message_text", "video_file_paths", "content_id", "owns_files",
+                 "merged_content_ids", "video_jobs", "received_at")
+    MEDIA_TYPES = ("post", "media")  # notification types whose media is downloaded while building them.
+
+    def __init__(self, main_object, noti_type, community_name, channels, only_channel=None):
+        """
+        A notification (or post, media, announcement) moving through the stages of being sent to text channels.
+
+        :param main_object: The Notification, Post, Media, or Announcement object.
+        :param noti_type: The type of notification (comment, post, media, announcement).
+        :param community_name: The name of the community it belongs to.
+        :param channels: The text channels it will be sent to.
+        :param only_channel: Discord.py TextChannel object if it should be only sent to a specific channel.
+        """
+        self.main_object: Union[models.Notification, models.Post, models.Media, models.Announcement] = main_object
+        self.noti_type: str = noti_type
+        self.community_name: str = community_name
+        self.channels: Sequence[TextChannel] = channels
+        self.only_channel: Optional[discord.TextChannel] = only_channel
+        self.received_at: Optional[float] = None  # time.monotonic() when the notification was received
+
+        # set once the notification is built.
+        self.comment: Optional[models.Comment] = None
+        self.embed: Optional[discord.Embed] = None
+        self.embed_list: List[discord.Embed] = []
+        self.media: Optional[List[str]] = None  # file locations
+        self.message_text: Optional[str] = None
+        self.video_file_paths: List[str] = []
+        self.video_jobs: List[Future] = []  # video streams still downloading (the futures of their file locations)
+
+        # set when the job was built by another process (cluster mode) and there is no main object.
+        self.content_id: Optional[int] = None
+        self.owns_files = True  # whether the temporary files should be removed once delivered.
+
+        # the content ids of every notification merged into this one (a digest), in order.
+        self.merged_content_ids: List[int] = []
+
+    @property
+    def is_comment(self) -> bool:
+        return self.noti_type == "comment"
+
+    @property
+    def is_media(self) -> bool:
+        return self.noti_type in ("post", "media", "announcement")
+
+    @property
+    def has_media(self) -> bool:
+        """Whether building the notification will download media."""
+        return self.noti_type in self.MEDIA_TYPES
+
+    def to_payload(self) -> dict:
+        """Serialize a built job so it can be delivered by another process."""
+        return {
+            "community_name": self.community_name,
+            "content_id": self.dedup_key[1],
+            "noti_type": self.noti_type,
+            "embeds": [embed.to_dict() for embed in ([self.embed] if self.embed else self.embed_list)],
+            "media": self.media,
+            "message_text": self.message_text,
+            "video_file_paths": self.video_file_paths,
+            "merged_content_ids": self.merged_content_ids,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict, channels, embed_from_dict) -> "NotificationJob":
+        """Create a built job from a serialized job.
+
+        :param payload: The serialized job.
+        :param channels: The text channels it will be sent to.
+        :param embed_from_dict: Function that creates an embed from a dict (discord.Embed.from_dict).
+        """
+        job = cls(None, payload["noti_type"], payload["community_name"], channels)
+        job.content_id = payload["content_id"]
+        job.embed_list = [embed_from_dict(embed) for embed in payload["embeds"]]
+        job.media = payload["media"]
+        job.message_text = payload["message_text"]
+        job.video_file_paths = payload["video_file_paths"]
+        job.merged_content_ids = payload.get("merged_content_ids") or []
+        job.owns_files = False
+        return job
+
+    @classmethod
+    def merge(cls, jobs: List["NotificationJob"], merge_embeds=None) -> "NotificationJob":
+        """Merge built jobs of the same community and kind into a single digest.
+
+        The embeds, media, and text are kept in the order the jobs arrived in. The digest is sent to the text
+        channels of the most recent job.
+
+        :param jobs: The built jobs.
+        :param merge_embeds: Function that merges the embeds into as few embeds as the embed limits allow
+            (MessagePacker.merge_embeds), so the digest is sent in fewer messages.
+        """
+        if len(jobs) == 1:
+            return jobs[0]
+
+        first, last = jobs[0], jobs[-1]
+        digest = cls(first.main_object, first.noti_type, first.community_name, last.channels)
+        digest.comment = first.comment
+        digest.content_id = first.content_id
+        digest.owns_files = first.owns_files
+        digest.received_at = first.received_at
+        texts = []
+        for job in jobs:
+            digest.embed_list.extend([job.embed] if job.embed else job.embed_list)
+            if job.media:
+                digest.media = (digest.media or []) + job.media
+            if job.message_text:
+                texts.append(job.message_text)
+            digest.video_file_paths.extend(job.video_file_paths)
+            digest.video_jobs.extend(job.video_jobs)
+            digest.merged_content_ids.extend(content_id for _, content_id in job.dedup_keys)
+        digest.message_text = "\n".join(texts) or None
+        if merge_embeds:
+            digest.embed_list = merge_embeds(digest.embed_list)
+        return digest
+
+    @property
+    def dedup_key(self):
+        """The key of the content in the dedup store. Comments are only known once the notification is built."""
+        if self.content_id is not None:
+            return self.community_name.lower(), self.content_id
+        content_id = self.comment.id if self.is_comment else self.main_object.id
+        return self.community_name.lower(), content_id
+
+    @property
+    def dedup_keys(self):
+        """The keys of every content in the job (more than one if it is a digest)."""
+        if self.merged_content_ids:
+            return [(self.community_name.lower(), content_id) for content_id in self.merged_content_ids]
+        return [self.dedup_key]
@@ -0,0 +1,63 @@
+from asyncio import Queue, get_event_loop
+from typing import Callable, Awaitable, Dict, List, Optional, Tuple, Any
+
+# a stage handler returns the name of the next stage and the item to pass to it, or None to stop.
+StageHandler = Callable[[Any], Awaitable[Optional[Tuple[str, Any]]]]
+
+
+class NotificationPipeline:
+    def __init__(self):
+        """
+        Runs items through named stages, each with its own bounded queue and workers.
+
+        Putting an item into a full stage waits until there is room (backpressure), so a slow stage slows down
+        the stages feeding it instead of queueing without a limit.
+        """
+        self._queues: Dict[str, Queue] = {}
+        self._stages: Dict[str, Tuple[StageHandler, int]] = {}
+        self._tasks: List = []
+
+    def add_stage(self, name, handler: StageHandler, workers=1, max_queue=100):
+        """Add a stage.
+
+        :param name: The name of the stage.
+        :param handler: Coroutine function that processes an item of the stage.
+        :param workers: Amount of items of the stage processed at once.
+        :param max_queue: Maximum amount of items waiting in the stage.
+        """
+        self._queues[name] = Queue(maxsize=max_queue)
+        self._stages[name] = (handler, workers)
+
+    def start(self):
+        """Start the workers of every stage."""
+        loop = get_event_loop()
+        for name, (handler, workers) in self._stages.items():
+            for _ in range(workers):
+                self._tasks.append(loop.create_task(self._worker(name, handler)))
+
+    def stop(self):
+        """Stop the workers of every stage."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def queue_depths(self) -> Dict[str, int]:
+        """The amount of items waiting in each stage."""
+        return {name: queue.qsize() for name, queue in self._queues.items()}
+
+    async def put(self, stage_name, item):
+        """Add an item to a stage, waiting if the stage is full."""
+        await self._queues[stage_name].put(item)
+
+    async def _worker(self, name, handler: StageHandler):
+        queue = self._queues[name]
+        while True:
+            item = await queue.get()
+            try:
+                result = await handler(item)
+                if result:
+                    await self.put(*result)
+            except Exception as e:
+                print(f"{e} (Exception) - Failed to process an item in the {name} stage.")
+            finally:
+                queue.task_done()
@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timedelta
+from random import uniform
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import AbstractDataBase
+
+
+class Outbox:
+    def __init__(self, db, max_attempts=5, base_delay=30, max_delay=3600):
+        """
+        Deliveries that failed for a transient reason (ex: a 5xx or a timeout) and will be retried.
+
+        New entries are buffered and written to the DataBase in batches. Each retry is scheduled after a jittered
+        exponential backoff, and an entry that failed `max_attempts` times is marked dead (a dead-letter) so it
+        can be looked at instead of being retried forever.
+
+        :param db: The DataBase model the outbox is stored in.
+        :param max_attempts: Amount of failed attempts before an entry is marked dead.
+        :param base_delay: Seconds to wait before the first retry.
+        :param max_delay: Maximum seconds to wait between retries.
+        """
+        self.db: AbstractDataBase = db
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._pending = []  # entries waiting to be written to the DataBase.
+
+        self.added = 0
+        self.retried = 0
+        self.dead = 0
+
+    @property
+    def pending(self) -> int:
+        """Amount of entries waiting to be written to the DataBase."""
+        return len(self._pending)
+
+    def get_retry_delay(self, attempts) -> timedelta:
+        """Get the jittered exponential backoff after a number of failed attempts."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return timedelta(seconds=delay * uniform(0.5, 1.5))
+
+    def add(self, community_name, content_id, channel_id, payload: dict, error):
+        """Add a failed delivery to be retried.
+
+        :param community_name: The name of the community.
+        :param content_id: The id of the content that failed to deliver.
+        :param channel_id: The text channel it failed to deliver to.
+        :param payload: JSON serializable data needed to send the content again.
+        :param error: The error the delivery failed with.
+
+        An existing entry of the same delivery (ex: a dead-letter) is updated with the new payload.
+        """
+        self._pending.append((community_name, content_id, channel_id, json.dumps(payload),
+                              datetime.utcnow() + self.get_retry_delay(1), str(error)))
+        self.added += 1
+
+    async def flush(self):
+        """Write the buffered entries to the DataBase."""
+        if not self._pending or not self.db.is_ready:
+            return
+
+        entries, self._pending = self._pending, []
+        try:
+            await self.db.insert_outbox_entries(entries)
+        except Exception as e:
+            print(f"{e} (Exception) - Failed to write {len(entries)} entries to the outbox.")
+            self._pending.extend(entries)
+
+    async def fetch_due(self, limit=100):
+        """Fetch the entries that are due to be retried.
+
+        :returns: Community name, content id, channel id, payload (dict), and attempts of each entry.
+        """
+        if not self.db.is_ready:
+            return []
+        return [(community_name, content_id, channel_id, json.loads(payload), attempts) for
+                community_name, content_id, channel_id, payload, attempts in
+                await self.db.fetch_due_outbox_entries(datetime.utcnow(), limit)]
+
+    async def remove(self, keys):
+        """Remove entries that were delivered or no longer need to be delivered.
+
+        :param keys: (List[Tuple[str, int, int]]) Community name, content id, and channel id of each entry.
+        """
+        if keys:
+            await self.db.delete_outbox_entries(keys)
+
+    async def record_failures(self, failures):
+        """Schedule the next retry of entries that failed again, or mark them dead.
+
+        :param failures: (List[Tuple[str, int, int, int, str, dict]]) Community name, content id, channel id, the
+            amount of attempts (including this one), the error, and the payload (ex: with the messages that were
+            sent in this attempt) of each entry.
+        """
+        if not failures:
+            return
+
+        updates = []
+        for community_name, content_id, channel_id, attempts, error, payload in failures:
+            is_dead = attempts >= self.max_attempts
+            self.dead += is_dead
+            updates.append((community_name, content_id, channel_id, attempts,
+                            datetime.utcnow() + self.get_retry_delay(attempts), str(error), is_dead,
+                            json.dumps(payload)))
+        await self.db.update_outbox_entries(updates)
+
+    async def fetch_dead_letters(self, limit=10):
+        """Fetch the most recent entries that will no longer be retried."""
+        return await self.db.fetch_dead_outbox_entries(limit)
@@ -1,18 +1,13 @@
 import asyncpg
 from . import AbstractDataBase
-from asyncio import get_event_loop
 
 
 class PostgreSQL(AbstractDataBase):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        loop = get_event_loop()
-        loop.create_task(self.create_db_and_connect())
-
     async def create_db_and_connect(self):
         await self.connect()
         await self.__create_weverse_schema()
-        await self.__create_weverse_table()
+        await self.migrate()
+        self.ready.set()
 
     async def connect(self):
         self.pool: asyncpg.pool.Pool = await asyncpg.create_pool(**self._connect_kwargs, command_timeout=60)
@@ -21,21 +16,41 @@ class PostgreSQL(AbstractDataBase):
 
     async def __create_weverse_schema(self):
         async with self.pool.acquire() as conn:
-            await conn.execute(self._create_schema_sql)
+            async with conn.transaction():
+                await conn.execute(self._lock_migrations_sql, self._schema_name)
+                await conn.execute(self._create_schema_sql)
+                await conn.execute(self._create_version_table_sql)
+
+    async def fetch_schema_version(self):
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(self._fetch_version_sql)
 
-    async def __create_weverse_table(self):
+    async def apply_migration(self, version, statements):
         async with self.pool.acquire() as conn:
-            await conn.execute(self._create_table_sql)
+            async with conn.transaction():
+                await conn.execute(self._lock_migrations_sql, self._schema_name)
+                if await conn.fetchval(self._fetch_version_sql) >= version:
+                    return False
+                for statement in statements:
+                    await conn.execute(statement)
+                await conn.execute(self._insert_version_sql, version)
+                return True
 
-    async def insert_weverse_channel(self, channel_id, community_name, media_enabled=True, comments_enabled=True):
+    async def insert_weverse_channel(self, channel_id, community_name, media_enabled=True, comments_enabled=True,
+                                     role_id=None):
         async with self.pool.acquire() as conn:
             await conn.execute(self._insert_channel_sql, channel_id, community_name.lower(), media_enabled,
-                               comments_enabled, None)
+                               comments_enabled, role_id)
 
     async def delete_weverse_channel(self, channel_id, community_name):
         async with self.pool.acquire() as conn:
             await conn.execute(self._delete_channel_sql, channel_id, community_name.lower())
 
+    async def delete_weverse_channels(self, channels):
+        async with self.pool.acquire() as conn:
+            await conn.executemany(self._delete_channel_sql, [(channel_id, community_name.lower()) for
+                                                              channel_id, community_name in channels])
+
     async def toggle_media(self, channel_id, community_name, current_status):
         async with self.pool.acquire() as conn:
             await conn.execute(self._toggle_media_sql, not current_status, channel_id, community_name.lower())
@@ -48,13 +63,56 @@ class PostgreSQL(AbstractDataBase):
         async with self.pool.acquire() as conn:
             await conn.execute(self._update_role_sql, role_id, channel_id, community_name.lower())
 
+    async def apply_channel_changes(self, deletes, upserts, media_updates, comments_updates, role_updates):
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                for sql, args in ((self._delete_channel_sql, deletes), (self._upsert_channel_sql, upserts),
+                                  (self._toggle_media_sql, media_updates),
+                                  (self._toggle_comments_sql, comments_updates),
+                                  (self._update_role_sql, role_updates)):
+                    if args:
+                        await conn.executemany(sql, args)
+
     async def fetch_channels(self):
         async with self.pool.acquire() as conn:
             return await conn.fetch(self._fetch_all_sql)
 
-    async def recreate_db(self):
+    async def insert_deliveries(self, deliveries):
         async with self.pool.acquire() as conn:
-            await conn.execute(self._drop_table_sql)
-            await conn.execute(self._drop_schema_sql)
-        await self.__create_weverse_schema()
-        await self.__create_weverse_table()
+            await conn.executemany(self._insert_delivery_sql, deliveries)
+
+    async def fetch_deliveries(self, since):
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(self._fetch_deliveries_sql, since)
+
+    async def prune_deliveries(self, before):
+        async with self.pool.acquire() as conn:
+            await conn.execute(self._prune_deliveries_sql, before)
+
+    async def insert_translation(self, content_hash, translation):
+        async with self.pool.acquire() as conn:
+            await conn.execute(self._insert_translation_sql, content_hash, translation)
+
+    async def fetch_translation(self, content_hash):
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(self._fetch_translation_sql, content_hash)
+
+    async def insert_outbox_entries(self, entries):
+        async with self.pool.acquire() as conn:
+            await conn.executemany(self._insert_outbox_sql, entries)
+
+    async def fetch_due_outbox_entries(self, now, limit):
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(self._fetch_due_outbox_sql, now, limit)
+
+    async def update_outbox_entries(self, entries):
+        async with self.pool.acquire() as conn:
+            await conn.executemany(self._update_outbox_sql, entries)
+
+    async def delete_outbox_entries(self, keys):
+        async with self.pool.acquire() as conn:
+            await conn.executemany(self._delete_outbox_sql, keys)
+
+    async def fetch_dead_outbox_entries(self, limit):
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(self._fetch_dead_outbox_sql, limit)
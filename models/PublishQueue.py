@@ -0,0 +1,96 @@
+from asyncio import Queue, get_event_loop
+from random import uniform
+from typing import Dict, List, TYPE_CHECKING
+
+from . import RateLimitBucket
+
+if TYPE_CHECKING:
+    import discord
+
+
+class PublishQueue:
+    def __init__(self, workers=2, channel_rate=10, channel_per=3600.0, max_retries=3):
+        """
+        Publishes (crossposts) messages in news channels in the background.
+
+        Crossposting has its own strict rate-limit per channel, so it is kept out of the delivery fan-out.
+        A message whose channel is out of budget is queued again once the channel has budget instead of holding
+        up a worker, and a publish that was rate-limited (429) is retried with backoff.
+
+        :param workers: Amount of messages published at once.
+        :param channel_rate: Publishes allowed per `channel_per` seconds in a single channel.
+        :param channel_per: Length of the channel window in seconds.
+        :param max_retries: Amount of times a rate-limited publish is retried.
+        """
+        self.workers = workers
+        self.channel_rate = channel_rate
+        self.channel_per = channel_per
+        self.max_retries = max_retries
+        self._queue = Queue()
+        self._channel_buckets: Dict[int, RateLimitBucket] = {}
+        self._tasks: List = []
+        self._waiting = 0  # messages waiting for their channel to have budget again.
+
+        self.published = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+    @property
+    def depth(self) -> int:
+        """Amount of messages waiting to be published."""
+        return self._queue.qsize() + self._waiting
+
+    def start(self):
+        loop = get_event_loop()
+        for _ in range(self.workers):
+            self._tasks.append(loop.create_task(self._worker()))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def put(self, message: "discord.Message", attempt=0):
+        """Queue a message to be published."""
+        self._queue.put_nowait((message, attempt))
+
+    def _put_later(self, delay, message, attempt):
+        self._waiting += 1
+
+        def requeue():
+            self._waiting -= 1
+            self.put(message, attempt)
+
+        get_event_loop().call_later(delay, requeue)
+
+    def _get_bucket(self, channel_id) -> RateLimitBucket:
+        bucket = self._channel_buckets.get(channel_id)
+        if not bucket:
+            bucket = self._channel_buckets[channel_id] = RateLimitBucket(self.channel_rate, self.channel_per)
+        return bucket
+
+    async def _worker(self):
+        while True:
+            message, attempt = await self._queue.get()
+            try:
+                await self._publish(message, attempt)
+            finally:
+                self._queue.task_done()
+
+    async def _publish(self, message: "discord.Message", attempt):
+        wait = self._get_bucket(message.channel.id).try_acquire()
+        if wait:
+            self._put_later(wait, message, attempt)
+            return
+
+        try:
+            await message.publish()
+            self.published += 1
+        except Exception as e:
+            if getattr(e, "status", None) == 429 and attempt < self.max_retries:
+                self.rate_limited += 1
+                # jittered exponential backoff
+                self._put_later(uniform(1, 2) * 2 ** attempt * 5, message, attempt + 1)
+                return
+            self.failed += 1
+            print(f"Failed to publish Message ID: {message.id} for Channel ID: {message.channel.id} - {e}")
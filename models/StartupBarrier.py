@@ -0,0 +1,51 @@
+from asyncio import Event, gather
+from time import monotonic
+from typing import Awaitable, Dict
+
+
+class StartupBarrier:
+    def __init__(self, *phases):
+        """
+        Tracks the phases of startup that run in parallel and becomes ready once every phase finished.
+
+        The time each phase took since the barrier was created is logged so startup can be measured.
+
+        :param phases: The names of the phases.
+        """
+        self._started_at = monotonic()
+        self._phases: Dict[str, Event] = {name: Event() for name in phases}
+        self.durations: Dict[str, float] = {}  # phase name : seconds since startup it finished at
+        self.ready = Event()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready.is_set()
+
+    def is_done(self, phase) -> bool:
+        return self._phases[phase].is_set()
+
+    def finish(self, phase):
+        """Mark a phase as finished."""
+        if self._phases[phase].is_set():
+            return
+        duration = self.durations[phase] = monotonic() - self._started_at
+        self._phases[phase].set()
+        print(f"Startup phase '{phase}' finished after {duration:.2f} seconds.")
+        if all(event.is_set() for event in self._phases.values()):
+            self.ready.set()
+            print(f"Startup finished after {duration:.2f} seconds.")
+
+    async def run(self, phase, awaitable: Awaitable):
+        """Run a phase and mark it as finished once it completes (even if it failed, so startup is not stuck)."""
+        try:
+            return await awaitable
+        except Exception as e:
+            print(f"{e} (Exception) - Startup phase '{phase}' failed.")
+        finally:
+            self.finish(phase)
+
+    async def wait(self, *phases):
+        """Wait until the given phases (or every phase if none are given) finished."""
+        if not phases:
+            return await self.ready.wait()
+        await gather(*[self._phases[phase].wait() for phase in phases])
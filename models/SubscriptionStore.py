@@ -0,0 +1,43 @@
+from typing import Dict, Tuple, Optional, Iterator
+from . import TextChannel
+
+
+class SubscriptionStore:
+    __slots__ = ("_channels", "_snapshot")
+
+    def __init__(self):
+        """
+        The text channels following a single Weverse community.
+
+        Iterating over the channels during a fan-out should use `snapshot`, which returns an immutable tuple
+        that is only rebuilt after a channel was added or removed, instead of copying the channels every time.
+        """
+        self._channels: Dict[int, TextChannel] = {}  # channel_id : models.TextChannel
+        self._snapshot: Optional[Tuple[TextChannel, ...]] = None
+
+    def __len__(self):
+        return len(self._channels)
+
+    def __contains__(self, channel_id):
+        return channel_id in self._channels
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._channels)
+
+    def __setitem__(self, channel_id, text_channel: TextChannel):
+        self._channels[channel_id] = text_channel
+        self._snapshot = None
+
+    def get(self, channel_id, default=None) -> Optional[TextChannel]:
+        return self._channels.get(channel_id, default)
+
+    def pop(self, channel_id, *default) -> Optional[TextChannel]:
+        text_channel = self._channels.pop(channel_id, *default)
+        self._snapshot = None
+        return text_channel
+
+    def snapshot(self) -> Tuple[TextChannel, ...]:
+        """The text channels at this point in time. Safe to iterate while channels are added or removed."""
+        if self._snapshot is None:
+            self._snapshot = tuple(self._channels.values())
+        return self._snapshot
@@ -1,4 +1,6 @@
 class TextChannel:
+    __slots__ = ("id", "role_id", "media_enabled", "comments_enabled")
+
     def __init__(self, channel_id, role_id, media_enabled, comments_enabled):
         """
         Represents a discord Text Channel and the Weverse settings. Note that this is UNIQUE TO A WEVERSE COMMUNITY.
@@ -13,4 +15,3 @@ class TextChannel:
         self.role_id = role_id
         self.media_enabled = media_enabled
         self.comments_enabled = comments_enabled
-        self.already_posted = []  # list of notification ids.
@@ -0,0 +1,113 @@
+from asyncio import get_event_loop, shield, Future
+from collections import OrderedDict
+from hashlib import sha256
+from time import monotonic
+from typing import Callable, Awaitable, Optional, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import AbstractDataBase
+
+
+class TranslationCache:
+    def __init__(self, max_entries=5000, db=None):
+        """
+        Caches translations by a hash of the content and its language pair.
+
+        Translations are kept in memory with LRU eviction and, if a DataBase model is given, are also persisted
+        so they survive restarts. Concurrent requests for the same content share a single translation request.
+
+        :param max_entries: Maximum amount of translations kept in memory.
+        :param db: Optional DataBase model to persist translations in.
+        """
+        self.max_entries = max_entries
+        self.db: Optional[AbstractDataBase] = db
+        self._translations: Dict[str, str] = OrderedDict()  # key : translation
+        self._in_flight: Dict[str, Future] = {}  # key : future of the translation
+
+        self.hits = 0
+        self.misses = 0
+        self.translations = 0  # translations requested from a translator
+        self.translation_seconds = 0.0  # total time spent waiting on translators
+
+    def __len__(self):
+        return len(self._translations)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def average_latency(self) -> float:
+        """Average seconds a translator took to translate content."""
+        return self.translation_seconds / self.translations if self.translations else 0.0
+
+    @staticmethod
+    def get_key(text, src_lang, target_lang) -> str:
+        return sha256(f"{src_lang}:{target_lang}:{text}".encode()).hexdigest()
+
+    def _remember(self, key, translation):
+        self._translations[key] = translation
+        self._translations.move_to_end(key)
+        while len(self._translations) > self.max_entries:
+            self._translations.popitem(last=False)
+
+    async def get_or_translate(self, text, translate: Callable[[], Awaitable[Optional[str]]], src_lang="ko",
+                               target_lang="en") -> Optional[str]:
+        """Get the translation of content from the cache or translate it.
+
+        :param text: The content to translate.
+        :param translate: Coroutine function that translates the content if it is not cached.
+        :param src_lang: The language of the content.
+        :param target_lang: The language to translate to.
+        :returns: The translation or None if it could not be translated (failed translations are not cached).
+        """
+        if not text:
+            return await translate()
+
+        key = self.get_key(text, src_lang, target_lang)
+        translation = self._translations.get(key)
+        if translation is not None:
+            self._translations.move_to_end(key)
+            self.hits += 1
+            return translation
+
+        future = self._in_flight.get(key)
+        if future:
+            self.hits += 1
+            return await shield(future)
+
+        future = self._in_flight[key] = get_event_loop().create_future()
+        try:
+            translation = await self._load_or_translate(key, translate)
+            future.set_result(translation)
+            return translation
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark it as retrieved since there may be nobody else awaiting it.
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+            if not future.done():
+                future.cancel()
+
+    async def _load_or_translate(self, key, translate) -> Optional[str]:
+        if self.db and self.db.is_ready:
+            translation = await self.db.fetch_translation(key)
+            if translation is not None:
+                self.hits += 1
+                self._remember(key, translation)
+                return translation
+
+        self.misses += 1
+        start = monotonic()
+        translation = await translate()
+        self.translations += 1
+        self.translation_seconds += monotonic() - start
+        if translation is None:
+            return None
+
+        self._remember(key, translation)
+        if self.db and self.db.is_ready:
+            await self.db.insert_translation(key, translation)
+        return translation
@@ -0,0 +1,114 @@
+from asyncio import Queue, Future, CancelledError, get_event_loop
+from os import path, makedirs, remove
+from typing import Awaitable, Callable, List, Optional
+
+
+class VideoJobPool:
+    def __init__(self, download: Callable[..., Awaitable], folder=".", max_bytes=8000000):
+        """
+        Downloads video streams in the background, one at a time.
+
+        Streams are written to `folder` (ex: a tmpfs mount) and a stream larger than `max_bytes` is removed instead
+        of being returned, since Discord would reject the upload. A job can be cancelled through its future
+        (ex: the notification was delivered without the file), which also stops its download if it started.
+
+        The Weverse client (1.1.8.2) writes the segments of a stream to the working directory and keeps the cookie
+        of the stream in headers shared by every request, so two streams can not be downloaded at once. The
+        segments a job's download wrote are removed if it was cancelled or failed.
+
+        :param download: Coroutine function that downloads a stream (video, output_file_path, segment_paths) and
+            adds the location of each segment file it writes to `segment_paths`.
+        :param folder: The folder the streams are downloaded to.
+        :param max_bytes: Maximum size of a stream that can be uploaded.
+        """
+        self.download = download
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._queue = Queue()
+        self._task = None
+        makedirs(folder, exist_ok=True)
+
+        self.downloaded = 0
+        self.bytes_downloaded = 0
+        self.over_budget = 0  # streams that were too large to upload.
+        self.cancelled = 0
+
+    @property
+    def depth(self) -> int:
+        """Amount of jobs waiting to be downloaded."""
+        return self._queue.qsize()
+
+    def start(self):
+        self._task = get_event_loop().create_task(self._worker())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def submit(self, video, file_name) -> Future:
+        """Queue a stream to be downloaded.
+
+        :param video: The VideoStream object.
+        :param file_name: The name of the file in the folder.
+        :returns: A future of the file location or None if the stream could not be used.
+        """
+        future = get_event_loop().create_future()
+        self._queue.put_nowait((video, path.join(self.folder, file_name), future))
+        return future
+
+    @staticmethod
+    def cancel(futures: List[Future]):
+        """Cancel jobs that are no longer needed."""
+        for future in futures:
+            future.cancel()
+
+    @staticmethod
+    def _remove(file_location):
+        try:
+            remove(file_location)
+        except OSError:
+            pass
+
+    async def _download(self, video, file_location, segment_paths: List[str]) -> Optional[str]:
+        await self.download(video, output_file_path=file_location, segment_paths=segment_paths)
+        size = path.getsize(file_location)
+        if size > self.max_bytes:
+            self.over_budget += 1
+            print(f"Video stream {file_location} is {size} bytes, which is over the upload limit. Skipping it.")
+            self._remove(file_location)
+            return None
+
+        self.downloaded += 1
+        self.bytes_downloaded += size
+        return file_location
+
+    async def _worker(self):
+        loop = get_event_loop()
+        while True:
+            video, file_location, future = await self._queue.get()
+            if future.done():
+                self.cancelled += 1
+                continue
+
+            segment_paths = []
+            download = loop.create_task(self._download(video, file_location, segment_paths))
+            future.add_done_callback(lambda _, task=download: task.cancel())
+            try:
+                file_location = await download
+            except CancelledError:
+                for file_path in [file_location, *segment_paths]:
+                    self._remove(file_path)
+                if not future.cancelled():
+                    future.cancel()
+                    raise  # the pool is stopping.
+                self.cancelled += 1
+                continue
+            except Exception as e:
+                print(f"{e} (Exception) - Failed to download video stream to {file_location}.")
+                for file_path in [file_location, *segment_paths]:
+                    self._remove(file_path)
+                file_location = None
+
+            if not future.done():
+                future.set_result(file_location)
@@ -0,0 +1,158 @@
+import json
+from asyncio import get_event_loop
+from os import replace
+from time import time
+from typing import Optional, TYPE_CHECKING
+
+from Weverse import WeverseClient, create_community_objects, create_post_objects
+
+if TYPE_CHECKING:
+    from Weverse import WeverseClientAsync
+
+# (object attribute, endpoint key) of the metadata that is kept for each model.
+COMMUNITY_FIELDS = (("id", "id"), ("name", "name"), ("description", "description"),
+                    ("member_count", "memberCount"), ("home_banner", "homeBannerImgPath"), ("icon", "iconImgPath"),
+                    ("banner", "bannerImgPath"), ("full_name", "fullname"), ("fc_member", "fcMember"),
+                    ("show_member_count", "showMemberCount"))
+ARTIST_FIELDS = (("id", "id"), ("community_user_id", "communityUserId"), ("name", "name"),
+                 ("list_name", "listName"), ("profile_nick_name", "profileNickName"),
+                 ("profile_img_path", "profileImgPath"), ("group_name", "groupName"),
+                 ("max_comment_count", "maxCommentCount"), ("community_id", "communityId"),
+                 ("is_enabled", "isEnabled"), ("birthday_img_url", "birthdayImgUrl"))
+TAB_FIELDS = (("id", "id"), ("name", "name"))
+POST_FIELDS = (("id", "id"), ("community_tab_id", "communityTabId"), ("type", "type"), ("body", "body"),
+               ("comment_count", "commentCount"), ("like_count", "likeCount"),
+               ("max_comment_count", "maxCommentCount"), ("created_at", "createdAt"), ("updated_at", "updatedAt"),
+               ("is_locked", "isLocked"), ("is_blind", "isBlind"), ("is_active", "isActive"),
+               ("is_private", "isPrivate"), ("is_limit_comment", "isLimitComment"))
+PHOTO_FIELDS = (("id", "id"), ("media_id", "mediaId"), ("content_index", "contentIndex"),
+                ("thumbnail_img_url", "thumbnailImgUrl"), ("thumbnail_img_width", "thumbnailImgWidth"),
+                ("thumbnail_img_height", "thumbnailImgHeight"), ("original_img_url", "orgImgUrl"),
+                ("original_img_width", "orgImgWidth"), ("original_img_height", "orgImgHeight"),
+                ("file_name", "downloadImgFilename"))
+VIDEO_FIELDS = (("video_url", "videoUrl"), ("thumbnail_url", "thumbnailUrl"),
+                ("thumbnail_width", "thumbnailWidth"), ("thumbnail_height", "thumbnailHeight"),
+                ("length", "playTime"), ("content_index", "contentIndex"), ("video_id", "id"),
+                ("encoding_status", "status"), ("type", "type"), ("video_width", "videoWidth"),
+                ("video_height", "videoHeight"), ("is_vertical", "isVertical"),
+                ("caption_s3_paths", "captionS3Paths"), ("hls_path", "hlsPath"), ("dash_path", "dashPath"))
+COMMENT_FIELDS = (("id", "id"), ("body", "body"), ("comment_count", "commentCount"), ("like_count", "likeCount"),
+                  ("is_blind", "isBlind"), ("post_id", "postId"), ("created_at", "createdAt"),
+                  ("updated_at", "updatedAt"))
+
+
+def to_endpoint_dict(model_object, fields) -> dict:
+    """Get the metadata of a Weverse object in the format of the endpoint it was created from.
+
+    Missing values are left out since the Weverse client treats them the same as None.
+    """
+    values = ((key, getattr(model_object, attribute, None)) for attribute, key in fields)
+    return {key: value for key, value in values if value is not None}
+
+
+class WeverseSnapshot:
+    VERSION = 1
+
+    def __init__(self, file_path, max_posts=200):
+        """
+        A compact on-disk snapshot of the Weverse cache the bot depends on.
+
+        Communities (with their artists and tabs) and the most recent posts are stored in the format of the
+        Weverse endpoints, so they are recreated with the same functions the Weverse client uses. Loading it at
+        startup lets commands and notifications work before the client fetched everything again.
+
+        :param file_path: The location of the snapshot.
+        :param max_posts: Amount of the most recent posts kept in the snapshot.
+        """
+        self.file_path = file_path
+        self.max_posts = max_posts
+        self.saved_at: Optional[float] = None
+
+    def dump(self, client: "WeverseClientAsync") -> dict:
+        """Get the snapshot of a client's cache."""
+        communities = {}
+        for community in client.all_communities.values():
+            community_data = communities[community.id] = to_endpoint_dict(community, COMMUNITY_FIELDS)
+            community_data["artists"] = [to_endpoint_dict(artist, ARTIST_FIELDS) for artist in
+                                         getattr(community, "artists", None) or []]
+            community_data["tabs"] = [to_endpoint_dict(tab, TAB_FIELDS) for tab in
+                                      getattr(community, "tabs", None) or []]
+            community_data["posts"] = []
+
+        posts = sorted(client.all_posts.values(), key=lambda post: post.id, reverse=True)[:self.max_posts]
+        for post in posts:
+            artist = getattr(post, "artist", None)
+            community_data = communities.get(getattr(getattr(artist, "community", None), "id", None))
+            if not community_data:
+                continue  # a post can only be recreated under the community of its artist.
+
+            post_data = to_endpoint_dict(post, POST_FIELDS)
+            post_data["communityUser"] = {"id": post.community_artist_id, "artistId": post.artist_id}
+            post_data["photos"] = [to_endpoint_dict(photo, PHOTO_FIELDS) for photo in post.photos or []]
+            post_data["attachedVideos"] = [to_endpoint_dict(video, VIDEO_FIELDS) for video in post.videos or []]
+            post_data["artistComments"] = [to_endpoint_dict(comment, COMMENT_FIELDS) for comment in
+                                           post.artist_comments or []]
+            community_data["posts"].append(post_data)
+
+        return {"version": self.VERSION, "saved_at": time(), "communities": list(communities.values())}
+
+    def apply(self, client: "WeverseClientAsync", data: dict) -> int:
+        """Fill a client's cache from a snapshot without replacing what the client already has.
+
+        :returns: The amount of communities that were added.
+        """
+        if data.get("version") != self.VERSION:
+            return 0
+
+        communities = {community["id"]: community for community in data.get("communities") or []
+                       if community.get("id") not in client.all_communities}
+        for community in create_community_objects(list(communities.values())).values():
+            community_data = communities[community.id]
+            WeverseClient.process_community_artists_and_tabs(community, community_data)
+            client.all_communities[community.id] = community
+            for artist in community.artists:
+                client.all_artists[artist.id] = artist
+            for tab in community.tabs:
+                client.all_tabs[tab.id] = tab
+            for post in create_post_objects(community_data.get("posts"), community):
+                client.all_posts.setdefault(post.id, post)
+                for photo in post.photos or []:
+                    client.all_photos.setdefault(photo.id, photo)
+
+        self.saved_at = data.get("saved_at")
+        return len(communities)
+
+    def _read(self) -> Optional[dict]:
+        try:
+            with open(self.file_path, encoding="utf-8") as fd:
+                return json.load(fd)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, data):
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as fd:
+            json.dump(data, fd, separators=(",", ":"))
+        replace(temp_path, self.file_path)
+
+    async def load(self, client: "WeverseClientAsync") -> int:
+        """Load the snapshot into a client's cache.
+
+        :returns: The amount of communities that were loaded (0 if there is no usable snapshot).
+        """
+        data = await get_event_loop().run_in_executor(None, self._read)
+        if not data:
+            return 0
+        try:
+            return self.apply(client, data)
+        except Exception as e:
+            print(f"{e} (Exception) - Failed to load the Weverse snapshot from {self.file_path}.")
+            return 0
+
+    async def save(self, client: "WeverseClientAsync"):
+        """Save the snapshot of a client's cache."""
+        data = self.dump(client)
+        if not data["communities"]:
+            return  # never replace a snapshot with an empty cache (ex: the client failed to load).
+        await get_event_loop().run_in_executor(None, self._write, data)
+        self.saved_at = data["saved_at"]
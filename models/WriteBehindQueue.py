@@ -0,0 +1,120 @@
+from asyncio import get_event_loop, sleep, Lock
+from typing import Dict, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import AbstractDataBase
+
+
+class WriteBehindQueue:
+    def __init__(self, db, max_pending=100, flush_interval=5.0):
+        """
+        Queues subscription changes in memory and writes them to the DataBase in batches.
+
+        It has the same mutation methods as the DataBase model, so it can be used in place of it.
+        Changes are coalesced per (channel, community) so only the final state is written. They are flushed in a
+        single transaction once `max_pending` keys are queued, every `flush_interval` seconds, or when `flush`
+        is called (ex: when the cog is unloaded).
+
+        :param db: The DataBase model to write to.
+        :param max_pending: Amount of queued (channel, community) keys that triggers a flush.
+        :param flush_interval: Seconds between flushes.
+        """
+        self.db: AbstractDataBase = db
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        # (channel id, community name) : change
+        # a change is either {"delete": True}, {"insert": True, "media", "comments", "role"} or the updated columns.
+        self._pending: Dict[Tuple[int, str], dict] = {}
+        self._flush_lock = Lock()
+        self._task = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def start(self):
+        """Start flushing on an interval."""
+        if not self._task:
+            self._task = get_event_loop().create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop flushing on an interval and flush the remaining changes."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await sleep(self.flush_interval)
+            await self.flush()
+
+    def _queue(self, channel_id, community_name, **columns):
+        key = (channel_id, community_name.lower())
+        change = self._pending.get(key)
+        if not change or columns.get("delete") or columns.get("insert"):
+            self._pending[key] = columns
+        elif change.get("delete"):
+            return  # the channel is no longer following the community, there is nothing to update.
+        else:
+            change.update(columns)
+
+        if len(self._pending) >= self.max_pending:
+            get_event_loop().create_task(self.flush())
+
+    async def insert_weverse_channel(self, channel_id, community_name, media_enabled=True, comments_enabled=True,
+                                     role_id=None):
+        self._queue(channel_id, community_name, insert=True, media=media_enabled, comments=comments_enabled,
+                    role=role_id)
+
+    async def delete_weverse_channel(self, channel_id, community_name):
+        self._queue(channel_id, community_name, delete=True)
+
+    async def delete_weverse_channels(self, channels):
+        for channel_id, community_name in channels:
+            self._queue(channel_id, community_name, delete=True)
+
+    async def toggle_media(self, channel_id, community_name, current_status):
+        self._queue(channel_id, community_name, media=not current_status)
+
+    async def toggle_comments(self, channel_id, community_name, current_status):
+        self._queue(channel_id, community_name, comments=not current_status)
+
+    async def update_role(self, channel_id, community_name, role_id):
+        self._queue(channel_id, community_name, role=role_id)
+
+    async def flush(self):
+        """Write every queued change to the DataBase in one batch."""
+        async with self._flush_lock:
+            if not self._pending or not self.db.is_ready:
+                return
+
+            changes, self._pending = self._pending, {}
+            deletes, upserts, media_updates, comments_updates, role_updates = [], [], [], [], []
+            for (channel_id, community_name), change in changes.items():
+                if change.get("delete"):
+                    deletes.append((channel_id, community_name))
+                    continue
+                if change.get("insert"):
+                    upserts.append((channel_id, community_name, change["media"], change["comments"],
+                                    change["role"]))
+                    continue
+                if "media" in change:
+                    media_updates.append((change["media"], channel_id, community_name))
+                if "comments" in change:
+                    comments_updates.append((change["comments"], channel_id, community_name))
+                if "role" in change:
+                    role_updates.append((change["role"], channel_id, community_name))
+
+            try:
+                await self.db.apply_channel_changes(deletes, upserts, media_updates, comments_updates, role_updates)
+            except Exception as e:
+                print(f"{e} (Exception) - Failed to write {len(changes)} subscription changes to the DataBase.")
+                # keep the failed changes for the next flush, with the changes queued during the flush on top.
+                for key, change in changes.items():
+                    newer = self._pending.get(key)
+                    if not newer:
+                        self._pending[key] = change
+                    elif not (newer.get("delete") or newer.get("insert")) and not change.get("delete"):
+                        self._pending[key] = {**change, **newer}
+                    elif change.get("delete") and not newer.get("insert"):
+                        self._pending[key] = change  # the updates do not apply to a deleted channel.
@@ -1,3 +1,24 @@
 from .AbstractDataBase import AbstractDataBase
 from .PostgreSQL import PostgreSQL
 from .TextChannel import TextChannel
+from .SubscriptionStore import SubscriptionStore
+from .DeliveryScheduler import DeliveryScheduler, DeliveryLane, RateLimitBucket
+from .DedupStore import DedupStore
+from .WriteBehindQueue import WriteBehindQueue
+from .CommunityIndex import CommunityIndex
+from .MediaStore import MediaStore
+from .MediaDownloader import MediaDownloader
+from .VideoJobPool import VideoJobPool
+from .TranslationCache import TranslationCache
+from .CommentCache import CommentCache
+from .NotificationJob import NotificationJob
+from .NotificationPipeline import NotificationPipeline
+from .NotificationCoalescer import NotificationCoalescer
+from .MessagePacker import MessagePacker, PackedMessage
+from .PublishQueue import PublishQueue
+from .Outbox import Outbox
+from .ChannelResolver import ChannelResolver, ChannelAccess
+from .ClusterClient import ClusterClient
+from .StartupBarrier import StartupBarrier
+from .WeverseSnapshot import WeverseSnapshot
+from .Metrics import Metrics
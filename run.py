@@ -4,7 +4,7 @@ from dbl import DBLClient
 from dotenv import load_dotenv
 from discord.ext.commands import AutoShardedBot, errors
 from os import getenv
-from models import PostgreSQL, AbstractDataBase
+from models import PostgreSQL, AbstractDataBase, Metrics
 
 load_dotenv()  # reloads .env to memory
 
@@ -14,10 +14,26 @@ class WeverseBot(AutoShardedBot):
         super().__init__(command_prefix, **options.get("options"))
 
         self.conn: AbstractDataBase = PostgreSQL(**options.get("db_kwargs"))  # db connection
+        self.metrics = Metrics()
 
         top_gg_key = getenv("TOP_GG_KEY")
         self.top_gg_client: Optional[DBLClient] = None if not top_gg_key else DBLClient(self, top_gg_key, autopost=True)
 
+    async def start(self, *args, **kwargs):
+        # the DataBase connects while logging in to Discord. Anything that needs it waits on its ready event.
+        self.loop.create_task(self.connect_db())
+        if getenv("METRICS_PORT"):
+            # each cluster worker serves its own metrics on the next port.
+            port = int(getenv("METRICS_PORT")) + int(getenv("CLUSTER_WORKER_ID") or 0)
+            self.loop.create_task(self.metrics.start_server(getenv("METRICS_HOST") or "127.0.0.1", port))
+        await super().start(*args, **kwargs)
+
+    async def connect_db(self):
+        try:
+            await self.conn.create_db_and_connect()
+        except Exception as e:
+            print(f"{e} (Exception) - Failed to connect to the DataBase.")
+
     async def on_command_error(self, context, exception):
         if isinstance(exception, errors.CommandNotFound):
             ...
@@ -54,6 +70,11 @@ if __name__ == '__main__':
         }
     }
 
+    if getenv("CLUSTER_SHARD_IDS"):
+        # started by cluster.py as a worker that only connects the shards it owns.
+        kwargs["options"]["shard_ids"] = [int(shard_id) for shard_id in getenv("CLUSTER_SHARD_IDS").split(",")]
+        kwargs["options"]["shard_count"] = int(getenv("CLUSTER_SHARD_COUNT"))
+
     bot = WeverseBot(getenv("BOT_PREFIX"), **kwargs)
 
     cogs = ["BotInfo", "Weverse"]
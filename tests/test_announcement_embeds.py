@@ -0,0 +1,49 @@
+import unittest
+from functools import partial
+from types import SimpleNamespace
+
+from cogs.Weverse import Weverse
+from models import MessagePacker
+
+
+class FakeAnnouncement:
+    id = 1
+    community_id = 2
+    image_url = "https://weverse.io/announcement.jpg"
+
+    def __init__(self, title, body):
+        self.title = title
+        self.body = body
+
+    def __str__(self):
+        return self.body
+
+
+class TestAnnouncementEmbeds(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def translate_content(text, weverse_translate=None, content_desc=None):
+            return text.upper()
+
+        self.cog = SimpleNamespace(get_random_color=Weverse.get_random_color, translate_content=translate_content,
+                                   _packer=MessagePacker(max_embeds=1))
+        self.cog.create_embed = partial(Weverse.create_embed, self.cog)
+
+    async def test_short_announcement_is_one_embed(self):
+        embeds = await Weverse.set_announcement_embed(self.cog, FakeAnnouncement("Notice", "안녕"))
+        self.assertEqual(len(embeds), 1)
+        self.assertEqual(embeds[0].title, "Notice - Post #1/1")
+        self.assertIn("Content: **안녕**", embeds[0].description)
+
+    async def test_long_announcement_is_split_within_the_embed_limits(self):
+        body = " ".join(f"word{index}" for index in range(3000))
+        embeds = await Weverse.set_announcement_embed(self.cog, FakeAnnouncement("Notice " * 30, body))
+        self.assertGreater(len(embeds), 1)
+        for count, embed in enumerate(embeds, 1):
+            self.assertTrue(embed.title.endswith(f"Post #{count}/{len(embeds)}"))
+            self.assertLessEqual(len(embed.description), MessagePacker.MAX_DESCRIPTION)
+            self.assertLessEqual(len(embed), 6000)
+        self.assertEqual(embeds[0].image.url, FakeAnnouncement.image_url)
+        self.assertFalse(embeds[1].image.url)
+        words = " ".join(embed.description for embed in embeds).split()
+        self.assertEqual(sum("word" in word for word in words), 3000)  # the first and last are in bold.
+        self.assertEqual(words[-1], "WORD2999")
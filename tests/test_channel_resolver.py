@@ -0,0 +1,63 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from models import ChannelResolver
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild_id=1, send_messages=True, news=False):
+        self.id = channel_id
+        self.guild = SimpleNamespace(id=guild_id, me=object())
+        self.send_messages = send_messages
+        self.news = news
+
+    def permissions_for(self, member):
+        return SimpleNamespace(send_messages=self.send_messages, embed_links=True, attach_files=True)
+
+    def is_news(self):
+        return self.news
+
+
+class TestChannelResolver(unittest.TestCase):
+    def setUp(self):
+        self.channels = {}
+        self.resolver = ChannelResolver(SimpleNamespace(get_channel=self.channels.get), negative_ttl=60,
+                                        access_ttl=30)
+
+    def test_missing_channels_are_skipped_until_the_negative_ttl(self):
+        self.channels[10] = FakeChannel(10)
+        with mock.patch("models.ChannelResolver.monotonic", return_value=1000):
+            self.resolver.mark_missing(10)
+        with mock.patch("models.ChannelResolver.monotonic", return_value=1060):
+            self.assertTrue(self.resolver.is_missing(10))
+            self.assertIsNone(self.resolver.resolve(10))
+        with mock.patch("models.ChannelResolver.monotonic", return_value=1061):
+            self.assertFalse(self.resolver.is_missing(10))
+            self.assertIs(self.resolver.resolve(10), self.channels[10])
+        self.assertEqual(self.resolver.skipped, 2)
+
+    def test_joining_a_guild_clears_its_missing_channels(self):
+        self.resolver.mark_missing(10)
+        self.resolver.invalidate_guild(1, [10])
+        self.assertFalse(self.resolver.is_missing(10))
+
+    def test_access_is_cached_until_the_access_ttl(self):
+        channel = FakeChannel(10, news=True)
+        with mock.patch("models.ChannelResolver.monotonic", return_value=1000):
+            access = self.resolver.get_access(channel)
+        self.assertTrue(access.can_send and access.can_publish)
+
+        channel.send_messages = False
+        with mock.patch("models.ChannelResolver.monotonic", return_value=1030):
+            self.assertTrue(self.resolver.get_access(channel).can_send)
+        with mock.patch("models.ChannelResolver.monotonic", return_value=1031):
+            self.assertFalse(self.resolver.get_access(channel).can_send)
+        self.assertEqual((self.resolver.hits, self.resolver.misses), (1, 2))
+
+    def test_guild_updates_invalidate_the_access(self):
+        channel = FakeChannel(10)
+        self.resolver.get_access(channel)
+        channel.send_messages = False
+        self.resolver.invalidate_guild(1)
+        self.assertFalse(self.resolver.get_access(channel).can_send)
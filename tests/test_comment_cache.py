@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from collections import OrderedDict
+from types import SimpleNamespace
+from unittest import mock
+
+from cogs.Weverse import Weverse
+from models import CommentCache
+
+
+def comment(comment_id, post_id=1, created_at="2021-06-01T12:00:00Z"):
+    return SimpleNamespace(id=comment_id, post_id=post_id, created_at=created_at)
+
+
+class TestCommentCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.fetches = 0
+
+    def fetcher(self, comments, delay=0):
+        async def fetch():
+            self.fetches += 1
+            await asyncio.sleep(delay)
+            return comments
+        return fetch
+
+    async def test_concurrent_misses_share_a_fetch(self):
+        cache = CommentCache()
+        results = await asyncio.gather(*[cache.get_or_fetch(1, self.fetcher([comment(10)], delay=0.01))
+                                         for _ in range(3)])
+        self.assertEqual(([[c.id for c in comments] for comments in results], self.fetches), ([[10]] * 3, 1))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    async def test_fetches_again_if_the_cached_comments_are_not_valid(self):
+        cache = CommentCache()
+        await cache.get_or_fetch(1, self.fetcher([comment(10)]))
+        comments = await cache.get_or_fetch(1, self.fetcher([comment(11), comment(10)]),
+                                            lambda cached: cached[0].id == 11)
+        self.assertEqual(([c.id for c in comments], self.fetches), ([11, 10], 2))
+
+    async def test_expires_after_the_ttl(self):
+        cache = CommentCache(ttl=30)
+        with mock.patch("models.CommentCache.monotonic", return_value=1000):
+            cache.merge(1, [comment(10)])
+        with mock.patch("models.CommentCache.monotonic", return_value=1030):
+            self.assertIsNotNone(cache.get(1))
+        with mock.patch("models.CommentCache.monotonic", return_value=1031):
+            self.assertIsNone(cache.get(1))
+
+    def test_evicts_the_least_recently_used_post(self):
+        cache = CommentCache(max_entries=2)
+        cache.merge(1, [comment(10, post_id=1)])
+        cache.merge(2, [comment(20, post_id=2)])
+        cache.get(1)  # post 1 is now used more recently than post 2.
+        cache.merge(3, [comment(30, post_id=3)])
+        self.assertEqual((cache.get(2), len(cache)), (None, 2))
+        self.assertIsNotNone(cache.get(1))
+
+    def test_merge_keeps_the_cached_comments(self):
+        cache = CommentCache()
+        cache.merge(1, [comment(10)])
+        cache.merge(1, [comment(11), comment(10)])
+        self.assertEqual([c.id for c in cache.get(1)], [11, 10])
+
+    def test_is_newer(self):
+        self.assertTrue(CommentCache.is_newer(comment(10, created_at="2021-06-01T21:00:00+0900"),
+                                              "2021-06-01T12:00:00Z"))
+        self.assertFalse(CommentCache.is_newer(comment(10, created_at=1622548799000), "2021-06-01T12:00:00Z"))
+        self.assertFalse(CommentCache.is_newer(comment(10, created_at=None), "2021-06-01T12:00:00Z"))
+
+
+class TestSyncFetchedComments(unittest.TestCase):
+    def test_only_reads_the_new_comments_of_the_client(self):
+        client = SimpleNamespace(all_comments=OrderedDict())
+        cog = SimpleNamespace(weverse_client=client, _comments=CommentCache(), _comments_seen=0)
+        client.all_comments[10] = comment(10, post_id=1)
+        Weverse.sync_fetched_comments(cog)
+        for comment_id, post_id in ((11, 1), (20, 2)):
+            client.all_comments[comment_id] = comment(comment_id, post_id=post_id)
+
+        with mock.patch.object(cog._comments, "merge", wraps=cog._comments.merge) as merge:
+            Weverse.sync_fetched_comments(cog)
+        self.assertEqual(merge.call_count, 2)
+        self.assertEqual([c.id for c in cog._comments.get(1)], [11, 10])
+        self.assertEqual([c.id for c in cog._comments.get(2)], [20])
@@ -0,0 +1,46 @@
+import unittest
+from types import SimpleNamespace
+
+from models import CommunityIndex
+
+
+def community(community_id, name):
+    return SimpleNamespace(id=community_id, name=name)
+
+
+class TestCommunityIndex(unittest.TestCase):
+    def test_lookups_by_name_and_id(self):
+        index = CommunityIndex()
+        bts = community(1, "BTS")
+        index.refresh({1: bts, 2: community(2, "TXT")})
+        self.assertIs(index.get_by_name("bts"), bts)
+        self.assertIs(index.get_by_id(1), bts)
+        self.assertIsNone(index.get_by_name("seventeen"))
+        self.assertEqual((index.names, index.available), (["bts", "txt"], "bts, txt"))
+
+    def test_picks_up_communities_added_to_the_same_dict(self):
+        index = CommunityIndex()
+        communities = {1: community(1, "BTS")}
+        index.refresh(communities)
+        communities[2] = community(2, "TXT")
+        index.refresh(communities)
+        self.assertEqual(index.names, ["bts", "txt"])
+
+    def test_picks_up_a_new_dict(self):
+        index = CommunityIndex()
+        index.refresh({1: community(1, "BTS")})
+        index.refresh({2: community(2, "TXT")})
+        self.assertIsNone(index.get_by_name("bts"))
+        self.assertEqual(len(index), 1)
+
+    def test_skips_an_unchanged_dict_unless_forced(self):
+        index = CommunityIndex()
+        communities = {1: community(1, "BTS")}
+        index.refresh(communities)
+        communities[1] = community(1, "BTS (renamed)")  # replaced without changing the amount of communities
+        index.refresh(communities)
+        self.assertIsNotNone(index.get_by_name("bts"))
+
+        index.refresh(communities, force=True)
+        self.assertIsNone(index.get_by_name("bts"))
+        self.assertIs(index.get_by_name("bts (renamed)"), communities[1])
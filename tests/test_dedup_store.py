@@ -0,0 +1,57 @@
+import unittest
+from unittest import mock
+
+from models import DedupStore
+
+
+class TestDedupStore(unittest.TestCase):
+    def test_check_and_mark(self):
+        store = DedupStore()
+        self.assertFalse(store.check_and_mark(("bts", 1), 10))
+        self.assertTrue(store.check_and_mark(("bts", 1), 10))
+        self.assertFalse(store.check_and_mark(("bts", 1), 11))
+        self.assertEqual((store.hits, store.misses), (1, 2))
+
+    def test_evicts_oldest_keys_over_max_entries(self):
+        store = DedupStore(max_entries=2)
+        for content_id in range(3):
+            store.mark_delivered(("bts", content_id), 10)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.evictions, 1)
+        self.assertFalse(store.is_delivered(("bts", 0), 10))
+        self.assertTrue(store.is_delivered(("bts", 2), 10))
+
+    def test_evicts_oldest_keys_over_max_channel_ids(self):
+        store = DedupStore(max_channel_ids=5)
+        for content_id in range(3):
+            for channel_id in range(2):
+                store.mark_delivered(("bts", content_id), channel_id)
+        self.assertLessEqual(store.channel_ids, 5)
+        self.assertFalse(store.is_delivered(("bts", 0), 0))
+        self.assertTrue(store.is_delivered(("bts", 2), 1))
+
+    def test_keeps_newest_key_over_max_channel_ids(self):
+        store = DedupStore(max_channel_ids=2)
+        for channel_id in range(4):
+            store.mark_delivered(("bts", 1), channel_id)
+        self.assertEqual(len(store), 1)
+        self.assertTrue(store.is_delivered(("bts", 1), 3))
+
+    def test_expires_keys_after_retention(self):
+        store = DedupStore(retention=60)
+        with mock.patch("models.DedupStore.monotonic", return_value=1000):
+            store.mark_delivered(("bts", 1), 10)
+        with mock.patch("models.DedupStore.monotonic", return_value=1061):
+            self.assertFalse(store.is_delivered(("bts", 1), 10))
+            store.mark_delivered(("bts", 2), 10)
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.channel_ids, 1)
+
+    def test_keys_loaded_from_the_ledger_keep_their_time(self):
+        store = DedupStore(retention=60)
+        with mock.patch("models.DedupStore.monotonic", return_value=1000):
+            store.mark_delivered(("bts", 1), 10, created_at=950)  # delivered 50 seconds before the restart
+            store.mark_delivered(("bts", 2), 10)
+        with mock.patch("models.DedupStore.monotonic", return_value=1011):
+            self.assertFalse(store.is_delivered(("bts", 1), 10))
+            self.assertTrue(store.is_delivered(("bts", 2), 10))
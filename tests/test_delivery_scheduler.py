@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+from models import DeliveryScheduler
+
+
+def make_scheduler(**kwargs):
+    # rate-limits that never get in the way, so only ordering and pausing are tested.
+    options = dict(max_in_flight=100, global_rate=1000, route_rate=1000, lane_max_in_flight=1)
+    options.update(kwargs)
+    return DeliveryScheduler(**options)
+
+
+class TestOrderJobs(unittest.TestCase):
+    def test_round_robin_across_guilds_within_a_shard(self):
+        jobs = [(0, 1, f"a{i}", None) for i in range(3)] + [(0, 2, "b0", None), (0, 3, "c0", None)]
+        ordered = make_scheduler().order_jobs(jobs)
+        self.assertEqual([job[2] for job in ordered[0]], ["a0", "b0", "c0", "a1", "a2"])
+
+    def test_groups_jobs_by_shard(self):
+        jobs = [(0, 1, "a", None), (1, 2, "b", None), (0, 3, "c", None)]
+        ordered = make_scheduler().order_jobs(jobs)
+        self.assertEqual({shard_id: [job[2] for job in shard_jobs] for shard_id, shard_jobs in ordered.items()},
+                         {0: ["a", "c"], 1: ["b"]})
+
+
+class TestFanOut(unittest.IsolatedAsyncioTestCase):
+    async def test_runs_every_job_fairly(self):
+        sent = []
+
+        async def send(route):
+            sent.append(route)
+
+        jobs = [(0, 1, f"big{i}", lambda i=i: send(f"big{i}")) for i in range(4)] + \
+               [(0, 2, "small", lambda: send("small"))]
+        await make_scheduler().fan_out(jobs)
+        self.assertEqual(len(sent), 5)
+        self.assertLess(sent.index("small"), 2)  # the large guild does not starve the small one.
+
+    async def test_failed_job_does_not_stop_the_others(self):
+        sent = []
+
+        async def fail():
+            raise RuntimeError("failed")
+
+        async def send():
+            sent.append(True)
+
+        await make_scheduler().fan_out([(0, 1, "a", fail), (0, 2, "b", send)])
+        self.assertEqual(sent, [True])
+
+    async def test_paused_lane_waits_until_resumed(self):
+        scheduler = make_scheduler(max_pause=10)
+        sent = []
+
+        async def send(shard_id):
+            sent.append(shard_id)
+
+        scheduler.pause_lane(1)
+        fan_out = asyncio.ensure_future(scheduler.fan_out([(0, 1, "a", lambda: send(0)),
+                                                           (1, 2, "b", lambda: send(1))]))
+        await asyncio.sleep(0.05)
+        self.assertEqual(sent, [0])  # the connected shard is not held up by the paused one.
+
+        scheduler.resume_lane(1)
+        await asyncio.wait_for(fan_out, 1)
+        self.assertEqual(sent, [0, 1])
+
+    async def test_paused_lane_is_delivered_after_max_pause(self):
+        scheduler = make_scheduler(max_pause=0.05)
+        sent = []
+
+        async def send():
+            sent.append(True)
+
+        scheduler.pause_lane(0)
+        await asyncio.wait_for(scheduler.fan_out([(0, 1, "a", send), (0, 1, "b", send)]), 1)
+        self.assertEqual(sent, [True, True])
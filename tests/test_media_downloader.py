@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+from tempfile import TemporaryDirectory
+
+from models import MediaStore, MediaDownloader
+
+
+class FakeContent:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def iter_chunked(self, chunk_size):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+
+
+class FakeResponse:
+    def __init__(self, chunks):
+        self.content = FakeContent(chunks)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.requests = 0
+
+    def get(self, url):
+        self.requests += 1
+        return FakeResponse(self.chunks)
+
+
+class TestMediaDownloader(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.folder = TemporaryDirectory()
+        self.store = MediaStore(self.folder.name, index_path=f"{self.folder.name}/index.json")
+
+    async def asyncTearDown(self):
+        self.folder.cleanup()
+
+    async def test_streams_to_the_store(self):
+        downloader = MediaDownloader(FakeSession([b"abc", b"de"]), self.store)
+        self.assertEqual(await downloader.download("https://weverse.io/a.jpg", "a.jpg"), 5)
+        with open(self.store.get_file_path("a.jpg"), "rb") as fd:
+            self.assertEqual(fd.read(), b"abcde")
+        self.assertEqual((self.store.get_size("a.jpg"), downloader.bytes_downloaded), (5, 5))
+
+    async def test_concurrent_downloads_share_a_request(self):
+        session = FakeSession([b"abc"])
+        downloader = MediaDownloader(session, self.store)
+        sizes = await asyncio.gather(*[downloader.download("https://weverse.io/a.jpg", "a.jpg") for _ in range(3)])
+        self.assertEqual((sizes, session.requests), ([3, 3, 3], 1))
+
+    async def test_stored_empty_file_is_not_downloaded_again(self):
+        session = FakeSession([])
+        downloader = MediaDownloader(session, self.store)
+        await downloader.download("https://weverse.io/a.jpg", "a.jpg")
+        self.assertEqual(await downloader.download("https://weverse.io/a.jpg", "a.jpg"), 0)
+        self.assertEqual((session.requests, downloader.hits), (1, 1))
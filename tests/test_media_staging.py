@@ -0,0 +1,56 @@
+import unittest
+from collections import OrderedDict
+from os import path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from cogs.Weverse import Weverse
+from models import MessagePacker
+
+
+class FakeChannel:
+    def __init__(self):
+        self.uploads = []
+
+    async def send(self, files=None):
+        self.uploads.append([file.filename for file in files])
+        for file in files:
+            file.close()  # discord.py closes the files once they are sent.
+        return SimpleNamespace(attachments=[SimpleNamespace(url=f"https://cdn.discordapp.com/{file.filename}")
+                                            for file in files])
+
+
+class TestMediaStaging(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.folder = TemporaryDirectory()
+        self.channel = FakeChannel()
+        self.cog = SimpleNamespace(bot=SimpleNamespace(get_channel=lambda channel_id: self.channel),
+                                   _staging_channel_id=1, _attachment_urls=OrderedDict(),
+                                   _packer=MessagePacker(max_embeds=1, max_file_bytes=10))
+
+    async def asyncTearDown(self):
+        self.folder.cleanup()
+
+    def write(self, file_name, size) -> str:
+        location = path.join(self.folder.name, file_name)
+        with open(location, "wb") as fd:
+            fd.write(b"0" * size)
+        return location
+
+    async def test_uploads_over_the_size_limit_are_split(self):
+        locations = [self.write(f"{index}.jpg", 4) for index in range(3)]
+        urls = await Weverse.stage_media(self.cog, locations)
+        self.assertEqual(self.channel.uploads, [["0.jpg", "1.jpg"], ["2.jpg"]])
+        self.assertEqual(urls, [f"https://cdn.discordapp.com/{index}.jpg" for index in range(3)])
+
+    async def test_uploads_over_the_attachment_limit_are_split(self):
+        self.cog._packer.max_file_bytes = 100
+        locations = [self.write(f"{index}.jpg", 1) for index in range(12)]
+        await Weverse.stage_media(self.cog, locations)
+        self.assertEqual([len(upload) for upload in self.channel.uploads], [10, 2])
+
+    async def test_staged_files_are_not_uploaded_again(self):
+        location = self.write("0.jpg", 1)
+        await Weverse.stage_media(self.cog, [location])
+        self.assertEqual(await Weverse.stage_media(self.cog, [location]), ["https://cdn.discordapp.com/0.jpg"])
+        self.assertEqual(len(self.channel.uploads), 1)
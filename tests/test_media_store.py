@@ -0,0 +1,98 @@
+import json
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from models import MediaStore
+
+
+class TestMediaStore(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.folder = path.join(self.temp_dir.name, "media")
+        self.index_path = path.join(self.temp_dir.name, "index.json")
+
+    async def asyncTearDown(self):
+        self.temp_dir.cleanup()
+
+    def get_store(self, **kwargs) -> MediaStore:
+        return MediaStore(self.folder, index_path=self.index_path, **kwargs)
+
+    def write(self, store: MediaStore, file_name, size):
+        with open(store.get_file_path(file_name), "wb") as fd:
+            fd.write(b"0" * size)
+        store.add(file_name, size)
+
+    def test_files_are_sharded(self):
+        store = self.get_store()
+        self.assertEqual(path.dirname(store.get_relative_path("a.jpg")), store.get_relative_path("a.jpg")[:2])
+        self.assertTrue(path.isdir(path.dirname(store.get_file_path("a.jpg"))))
+
+    async def test_evicts_least_recently_used_files_over_budget(self):
+        store = self.get_store(max_bytes=10, min_age=60)
+        with mock.patch("models.MediaStore.time", return_value=1000):
+            for file_name in ("a.jpg", "b.jpg", "c.jpg"):
+                self.write(store, file_name, 5)
+            store.get_size("a.jpg")  # a is now used more recently than b.
+        with mock.patch("models.MediaStore.time", return_value=1100):
+            await store.evict()
+        self.assertEqual((len(store), store.total_bytes, store.evictions), (2, 10, 1))
+        self.assertIsNone(store.get_size("b.jpg"))
+        self.assertFalse(path.exists(path.join(self.folder, store.get_relative_path("b.jpg"))))
+
+    async def test_recently_used_files_are_never_evicted(self):
+        store = self.get_store(max_bytes=1, min_age=60)
+        with mock.patch("models.MediaStore.time", return_value=1000):
+            self.write(store, "a.jpg", 5)
+            await store.evict()
+        self.assertEqual(store.get_size("a.jpg"), 5)
+
+    async def test_evicts_files_older_than_max_age(self):
+        store = self.get_store(max_age=100, min_age=0)
+        with mock.patch("models.MediaStore.time", return_value=1000):
+            self.write(store, "a.jpg", 5)
+        with mock.patch("models.MediaStore.time", return_value=1050):
+            self.write(store, "b.jpg", 5)
+        with mock.patch("models.MediaStore.time", return_value=1101):
+            await store.evict()
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.get_size("b.jpg"), 5)
+
+    async def test_index_survives_a_restart(self):
+        store = self.get_store()
+        self.write(store, "a.jpg", 5)
+        await store.save()
+
+        store = self.get_store()
+        store.load()
+        self.assertEqual((store.get_size("a.jpg"), store.total_bytes), (5, 5))
+
+    async def test_unsharded_files_are_indexed_and_evicted_first(self):
+        store = self.get_store()
+        store.get_file_path("new.jpg")  # creates the folder
+        with open(path.join(self.folder, "old.jpg"), "wb") as fd:
+            fd.write(b"0" * 5)
+
+        store = self.get_store(max_bytes=5, min_age=0)
+        store.load()
+        self.write(store, "new.jpg", 5)
+        self.assertEqual((len(store), store.total_bytes), (2, 10))
+        await store.evict()
+        self.assertFalse(path.exists(path.join(self.folder, "old.jpg")))
+        self.assertEqual(store.get_size("new.jpg"), 5)
+
+        await store.save()
+        with open(self.index_path, encoding="utf-8") as fd:
+            self.assertEqual(json.load(fd)["unsharded"], {})
+
+    def test_moves_the_index_out_of_the_media_folder(self):
+        self.get_store().get_file_path("a.jpg")  # creates the folder
+        old_index_path = path.join(self.folder, ".index.json")
+        with open(old_index_path, "w", encoding="utf-8") as fd:
+            json.dump({"a.jpg": [5, 1000]}, fd)
+
+        store = self.get_store()
+        store.load()
+        self.assertEqual(store.get_size("a.jpg"), 5)
+        self.assertFalse(path.exists(old_index_path))
@@ -0,0 +1,46 @@
+import unittest
+
+import discord
+
+from models import MessagePacker
+
+
+class TestChunkText(unittest.TestCase):
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(MessagePacker.chunk_text("a b c", 10), ["a b c"])
+
+    def test_splits_on_whitespace(self):
+        chunks = MessagePacker.chunk_text("aaa bbb\nccc ddd", 8)
+        self.assertEqual(chunks, ["aaa bbb", "ccc ddd"])
+        self.assertTrue(all(len(chunk) <= 8 for chunk in chunks))
+
+    def test_splits_long_words_at_the_cap(self):
+        self.assertEqual(MessagePacker.chunk_text("abcdefghij", 4), ["abcd", "efgh", "ij"])
+
+    def test_keeps_every_word(self):
+        text = " ".join(f"word{i}" for i in range(500))
+        chunks = MessagePacker.chunk_text(text, 100)
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+        self.assertEqual(" ".join(chunks), text)
+
+    def test_description_cap(self):
+        packer = MessagePacker()
+        self.assertEqual(packer.get_description_cap(100), MessagePacker.MAX_DESCRIPTION)
+        self.assertEqual(packer.get_description_cap(3000), 3000)
+
+
+class TestPack(unittest.TestCase):
+    def test_files_share_the_last_message(self):
+        packer = MessagePacker(max_embeds=1)
+        messages = packer.pack([discord.Embed(description="a")], ["missing.jpg"] * 3, "https://weverse.io", "<@&1>")
+        self.assertEqual([(message.content, len(message.embeds), len(message.files)) for message in messages],
+                         [("<@&1>", 1, 0), ("https://weverse.io", 0, 3)])
+
+    def test_messages_saved_compared_to_the_unpacked_messages(self):
+        packer = MessagePacker(max_embeds=1)
+        packer.pack([discord.Embed(description="a")], ["missing.jpg"] * 3, "https://weverse.io")
+        # sent before as the embed and a message with the text and every file.
+        self.assertEqual((packer.messages_packed, packer.messages_saved), (2, 0))
+
+        packer.pack([discord.Embed(description="a")], ["missing.jpg"])
+        self.assertEqual((packer.messages_packed, packer.messages_saved), (3, 1))
@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+
+from models import NotificationCoalescer
+
+
+class TestNotificationCoalescer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.flushed = []
+
+        async def flush(items):
+            self.flushed.append(items)
+
+        self.flush = flush
+
+    async def test_flushes_after_the_window(self):
+        coalescer = NotificationCoalescer(self.flush, window=0.05, max_delay=10)
+        coalescer.add("bts", 1)
+        coalescer.add("bts", 2)
+        coalescer.add("txt", 3)
+        await asyncio.sleep(0.1)
+        self.assertCountEqual(self.flushed, [[1, 2], [3]])
+        self.assertEqual((coalescer.batches, coalescer.coalesced), (2, 1))
+
+    async def test_flushes_at_max_items(self):
+        coalescer = NotificationCoalescer(self.flush, window=10, max_delay=10, max_items=3)
+        for item in range(4):
+            coalescer.add("bts", item)
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.flushed, [[0, 1, 2]])
+        self.assertEqual(len(coalescer), 1)
+        coalescer.flush_all()
+
+    async def test_flushes_at_max_delay_during_a_storm(self):
+        coalescer = NotificationCoalescer(self.flush, window=0.05, max_delay=0.1)
+        for item in range(6):  # every notification restarts the window, but max_delay still applies.
+            coalescer.add("bts", item)
+            await asyncio.sleep(0.04)
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.flushed, [[0, 1, 2], [3, 4, 5]])
+
+    async def test_flush_all(self):
+        coalescer = NotificationCoalescer(self.flush, window=10, max_delay=10)
+        coalescer.add("bts", 1)
+        coalescer.flush_all()
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.flushed, [[1]])
+        self.assertEqual(len(coalescer), 0)
@@ -0,0 +1,47 @@
+import unittest
+from types import SimpleNamespace
+
+import discord
+
+from models import NotificationJob, MessagePacker
+
+
+def comment_job(comment_id, description="a" * 300) -> NotificationJob:
+    job = NotificationJob(None, "comment", "BTS", [])
+    job.comment = SimpleNamespace(id=comment_id)
+    job.embed = discord.Embed(title="New BTS Notification!", description=description)
+    return job
+
+
+class TestMergeEmbeds(unittest.TestCase):
+    def setUp(self):
+        self.packer = MessagePacker(max_embeds=1)
+
+    def test_merges_descriptions_within_the_limits(self):
+        embeds = [discord.Embed(title="New BTS Notification!", description="a" * 2000) for _ in range(3)]
+        merged = self.packer.merge_embeds(embeds)
+        self.assertEqual([len(embed.description) for embed in merged], [4002, 2000])
+        self.assertEqual(embeds[0].description, "a" * 2000)  # the embeds are not changed.
+
+    def test_keeps_titles_that_differ(self):
+        merged = self.packer.merge_embeds([discord.Embed(title="Notice - Post #1/1", description="a"),
+                                           discord.Embed(title="Event - Post #1/1", description="b")])
+        self.assertEqual(merged[0].description, "a\n\n**Event - Post #1/1**\nb")
+
+    def test_does_not_merge_an_embed_with_an_image(self):
+        embed = discord.Embed(title="Notice", description="b")
+        embed.set_image(url="https://weverse.io/notice.jpg")
+        self.assertEqual(len(self.packer.merge_embeds([discord.Embed(title="Notice", description="a"), embed])), 2)
+
+
+class TestMergeJobs(unittest.TestCase):
+    def test_digest_is_packed_into_fewer_messages(self):
+        packer = MessagePacker(max_embeds=1)
+        digest = NotificationJob.merge([comment_job(comment_id) for comment_id in range(25)], packer.merge_embeds)
+        self.assertEqual(digest.merged_content_ids, list(range(25)))
+        # 25 comments of 300 characters fit in 2 embeds, so they are sent in 2 messages instead of 25.
+        self.assertEqual(len(packer.pack(digest.embed_list, text=digest.message_text)), 2)
+
+    def test_digest_without_merging_keeps_every_embed(self):
+        digest = NotificationJob.merge([comment_job(comment_id) for comment_id in range(3)])
+        self.assertEqual(len(digest.embed_list), 3)
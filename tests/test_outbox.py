@@ -0,0 +1,117 @@
+import json
+import unittest
+from datetime import timedelta
+from functools import partial
+from types import SimpleNamespace
+from unittest import mock
+
+import discord
+
+from cogs.Weverse import Weverse
+from models import Outbox, MessagePacker, TextChannel
+
+
+class FakeDataBase:
+    is_ready = True
+
+    def __init__(self):
+        self.inserted = []
+        self.updated = []
+
+    async def insert_outbox_entries(self, entries):
+        self.inserted.extend(entries)
+
+    async def update_outbox_entries(self, updates):
+        self.updated.extend(updates)
+
+
+class TestOutbox(unittest.IsolatedAsyncioTestCase):
+    def test_retry_delay_backs_off_exponentially(self):
+        outbox = Outbox(FakeDataBase(), base_delay=30, max_delay=3600)
+        with mock.patch("models.Outbox.uniform", return_value=1):  # no jitter
+            self.assertEqual([outbox.get_retry_delay(attempts) for attempts in (1, 2, 3)],
+                             [timedelta(seconds=30), timedelta(seconds=60), timedelta(seconds=120)])
+            self.assertEqual(outbox.get_retry_delay(20), timedelta(seconds=3600))
+
+    def test_retry_delay_is_jittered(self):
+        outbox = Outbox(FakeDataBase(), base_delay=30)
+        for _ in range(50):
+            self.assertTrue(timedelta(seconds=15) <= outbox.get_retry_delay(1) <= timedelta(seconds=45))
+
+    async def test_entries_are_buffered_until_flushed(self):
+        db = FakeDataBase()
+        outbox = Outbox(db)
+        outbox.add("bts", 1, 10, {"message_text": "hi"}, RuntimeError("503"))
+        self.assertEqual((outbox.pending, db.inserted), (1, []))
+
+        await outbox.flush()
+        self.assertEqual(outbox.pending, 0)
+        community_name, content_id, channel_id, payload, _, error = db.inserted[0]
+        self.assertEqual((community_name, content_id, channel_id, json.loads(payload), error),
+                         ("bts", 1, 10, {"message_text": "hi"}, "503"))
+
+    async def test_marks_dead_after_max_attempts(self):
+        db = FakeDataBase()
+        outbox = Outbox(db, max_attempts=3)
+        await outbox.record_failures([("bts", 1, 10, 2, "503", {"sent_messages": 1}),
+                                      ("bts", 1, 11, 3, "503", {})])
+        self.assertEqual([update[-2] for update in db.updated], [False, True])
+        self.assertEqual(json.loads(db.updated[0][-1]), {"sent_messages": 1})
+        self.assertEqual(outbox.dead, 1)
+
+
+class HTTPException(Exception):
+    status = 503
+
+
+class FakeChannel:
+    def __init__(self, fail_at=None):
+        self.id = 10
+        self.guild = SimpleNamespace(me=True)
+        self.fail_at = fail_at  # the send that fails (ex: 2 for the second message).
+        self.sends = 0
+        self.received = []
+
+    async def send(self, content=None, embed=None, files=None):
+        self.sends += 1
+        if self.sends == self.fail_at:
+            raise HTTPException("503 Service Unavailable")
+        self.received.append(embed.title if embed else content)
+
+
+class TestPartialDelivery(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.channel = FakeChannel(fail_at=2)
+        self.outbox = Outbox(FakeDataBase())
+        access = SimpleNamespace(can_send=True, can_embed=True, can_attach=True, can_publish=False)
+        self.cog = SimpleNamespace(
+            bot=SimpleNamespace(get_channel=lambda channel_id: self.channel),
+            _resolver=SimpleNamespace(is_missing=lambda channel_id: False, get_access=lambda channel: access),
+            _metrics=SimpleNamespace(inc=lambda *args, **kwargs: None), _packer=MessagePacker(max_embeds=1),
+            _outbox=self.outbox, _pending_deliveries=[])
+        for method in ("send_weverse_to_channel", "send_packed_message", "publish_messages"):
+            setattr(self.cog, method, partial(getattr(Weverse, method), self.cog))
+
+    async def test_retries_only_the_messages_that_were_not_sent(self):
+        channel_info = TextChannel(10, None, True, True)
+        embeds = [discord.Embed(title="Post #1/2"), discord.Embed(title="Post #2/2")]
+        await Weverse.deliver_to_channel(self.cog, ("bts", 1), channel_info, "https://weverse.io", embeds, False,
+                                         True, "bts")
+        self.assertEqual(self.channel.received, ["Post #1/2"])
+        payload = json.loads(self.outbox._pending[0][3])
+        self.assertEqual(payload["sent_messages"], 1)
+
+        delivered, failures = [], []
+        await Weverse.retry_delivery(self.cog, "bts", 1, channel_info, payload, 0, delivered, failures)
+        self.assertEqual((delivered, failures), ([("bts", 1, 10)], []))
+        self.assertEqual(self.channel.received, ["Post #1/2", "Post #2/2", "https://weverse.io"])
+
+    async def test_a_failed_retry_keeps_its_progress(self):
+        payload = {"message_text": "https://weverse.io", "embeds": [{"title": "Post #1/2"}, {"title": "Post #2/2"}],
+                   "is_comment": False, "is_media": True, "media": None, "video_file_paths": None,
+                   "merged_content_ids": None, "sent_messages": 1}
+        delivered, failures = [], []
+        await Weverse.retry_delivery(self.cog, "bts", 1, TextChannel(10, None, True, True), payload, 1, delivered,
+                                     failures)
+        self.assertEqual(self.channel.received, ["Post #2/2"])
+        self.assertEqual([(attempts, payload["sent_messages"]) for *_, attempts, _, payload in failures], [(2, 2)])
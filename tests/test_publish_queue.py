@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from models import PublishQueue
+
+
+class HTTPException(Exception):
+    def __init__(self, status):
+        super().__init__(f"{status}")
+        self.status = status
+
+
+class FakeMessage:
+    def __init__(self, message_id, channel_id=1, errors=()):
+        self.id = message_id
+        self.channel = SimpleNamespace(id=channel_id)
+        self.errors = list(errors)  # raised by the next publishes, in order.
+        self.attempts = 0
+
+    async def publish(self):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+class TestPublishQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.publisher = PublishQueue(workers=1, channel_rate=1, channel_per=0.05, max_retries=2)
+        self.publisher.start()
+
+    async def asyncTearDown(self):
+        self.publisher.stop()
+
+    async def test_publishes_in_the_background(self):
+        message = FakeMessage(1)
+        self.publisher.put(message)
+        await asyncio.sleep(0.01)
+        self.assertEqual((message.attempts, self.publisher.published, self.publisher.depth), (1, 1, 0))
+
+    async def test_requeues_a_message_until_its_channel_has_budget(self):
+        first, second, other_channel = FakeMessage(1), FakeMessage(2), FakeMessage(3, channel_id=2)
+        for message in (first, second, other_channel):
+            self.publisher.put(message)
+        await asyncio.sleep(0.01)
+        # the worker was not held by the second message, so the other channel was published.
+        self.assertEqual([message.attempts for message in (first, second, other_channel)], [1, 0, 1])
+        self.assertEqual(self.publisher.depth, 1)
+
+        await asyncio.sleep(0.06)
+        self.assertEqual((second.attempts, self.publisher.published, self.publisher.depth), (1, 3, 0))
+
+    async def test_retries_a_rate_limited_publish(self):
+        message = FakeMessage(1, channel_id=3, errors=[HTTPException(429)])
+        self.publisher.channel_rate = 10
+        with mock.patch("models.PublishQueue.uniform", return_value=0.001):  # backs off for 5 ms
+            self.publisher.put(message)
+            await asyncio.sleep(0.05)
+        self.assertEqual((message.attempts, self.publisher.rate_limited, self.publisher.published), (2, 1, 1))
+
+    async def test_gives_up_after_max_retries(self):
+        message = FakeMessage(1, channel_id=3, errors=[HTTPException(429)] * 3)
+        self.publisher.channel_rate = 10
+        with mock.patch("models.PublishQueue.uniform", return_value=0.001):
+            self.publisher.put(message)
+            await asyncio.sleep(0.1)
+        self.assertEqual((message.attempts, self.publisher.failed, self.publisher.published), (3, 1, 0))
+
+    async def test_does_not_retry_other_errors(self):
+        message = FakeMessage(1, errors=[HTTPException(403)])
+        self.publisher.put(message)
+        await asyncio.sleep(0.01)
+        self.assertEqual((message.attempts, self.publisher.failed), (1, 1))
@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+
+from models import TranslationCache
+
+
+class FakeDataBase:
+    is_ready = True
+
+    def __init__(self):
+        self.translations = {}
+
+    async def fetch_translation(self, key):
+        return self.translations.get(key)
+
+    async def insert_translation(self, key, translation):
+        self.translations[key] = translation
+
+
+class TestTranslationCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+
+    def translator(self, translation="hello", delay=0):
+        async def translate():
+            self.requests.append(translation)
+            await asyncio.sleep(delay)
+            return translation
+        return translate
+
+    async def test_reuses_a_translation(self):
+        cache = TranslationCache()
+        self.assertEqual(await cache.get_or_translate("안녕", self.translator()), "hello")
+        self.assertEqual(await cache.get_or_translate("안녕", self.translator("hi")), "hello")
+        self.assertEqual((self.requests, cache.hits, cache.misses), (["hello"], 1, 1))
+
+    async def test_concurrent_requests_share_a_translation(self):
+        cache = TranslationCache()
+        translations = await asyncio.gather(*[cache.get_or_translate("안녕", self.translator(delay=0.01))
+                                              for _ in range(3)])
+        self.assertEqual((translations, self.requests), (["hello"] * 3, ["hello"]))
+
+    async def test_evicts_the_least_recently_used_translation(self):
+        cache = TranslationCache(max_entries=2)
+        await cache.get_or_translate("a", self.translator("a"))
+        await cache.get_or_translate("b", self.translator("b"))
+        await cache.get_or_translate("a", self.translator("a"))  # a is now used more recently than b.
+        await cache.get_or_translate("c", self.translator("c"))
+        self.assertEqual(len(cache), 2)
+        await cache.get_or_translate("a", self.translator("a"))
+        await cache.get_or_translate("b", self.translator("b"))
+        self.assertEqual(self.requests, ["a", "b", "c", "b"])
+
+    async def test_failed_translations_are_not_cached(self):
+        cache = TranslationCache()
+        self.assertIsNone(await cache.get_or_translate("안녕", self.translator(None)))
+        self.assertEqual(await cache.get_or_translate("안녕", self.translator()), "hello")
+
+    async def test_persisted_translations_survive_a_restart(self):
+        db = FakeDataBase()
+        await TranslationCache(db=db).get_or_translate("안녕", self.translator())
+        self.assertEqual(await TranslationCache(db=db).get_or_translate("안녕", self.translator("hi")), "hello")
+        self.assertEqual(self.requests, ["hello"])
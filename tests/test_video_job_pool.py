@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from cogs.Weverse import Weverse
+from models import VideoJobPool
+
+
+class TestVideoJobPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.folder = TemporaryDirectory()
+        self.downloads = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def asyncTearDown(self):
+        self.pool.stop()
+        self.folder.cleanup()
+
+    def get_path(self, file_name) -> str:
+        return path.join(self.folder.name, file_name)
+
+    def write(self, file_location, size):
+        with open(file_location, "wb") as fd:
+            fd.write(b"0" * size)
+
+    async def download(self, video, output_file_path, segment_paths):
+        """Writes a segment, waits to be released, and then writes a stream of `video` bytes."""
+        self.downloads.append(video)
+        segment_path = self.get_path(f"{video}.ts")
+        segment_paths.append(segment_path)
+        self.write(segment_path, 1)
+        await self.release.wait()
+        self.write(output_file_path, video)
+
+    def start(self, **kwargs) -> VideoJobPool:
+        self.pool = VideoJobPool(self.download, folder=self.folder.name, **kwargs)
+        self.pool.start()
+        return self.pool
+
+    async def test_downloads_one_stream_at_a_time(self):
+        pool = self.start()
+        self.release.clear()
+        futures = [pool.submit(size, f"{size}.mp4") for size in (5, 6)]
+        await asyncio.sleep(0.01)
+        self.assertEqual((self.downloads, pool.depth), ([5], 1))
+
+        self.release.set()
+        self.assertEqual(await asyncio.gather(*futures), [self.get_path("5.mp4"), self.get_path("6.mp4")])
+        self.assertEqual((pool.downloaded, pool.bytes_downloaded), (2, 11))
+
+    async def test_streams_over_the_budget_are_removed(self):
+        pool = self.start(max_bytes=5)
+        self.assertIsNone(await pool.submit(6, "6.mp4"))
+        self.assertFalse(path.exists(self.get_path("6.mp4")))
+        self.assertEqual(pool.over_budget, 1)
+
+    async def test_cancelling_a_job_stops_its_download_and_removes_its_files(self):
+        pool = self.start()
+        self.release.clear()
+        unrelated_segment = self.get_path("unrelated.ts")
+        self.write(unrelated_segment, 1)
+
+        future = pool.submit(5, "5.mp4")
+        await asyncio.sleep(0.01)
+        self.assertTrue(path.exists(self.get_path("5.ts")))
+        pool.cancel([future])
+        await asyncio.sleep(0.01)
+        self.assertFalse(path.exists(self.get_path("5.ts")))
+        self.assertTrue(path.exists(unrelated_segment))
+        self.assertEqual(pool.cancelled, 1)
+
+        # the pool keeps downloading the next jobs.
+        self.release.set()
+        self.assertEqual(await pool.submit(6, "6.mp4"), self.get_path("6.mp4"))
+
+    async def test_jobs_cancelled_before_they_start_are_skipped(self):
+        pool = self.start()
+        self.release.clear()
+        first = pool.submit(5, "5.mp4")
+        pool.cancel([pool.submit(6, "6.mp4")])
+        self.release.set()
+        await first
+        await asyncio.sleep(0.01)
+        self.assertEqual((self.downloads, pool.cancelled), ([5], 1))
+
+
+class FakeWeverseClient:
+    def __init__(self):
+        self.written = []
+
+    async def _download_ts_files(self, urls, file_paths):
+        self.written.extend(file_paths)
+        return file_paths
+
+    async def download_video_stream(self, video, output_file_path):
+        await self._download_ts_files(["https://weverse.io/0.ts"], ["./0.ts"])
+
+
+class TestRecordSegments(unittest.IsolatedAsyncioTestCase):
+    async def test_records_the_segments_of_a_download(self):
+        cog = SimpleNamespace(weverse_client=FakeWeverseClient())
+        segment_paths = []
+        await Weverse.download_video_stream(cog, None, "video.mp4", segment_paths)
+        self.assertEqual((segment_paths, cog.weverse_client.written), (["./0.ts"], ["./0.ts"]))
+        self.assertNotIn("_download_ts_files", vars(cog.weverse_client))  # the client's method is restored.
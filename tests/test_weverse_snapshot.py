@@ -0,0 +1,63 @@
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from models import WeverseSnapshot
+
+COMMUNITY = {
+    "id": 2, "name": "BTS", "fullname": "BTS", "memberCount": 10,
+    "artists": [{"id": 7, "communityUserId": 70, "name": "RM", "listName": ["RM"], "communityId": 2}],
+    "tabs": [{"id": 3, "name": "Artist"}],
+    "posts": [{"id": post_id, "type": "NORMAL", "body": f"post {post_id}", "communityUser": {"id": 70, "artistId": 7},
+               "photos": [{"id": post_id, "orgImgUrl": f"https://weverse.io/{post_id}.jpg",
+                           "downloadImgFilename": f"{post_id}.jpg"}],
+               "attachedVideos": [], "artistComments": [{"id": post_id + 1000, "body": "hi", "postId": post_id}]}
+              for post_id in (100, 101, 102)],
+}
+
+
+def get_client():
+    return SimpleNamespace(all_communities={}, all_artists={}, all_tabs={}, all_posts={}, all_photos={})
+
+
+class TestWeverseSnapshot(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.folder = TemporaryDirectory()
+        self.snapshot = WeverseSnapshot(path.join(self.folder.name, "snapshot.json"), max_posts=2)
+        self.source = get_client()
+        self.snapshot.apply(self.source, {"version": WeverseSnapshot.VERSION, "communities": [COMMUNITY]})
+
+    async def asyncTearDown(self):
+        self.folder.cleanup()
+
+    async def test_round_trip(self):
+        await self.snapshot.save(self.source)
+        client = get_client()
+        self.assertEqual(await WeverseSnapshot(self.snapshot.file_path).load(client), 1)
+
+        community = client.all_communities[2]
+        self.assertEqual((community.name, [artist.name for artist in community.artists]), ("BTS", ["RM"]))
+        self.assertEqual((list(client.all_artists), list(client.all_tabs)), ([7], [3]))
+        # only the most recent posts are kept.
+        self.assertEqual(sorted(client.all_posts), [101, 102])
+        post = client.all_posts[102]
+        self.assertEqual((post.body, post.artist.name, post.artist.community.name), ("post 102", "RM", "BTS"))
+        self.assertEqual([photo.file_name for photo in post.photos], ["102.jpg"])
+        self.assertEqual([comment.body for comment in post.artist_comments], ["hi"])
+        self.assertIs(client.all_photos[102], post.photos[0])
+
+    async def test_does_not_replace_the_client_cache(self):
+        await self.snapshot.save(self.source)
+        client = get_client()
+        community = client.all_communities[2] = SimpleNamespace(id=2, name="BTS (live)")
+        self.assertEqual(await self.snapshot.load(client), 0)
+        self.assertIs(client.all_communities[2], community)
+
+    async def test_ignores_a_missing_or_outdated_snapshot(self):
+        self.assertEqual(await self.snapshot.load(get_client()), 0)
+        self.assertEqual(self.snapshot.apply(get_client(), {"version": 0, "communities": [COMMUNITY]}), 0)
+
+    async def test_never_saves_an_empty_cache(self):
+        await self.snapshot.save(get_client())
+        self.assertFalse(path.exists(self.snapshot.file_path))
@@ -0,0 +1,87 @@
+import unittest
+
+from models import WriteBehindQueue
+
+
+class FakeDataBase:
+    is_ready = True
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    async def apply_channel_changes(self, deletes, upserts, media_updates, comments_updates, role_updates):
+        if self.fail:
+            raise ConnectionError("db is down")
+        self.batches.append((deletes, upserts, media_updates, comments_updates, role_updates))
+
+
+class TestWriteBehindQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_coalesces_changes_into_the_insert(self):
+        db = FakeDataBase()
+        queue = WriteBehindQueue(db)
+        await queue.insert_weverse_channel(1, "BTS")
+        await queue.toggle_media(1, "bts", True)
+        await queue.update_role(1, "bts", 5)
+        await queue.flush()
+        self.assertEqual(db.batches, [([], [(1, "bts", False, True, 5)], [], [], [])])
+
+    async def test_delete_wins_over_later_updates(self):
+        db = FakeDataBase()
+        queue = WriteBehindQueue(db)
+        await queue.toggle_comments(1, "bts", True)
+        await queue.delete_weverse_channel(1, "bts")
+        await queue.toggle_media(1, "bts", True)
+        await queue.flush()
+        self.assertEqual(db.batches, [([(1, "bts")], [], [], [], [])])
+
+    async def test_updates_of_separate_columns_are_merged(self):
+        db = FakeDataBase()
+        queue = WriteBehindQueue(db)
+        await queue.toggle_media(1, "bts", True)
+        await queue.toggle_comments(1, "bts", False)
+        await queue.flush()
+        self.assertEqual(db.batches, [([], [], [(False, 1, "bts")], [(True, 1, "bts")], [])])
+
+    async def test_failed_flush_keeps_the_changes(self):
+        db = FakeDataBase(fail=True)
+        queue = WriteBehindQueue(db)
+        await queue.delete_weverse_channel(1, "bts")
+        await queue.flush()
+        self.assertEqual(len(queue), 1)
+
+        db.fail = False
+        await queue.flush()
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(db.batches, [([(1, "bts")], [], [], [], [])])
+
+    async def test_failed_insert_is_merged_with_later_updates(self):
+        db = FakeDataBase(fail=True)
+        queue = WriteBehindQueue(db)
+        await queue.insert_weverse_channel(1, "bts")
+
+        async def apply_channel_changes(*changes):
+            await queue.toggle_media(1, "bts", True)  # queued while the flush is in progress.
+            raise ConnectionError("db is down")
+
+        db.apply_channel_changes = apply_channel_changes
+        await queue.flush()
+        del db.apply_channel_changes
+        db.fail = False
+        await queue.flush()
+        self.assertEqual(db.batches, [([], [(1, "bts", False, True, None)], [], [], [])])
+
+    async def test_failed_delete_is_kept_over_later_updates(self):
+        db = FakeDataBase()
+        queue = WriteBehindQueue(db)
+        await queue.delete_weverse_channel(1, "bts")
+
+        async def apply_channel_changes(*changes):
+            await queue.update_role(1, "bts", 5)
+            raise ConnectionError("db is down")
+
+        db.apply_channel_changes = apply_channel_changes
+        await queue.flush()
+        del db.apply_channel_changes
+        await queue.flush()
+        self.assertEqual(db.batches, [([(1, "bts")], [], [], [], [])])